@@ -0,0 +1,144 @@
+"""Benchmark of the grouping and sorting stage of create_review_document.
+
+Times the grouping of records by species and the sorting of each species'
+records on a synthetic records file, and compares it with sorting by
+day_number, the sort key create_review_document used before, which parses the
+date of every record on each call.
+
+    python -m benchmarks.bench_document_order [--records N] [--repeat R]
+"""
+
+import argparse
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+from get_reports import create_review_document, taxonomy_index
+
+
+def _parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    arg_parser = argparse.ArgumentParser(
+        prog="bench_document_order",
+        description="Benchmark grouping and sorting of records to review.",
+    )
+    arg_parser.add_argument(
+        "--records", type=int, default=20000, help="number of records"
+    )
+    arg_parser.add_argument(
+        "--species", type=int, default=400, help="number of species"
+    )
+    arg_parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed runs"
+    )
+    return arg_parser.parse_args()
+
+
+def make_records(records: int, species: int, seed: int = 0) -> tuple:
+    """
+    Make a synthetic taxonomy and list of counties with records.
+
+    Returns:
+        tuple: (taxonomy, counties) in the formats used by
+            create_review_document.
+    """
+    rng = random.Random(seed)
+    taxonomy = [
+        {
+            "comName": f"Species {i}",
+            "sciName": f"Genus species{i}",
+            "speciesCode": f"spe{i}",
+            "taxonOrder": float(i),
+        }
+        for i in range(17000)
+    ]
+    names = [taxon["comName"] for taxon in rng.sample(taxonomy, species)]
+    start = date(2024, 1, 1)
+    counties = []
+    for county in range(100):
+        counties.append(
+            {
+                "county": f"County {county}",
+                "records": [
+                    {
+                        "observation": {
+                            "comName": rng.choice(names),
+                            "subnational2Name": f"County {county}",
+                            "obsDt": (
+                                start + timedelta(days=rng.randrange(730))
+                            ).isoformat()
+                            + " 08:00",
+                        },
+                        "media": True,
+                    }
+                    for _ in range(records // 100)
+                ],
+            }
+        )
+    return taxonomy, counties
+
+
+def day_number(date_string: str):
+    """Return the day of the year of a YYYY-MM-DD date, or None if it is not
+    a valid date."""
+    try:
+        return int(datetime.strptime(date_string, "%Y-%m-%d").strftime("%j"))
+    except ValueError:
+        return None
+
+
+def order_by_day_number(counties: list, taxonomy: list) -> list:
+    """Group and sort with a taxonomy scan and day_number sort keys."""
+    by_species = {}
+    for county in counties:
+        for record in county["records"]:
+            species = record["observation"]["comName"]
+            if species not in by_species:
+                by_species[species] = {
+                    "taxon": next(
+                        (t for t in taxonomy if t["comName"] == species), {}
+                    ),
+                    "records": [],
+                }
+            by_species[species]["records"].append(record)
+    return [
+        sorted(
+            by_species[species]["records"],
+            key=lambda x: (
+                x["observation"].get("subnational2Name", ""),
+                day_number(x["observation"]["obsDt"][:10]),
+            ),
+        )
+        for species in sorted(
+            by_species, key=lambda s: by_species[s]["taxon"]["taxonOrder"]
+        )
+    ]
+
+
+def order_by_sort_keys(counties: list, index) -> list:
+    """Group and sort as create_review_document does."""
+    # pylint: disable=protected-access
+    return [
+        records
+        for _, records in create_review_document._species_in_order(
+            counties, index
+        )
+    ]
+
+
+def main():
+    """Run the benchmark and print the best time of each method."""
+    args = _parse_arguments()
+    taxonomy, counties = make_records(args.records, args.species)
+    index = taxonomy_index.TaxonomyIndex(taxonomy)
+
+    for name, run in (
+        ("day_number", lambda: order_by_day_number(counties, taxonomy)),
+        ("sort keys", lambda: order_by_sort_keys(counties, index)),
+    ):
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:>15}: {best * 1000:8.1f} ms for {args.records} records")
+
+
+if __name__ == "__main__":
+    main()
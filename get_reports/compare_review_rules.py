@@ -0,0 +1,251 @@
+"""Compare what several versions of the review rules would flag.
+
+The observations are read once, from the eBird API or an EBD file, and
+classified against every rules file in the same pass. The output lists the
+records each version flags and how each version differs from the first.
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import date, datetime
+
+from ebird.api import get_regions, get_taxonomy
+
+from get_reports import (
+    ebird_data_access,
+    get_ebird_api_key,
+    get_records_to_review,
+    get_review_rules,
+    get_state_list,
+    historic_observation_cache,
+    taxonomy_index,
+)
+
+
+def _parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    arg_parser = argparse.ArgumentParser(
+        prog="compare_review_rules",
+        description="Compare the records flagged by several review rule files.",
+    )
+    arg_parser.add_argument(
+        "--year", type=int, help="Year to review YYYY", default=None
+    )
+    arg_parser.add_argument(
+        "--month",
+        type=int,
+        help="Month to review MM. Defaults to 00 for all months in year.",
+        default=0,
+    )
+    arg_parser.add_argument(
+        "--day",
+        type=int,
+        help="Day to review DD. Defaults to 00 for all days in month.",
+        default=0,
+    )
+    arg_parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        help="First day to review YYYY-MM-DD, instead of --year",
+        default=None,
+    )
+    arg_parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        help="Last day to review YYYY-MM-DD, used with --start",
+        default=None,
+    )
+    arg_parser.add_argument(
+        "--rules",
+        nargs="+",
+        help="Review rules files to compare. The first is the baseline.",
+        required=True,
+    )
+    arg_parser.add_argument(
+        "--region",
+        help="Region to review in the format US-SS, or US-SS-CCC",
+        default="US-VA",
+    )
+    arg_parser.add_argument("--EBD", help="eBird Database file", default="")
+    arg_parser.add_argument(
+        "--cache",
+        help="Directory to cache eBird historic observations in",
+        default="",
+    )
+    arg_parser.add_argument(
+        "--output",
+        help="Comparison output file",
+        default="reports/rule_comparison.json",
+    )
+    arg_parser.add_argument(
+        "--verbose", action="store_true", help="increase verbosity"
+    )
+    args = arg_parser.parse_args()
+    if args.start is None and args.end is None:
+        if args.year is None:
+            arg_parser.error("--year, or --start and --end, are required")
+    elif args.start is None or args.end is None:
+        arg_parser.error("--start and --end must be given together")
+    elif args.year is not None:
+        arg_parser.error("--year cannot be used with --start and --end")
+    elif args.end < args.start:
+        arg_parser.error("--end is before --start")
+    return args
+
+
+def _date_range(args: argparse.Namespace):
+    """Return the (start, end) dates to review, or None if not given."""
+    if args.start is None:
+        return None
+    return (args.start, args.end)
+
+
+def _record_keys(records_to_review: list) -> dict:
+    """
+    Index records to review by (county, checklist, species).
+
+    Returns:
+        dict: A short summary of each record keyed by its identity.
+    """
+    keys = {}
+    for county in records_to_review:
+        for record in county["records"]:
+            observation = record["observation"]
+            keys[
+                (
+                    county["county"],
+                    observation.get("subId", ""),
+                    observation.get("speciesCode", ""),
+                )
+            ] = {
+                "county": county["county"],
+                "comName": observation["comName"],
+                "obsDt": observation.get("obsDt", ""),
+                "subId": observation.get("subId", ""),
+                "new": record["new"],
+            }
+    return keys
+
+
+def _compare(names: list, records_by_rule_set: list) -> list:
+    """
+    Work out which records each rule set adds or removes relative to the
+    first (baseline) rule set.
+
+    Args:
+        names (list): The name of each rule set.
+        records_by_rule_set (list): Records to review for each rule set.
+
+    Returns:
+        list: One entry per rule set after the first, with "name",
+            "baseline", "added" and "removed" keys.
+    """
+    baseline = _record_keys(records_by_rule_set[0])
+    differences = []
+    for name, records in zip(names[1:], records_by_rule_set[1:]):
+        keys = _record_keys(records)
+        differences.append(
+            {
+                "name": name,
+                "baseline": names[0],
+                "added": [keys[k] for k in sorted(keys.keys() - baseline)],
+                "removed": [
+                    baseline[k] for k in sorted(baseline.keys() - keys)
+                ],
+            }
+        )
+    return differences
+
+
+def _observation_period(
+    year: int, month: int, day: int, date_range: tuple = None
+) -> str:
+    """Return the period reviewed as YYYY, YYYY-MM, YYYY-MM-DD or, for a
+    date range, YYYY-MM-DD/YYYY-MM-DD."""
+    if date_range is not None:
+        start, end = date_range
+        return f"{start.isoformat()}/{end.isoformat()}"
+    if month == 0:
+        return f"{year:04d}"
+    if day == 0:
+        return f"{year:04d}-{month:02d}"
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def main():
+    """
+    Classify one pass of observations with every rules file given and save
+    the per-version records and their differences from the first version.
+    """
+    args = _parse_arguments()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    if args.EBD != "" and not os.path.exists(args.EBD):
+        logging.error("eBird Database file %s not found. Exiting.", args.EBD)
+        return
+    if args.cache:
+        ebird_data_access.set_historic_cache(
+            historic_observation_cache.HistoricObservationCache(args.cache)
+        )
+    ebird_api_key = get_ebird_api_key.get_ebird_api_key()
+    taxonomy = taxonomy_index.TaxonomyIndex(get_taxonomy(ebird_api_key))
+    region = args.region
+    state = region[:5]
+    county_list = get_regions(
+        token=ebird_api_key, rtype="subnational2", region=state
+    )
+    counties = [
+        county
+        for county in county_list
+        if state == region or county["code"] == region
+    ]
+    if not counties:
+        logging.error(
+            "Region %s not found in county list of %s. Exiting.",
+            region,
+            state,
+        )
+        return
+    rule_sets = [
+        get_review_rules.compile_review_rules(
+            get_state_list.get_state_list(rules_file, taxonomy=taxonomy),
+            get_review_rules.get_review_rules(
+                rules_file, taxonomy, county_list, state
+            ),
+            taxonomy.rollup,
+        )
+        for rules_file in args.rules
+    ]
+    records_by_rule_set = get_records_to_review.get_records_for_rule_sets(
+        ebird_api_key=ebird_api_key,
+        database_file=args.EBD,
+        rule_sets=rule_sets,
+        counties=counties,
+        year=args.year,
+        month=args.month,
+        day=args.day,
+        taxonomy=taxonomy,
+        date_range=_date_range(args),
+    )
+    output_json = {
+        "date of observations": _observation_period(
+            args.year, args.month, args.day, _date_range(args)
+        ),
+        "region": region,
+        "date of report": datetime.now().strftime("%Y-%m-%d"),
+        "rule sets": [
+            {"name": name, "records": records}
+            for name, records in zip(args.rules, records_by_rule_set)
+        ],
+        "differences": _compare(args.rules, records_by_rule_set),
+    }
+    with open(args.output, "wt", encoding="utf-8") as f:
+        json.dump(output_json, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,26 +3,63 @@ This module provides the ContinuationRecord helper class which persists a small
 progress-tracking JSON file to allow a long-running or multi-run report
 processing workflow to continue where it left off. The continuation file
 contains the list of counties that have been finished and an optional list of
-records left to review.
+records left to review, and for counties that are part way through, the days
+that have been finished and their records.
+
+Progress is appended to a journal next to the continuation file, one fsync'd
+line per finished county or county-day holding only the records added since
+the previous line, so a checkpoint costs the size of what changed rather than
+a rewrite of everything so far. The journal is folded back into the
+continuation file when a run restarts and once the journal is larger than the
+continuation file, so the rewrites cost no more than the journal lines that
+caused them. The continuation file is
+always replaced atomically, and a line cut short by a crash is ignored.
+
+A run can key its continuation file by its parameters, so that runs for
+different regions or periods sharing a reports directory each restart from
+their own file. A lock file created with O_EXCL stops two processes using the
+same continuation file at once; a lock left by a process that is no longer
+running on this host is taken over.
+
+TransientContinuationRecord has the same methods but keeps nothing on disk,
+for reviews that are made restartable in another way, such as the units of a
+work queue.
 """
 
 import json
 import logging
+import os
+import shutil
+import socket
+import tempfile
+from datetime import date
 from pathlib import Path
 
+# Size in bytes the journal must reach before it is compacted into the
+# continuation file, however small that file is.
+COMPACT_MIN_BYTES = 64 * 1024
+
 
 class ContinuationRecord:
     """
     Manage a simple on-disk "continuation" checkpoint for long-running processing of counties
     and their associated review records.
     This class encapsulates reading, updating, and removing a JSON-based checkpoint file
-    (default: "reports/continuation_data.dat") that stores two keys:
+    (default: "reports/continuation_data.dat") that stores four keys:
     - "counties": a list of counties that have already been processed (order preserved).
     - "records": a list of review records that should be carried forward between runs.
+    - "days": for each county code part way through,
+      {"days": [ISO dates finished], "records": [records found on those days]}.
+    - "sequence": the number of the last journal line included in the file.
+    and its journal (the same name with ".journal" appended), in which each
+    line is {"sequence": n, "county": county, "records": [records added with
+    the county]} for a finished county, or {"sequence": n, "county": code,
+    "day": ISO date, "records": [records of the day]} for a finished
+    county-day.
     """
     _continuation_file = "reports/continuation_data.dat"
 
-    def __init__(self, initial_list):
+    def __init__(self, initial_list, run_key: str = None):
         """
         Initialize the continuation/record state for processing a list of items.
 
@@ -34,15 +71,20 @@ class ContinuationRecord:
             (a list of saved record-review state). The constructor:
                 - Loads finished_counties from continuation_data["counties"].
                 - Loads self._records_to_review from continuation_data["records"].
+                - Replays the journal lines newer than the continuation file and
+                  compacts them into it.
                 - Logs a warning indicating how many counties remain to process.
         - If the continuation file does not exist, the constructor creates it with the
-            initial content {"counties": [], "records": []}, and initializes
-            finished_counties and self._records_to_review as empty lists.
+            initial content
+            {"counties": [], "records": [], "days": {}, "sequence": 0},
+            removes any stale journal, and initializes finished_counties and
+            self._records_to_review as empty lists.
         - On OSError (file access/creation problems), an error is logged and the
             exception is re-raised.
 
         After loading or creating the continuation file, self._remaining_counties is
         set to the subset of initial_list that are not present in finished_counties.
+        Counties are compared by code, using a set.
 
         Parameters
         ----------
@@ -50,6 +92,11 @@ class ContinuationRecord:
                 The full list of county identifiers (or items) that should be processed.
                 Used to compute remaining items by excluding those found in the continuation
                 file's "counties" list.
+        run_key : str, optional
+                Identifies the run, e.g. a hash of its region, period and
+                rules. The continuation file is then
+                "continuation_<run_key>.dat" in the directory of the default
+                file.
 
         Side effects
         ------------
@@ -63,59 +110,264 @@ class ContinuationRecord:
         ------
         OSError
                 Re-raised if there is an error accessing or creating the continuation file.
+        FileExistsError
+                If another running process holds the lock on the
+                continuation file.
 
         Expected continuation file format (JSON)
         ---------------------------------------
         {
                 "counties": [...],   # list of identifiers already processed
-                "records": [...]     # list of saved in-progress records to review
+                "records": [...],    # saved in-progress records to review
+                "days": {...},       # finished days of unfinished counties
+                "sequence": n        # last journal line included
         }
         """
+        if run_key is not None:
+            self._continuation_file = str(
+                Path(self._continuation_file).with_name(
+                    f"continuation_{run_key}.dat"
+                )
+            )
         p = Path(self._continuation_file)
+        self._journal = Path(self._continuation_file + ".journal")
+        self._lock = Path(self._continuation_file + ".lock")
+        self._sequence = 0
+        self._finished_days = {}
+        self._day_records = {}
+        self._checkpoint_bytes = 0
+        self._acquire_lock()
+        self._restarted = p.exists()
         try:
-            if p.exists():
-                with p.open("r", encoding="utf-8") as fh:
-                    continuation_data = json.load(fh)
-                    finished_counties = continuation_data["counties"]
-                    self._records_to_review = continuation_data["records"]
+            if self._restarted:
+                finished_counties, self._records_to_review = self._load(p)
                 logging.info(
                     "Restarting with %d counties remaining out of %d",
                     len(initial_list) - len(finished_counties),
                     len(initial_list),
                 )
+                if self._journal.exists():
+                    self._write_checkpoint(
+                        finished_counties, self._records_to_review
+                    )
+                    self._journal.unlink()
+                else:
+                    self._checkpoint_bytes = p.stat().st_size
             else:
-                with p.open("w", encoding="utf-8") as fh:
-                    json.dump({"counties": [], "records": []}, indent=4, fp=fh)
                 finished_counties = []
                 self._records_to_review = []
+                self._journal.unlink(missing_ok=True)
+                self._write_checkpoint(finished_counties, [])
         except OSError as exc:
             logging.error(
                 "Error loading continuation or creating record %s", exc
             )
             raise
+        self._finished_counties = list(finished_counties)
+        self._review_records = self._records_to_review
+        self._journaled_records = len(self._records_to_review)
+        self._journal_bytes = 0
+        finished_keys = {self._county_key(x) for x in finished_counties}
         self._remaining_counties = [
-            x for x in initial_list if x not in finished_counties
+            x for x in initial_list if self._county_key(x) not in finished_keys
         ]
 
+    def _acquire_lock(self):
+        """
+        Create the lock file of the continuation file, taking over a lock left
+        by a process of this host that is no longer running.
+
+        Raises:
+            FileExistsError: If another running process holds the lock.
+        """
+        owner = f"{os.getpid()} {socket.gethostname()}"
+        for _ in range(2):
+            try:
+                fd = os.open(
+                    self._lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644
+                )
+            except FileExistsError:
+                if not self._lock_is_stale():
+                    logging.error(
+                        "Continuation file %s is in use by another run. "
+                        "Remove %s if that run is no longer running.",
+                        self._continuation_file,
+                        self._lock,
+                    )
+                    raise
+                logging.warning("Taking over stale lock %s", self._lock)
+                self._lock.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(owner)
+            return
+        raise FileExistsError(str(self._lock))
+
+    def _lock_is_stale(self) -> bool:
+        """
+        Return True if the lock was left by this process, or by a process of
+        this host that is no longer running.
+        """
+        try:
+            pid, host = self._lock.read_text(encoding="utf-8").split(" ", 1)
+            pid = int(pid)
+        except FileNotFoundError:
+            return True
+        except (OSError, ValueError):
+            return False
+        if host != socket.gethostname():
+            return False
+        if pid == os.getpid():
+            return True
+        if os.name != "posix":
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def partial_directory(self) -> Path:
+        """
+        Return the directory for the partial results of this run, next to the
+        continuation file. It is removed by complete().
+        """
+        p = Path(self._continuation_file)
+        return p.with_name(p.stem + ".partial")
+
+    def release(self):
+        """Release the lock on the continuation file without removing it."""
+        self._lock.unlink(missing_ok=True)
+
+    def _load(self, p: Path) -> tuple:
+        """
+        Read the continuation file and replay the journal lines written
+        after it.
+
+        Returns:
+            tuple: (finished counties, records to review).
+        """
+        with p.open("r", encoding="utf-8") as fh:
+            continuation_data = json.load(fh)
+        finished_counties = continuation_data["counties"]
+        records = continuation_data["records"]
+        self._sequence = continuation_data.get("sequence", 0)
+        for code, county_days in continuation_data.get("days", {}).items():
+            self._finished_days[code] = set(county_days["days"])
+            self._day_records[code] = county_days["records"]
+        if self._journal.exists():
+            with self._journal.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logging.warning(
+                            "Ignoring incomplete continuation journal line."
+                        )
+                        break
+                    if entry["sequence"] <= self._sequence:
+                        continue
+                    if "day" in entry:
+                        self._add_finished_day(
+                            entry["county"], entry["day"], entry["records"]
+                        )
+                    else:
+                        finished_counties.append(entry["county"])
+                        records.extend(entry["records"])
+                        self._forget_days(entry["county"])
+                    self._sequence = entry["sequence"]
+        return finished_counties, records
+
+    def _write_checkpoint(self, finished_counties: list, records: list):
+        """Atomically replace the continuation file with the given state."""
+        p = Path(self._continuation_file)
+        tmp_path = p.with_name(p.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "counties": finished_counties,
+                    "records": records,
+                    "days": {
+                        code: {
+                            "days": sorted(days),
+                            "records": self._day_records[code],
+                        }
+                        for code, days in self._finished_days.items()
+                    },
+                    "sequence": self._sequence,
+                },
+                indent=4,
+                fp=fh,
+            )
+            self._checkpoint_bytes = fh.tell()
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, p)
+
+    def _compact(self, review_records: list):
+        """Fold the journal into the continuation file and remove it."""
+        self._write_checkpoint(self._finished_counties, review_records)
+        self._journal.unlink(missing_ok=True)
+        self._review_records = review_records
+        self._journaled_records = len(review_records)
+        self._journal_bytes = 0
+
+    def _append(self, entry: dict):
+        """
+        Append a line to the journal and sync it to disk, compacting the
+        journal once it is larger than the continuation file and
+        COMPACT_MIN_BYTES.
+        """
+        line = json.dumps(entry) + "\n"
+        with self._journal.open("a", encoding="utf-8") as fh:
+            fh.write(line)
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._journal_bytes += len(line.encode("utf-8"))
+        if self._journal_bytes >= max(
+            self._checkpoint_bytes, COMPACT_MIN_BYTES
+        ):
+            self._compact(self._review_records[: self._journaled_records])
+
+    @staticmethod
+    def _county_key(county) -> str:
+        """Return the key the finished days of a county are kept under."""
+        if isinstance(county, dict) and "code" in county:
+            return county["code"]
+        return str(county)
+
+    def _add_finished_day(self, code: str, day: str, records: list):
+        """Remember a finished county-day and its records."""
+        self._finished_days.setdefault(code, set()).add(day)
+        self._day_records.setdefault(code, []).extend(records)
+
+    def _forget_days(self, county):
+        """Drop the finished days of a county once the county is finished."""
+        code = self._county_key(county)
+        self._finished_days.pop(code, None)
+        self._day_records.pop(code, None)
+
     def update(self, county: dict, review_records: list):
         """
-        Update the continuation JSON file by appending a county entry and
-        replacing the records list.
+        Record that a county is finished and that review_records are the
+        records to carry forward.
 
-        This method attempts to open the file at self._continuation_file (using
-        UTF-8 encoding), read its JSON content, append the provided `county`
-        dict to the "counties" list, set the "records" key to `review_records`,
-        and write the updated JSON back to the same file with
-        an indentation of 4 spaces.
+        One line is appended to the journal and synced to disk. review_records
+        is expected to be the same list on every call, only growing, so the
+        line holds just the records added since the previous call. If the list
+        has shrunk, the journal is compacted with the full list instead. Once
+        the journal is larger than the continuation file it is compacted into
+        it.
 
         Parameters
         ----------
         county : dict
             A dictionary representing a county entry to append to the "counties"
-            list in the file.
+            list.
         review_records : list
-            A list of review records that will replace the existing value of the
-            "records" key.
+            The records to carry forward, replacing the previous list.
 
         Returns
         -------
@@ -124,24 +376,76 @@ class ContinuationRecord:
         p = Path(self._continuation_file)
         try:
             if p.exists():
-                with p.open("r", encoding="utf-8") as fh:
-                    continuation_data = json.load(fh)
-                    continuation_data["counties"].append(county)
-                    continuation_data["records"] = review_records
-                with p.open("w", encoding="utf-8") as fh:
-                    json.dump(continuation_data, indent=4, fp=fh)
+                self._finished_counties.append(county)
+                self._forget_days(county)
+                self._sequence += 1
+                if len(review_records) < self._journaled_records:
+                    self._compact(review_records)
+                    return
+                entry = {
+                    "sequence": self._sequence,
+                    "county": county,
+                    "records": review_records[self._journaled_records:],
+                }
+                self._review_records = review_records
+                self._journaled_records = len(review_records)
+                self._append(entry)
             else:
                 logging.error("Continuation file doesn't exist.")
         except OSError as exc:
             logging.error("Error updating continuation  record %s", exc)
             raise
 
+    def day_done(self, county: dict, day: date, records: list):
+        """
+        Record that a day of a county that is not yet finished has been
+        reviewed, with the records found on it.
+
+        Parameters
+        ----------
+        county : dict
+            The county, with a "code" key.
+        day : date
+            The day that has been reviewed.
+        records : list
+            The records found for the county on the day, returned by
+            day_records() if the run is restarted before the county finishes.
+        """
+        code = self._county_key(county)
+        try:
+            self._sequence += 1
+            self._add_finished_day(code, day.isoformat(), records)
+            self._append(
+                {
+                    "sequence": self._sequence,
+                    "county": code,
+                    "day": day.isoformat(),
+                    "records": records,
+                }
+            )
+        except OSError as exc:
+            logging.error("Error updating continuation  record %s", exc)
+            raise
+
+    def day_finished(self, county: dict, day: date) -> bool:
+        """Return True if the day of the county was finished by an earlier
+        run."""
+        return day.isoformat() in self._finished_days.get(
+            self._county_key(county), ()
+        )
+
+    def day_records(self, county: dict) -> list:
+        """Return the records found on the finished days of an unfinished
+        county."""
+        return self._day_records.get(self._county_key(county), [])
+
     def complete(self):
         """Remove the continuation file referenced by this instance.
 
-        Attempts to delete the file at self._continuation_file. If the file
-        exists it will be unlinked. If the file does not exist, an error is
-        logged. Any OSError encountered during deletion is logged and re-raised.
+        Attempts to delete the file at self._continuation_file, its journal,
+        its partial results directory and its lock. If the file exists it
+        will be unlinked. If the file does not exist, an error is logged. Any
+        OSError encountered during deletion is logged and re-raised.
 
         Raises:
             OSError: If an error occurs while deleting the continuation file.
@@ -152,10 +456,13 @@ class ContinuationRecord:
         """
         p = Path(self._continuation_file)
         try:
+            self._journal.unlink(missing_ok=True)
+            shutil.rmtree(self.partial_directory(), ignore_errors=True)
             if p.exists():
                 p.unlink()
             else:
                 logging.error("Continuation file doesn't exist.")
+            self.release()
         except OSError as exc:
             logging.error("Error deleting continuation record %s", exc)
             raise
@@ -173,6 +480,12 @@ class ContinuationRecord:
         """
         return self._remaining_counties
 
+    def restarted(self) -> bool:
+        """Return True if the continuation file of an earlier, interrupted
+        run existed when this instance was created, even if that run had
+        not finished any county."""
+        return self._restarted
+
     def records(self) -> list:
         """Return the list of records queued for review.
 
@@ -183,3 +496,60 @@ class ContinuationRecord:
             This method returns the internal list object (._records_to_review).
         """
         return self._records_to_review
+
+
+class TransientContinuationRecord:
+    """
+    A continuation record that keeps its progress in memory only, so a review
+    that is interrupted starts again from the beginning. It has no lock, and
+    so can be used where the reports directory is shared between machines.
+    """
+
+    def __init__(self, initial_list):
+        self._remaining_counties = list(initial_list)
+        self._records_to_review = []
+        self._partial_directory = None
+
+    def partial_directory(self) -> Path:
+        """Return a temporary directory for partial results, removed by
+        complete()."""
+        if self._partial_directory is None:
+            self._partial_directory = Path(
+                tempfile.mkdtemp(prefix="continuation_")
+            )
+        return self._partial_directory
+
+    def release(self):
+        """Nothing to release; for compatibility with ContinuationRecord."""
+
+    def update(self, county, review_records: list):
+        """Nothing to record; for compatibility with ContinuationRecord."""
+
+    def day_done(self, county: dict, day: date, records: list):
+        """Nothing to record; for compatibility with ContinuationRecord."""
+
+    def day_finished(self, county: dict, day: date) -> bool:
+        """Return False, as no day was finished by an earlier run."""
+        return False
+
+    def day_records(self, county: dict) -> list:
+        """Return [], as no day was finished by an earlier run."""
+        return []
+
+    def complete(self):
+        """Remove the partial results directory, if one was made."""
+        if self._partial_directory is not None:
+            shutil.rmtree(self._partial_directory, ignore_errors=True)
+            self._partial_directory = None
+
+    def counties(self) -> list:
+        """Return the counties to review, which are all of them."""
+        return self._remaining_counties
+
+    def restarted(self) -> bool:
+        """Return False, as there is never an earlier run to continue."""
+        return False
+
+    def records(self) -> list:
+        """Return the list the records to review are collected in."""
+        return self._records_to_review
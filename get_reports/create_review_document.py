@@ -3,13 +3,23 @@
 import argparse
 import json
 import logging
+import math
 import os
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from operator import itemgetter
 
-from docx import Document
+import pandas as pd
 from ebird.api import get_taxonomy
 
-from get_reports import ebird_data_access, get_ebird_api_key
+from get_reports import (
+    docx_writer,
+    ebird_data_access,
+    get_ebird_api_key,
+    records_file,
+    review_renderers,
+    taxonomy_index,
+)
 
 
 def _parse_arguments() -> argparse.Namespace:
@@ -31,220 +41,607 @@ def _parse_arguments() -> argparse.Namespace:
     )
 
     arg_parser.add_argument(
-        "--verbose", action="store_true", help="increase verbosity"
+        "--format",
+        nargs="+",
+        choices=["docx", "html", "md", "csv"],
+        help="Output formats. Defaults to the extension of --output. With "
+        "more than one, --output is used as the base name.",
     )
-    return arg_parser.parse_args()
-
 
-def _load_observations(file_path: str) -> dict:
-    """Load observations from a JSON file."""
-    with open(file_path, "rt", encoding="utf-8") as file:
-        return json.load(file)
-
-
-def _create_document(
-    ebird_api_key: str, observations: dict, taxonomy: list
-) -> Document:
-    """Create a Word document based on observations."""
-    document = Document()
-    _add_document_header(document, observations)
-    _iterate_over_species(
-        ebird_api_key, document, observations["records"], taxonomy=taxonomy
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only look up the records added since the last --incremental "
+        "run, using the manifest kept next to --output.",
     )
-    return document
 
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Render the species sections of the Word document in this many "
+        "worker processes.",
+    )
 
-LIST_BULLET_STYLE = "List Bullet"
+    arg_parser.add_argument(
+        "--verbose", action="store_true", help="increase verbosity"
+    )
+    args = arg_parser.parse_args()
+    if args.jobs < 1:
+        arg_parser.error("--jobs must be at least 1")
+    return args
 
 
-def _add_document_header(document: Document, observations: dict):
-    """Add the header section to the document."""
-    document.add_heading("DRAFT Records for Expedited Review", 0)
-    document.add_paragraph(
-        style=LIST_BULLET_STYLE,
-        text=f"Dates of observations: {observations['date of observations']}",
-    )
-    document.add_paragraph(
-        style=LIST_BULLET_STYLE,
-        text=f"Region: {observations['region']}",
-    )
-    document.add_paragraph(
-        style=LIST_BULLET_STYLE,
-        text=f"Dates of report creation: {observations['date of report']}",
-    )
-    p = document.add_paragraph(
-        style=LIST_BULLET_STYLE,
-        text="Produced for and by VARCOM (Virginia Avian Records Committee)"
-        ", of the VSO (Virginia Society of Ornithology). ",
-    )
-    p.add_run(
-        "https://www.virginiabirds.org/varcom"
-    ).hyperlink = "https://www.virginiabirds.org/varcom"
-    p = document.add_paragraph(
-        style=LIST_BULLET_STYLE,
-        text="Automatically generated by VARCOM-get-reports. ",
+def _load_observations(file_path: str) -> dict:
+    """Load the observations shown in the document from a .json or .jsonl
+    records file, a county at a time."""
+    return records_file.load_shown_records(file_path)
+
+
+# Maximum number of checklists fetched from eBird at the same time.
+CHECKLIST_FETCH_WORKERS = 8
+
+
+def _checklist_ids(counties: list) -> list:
+    """Return the subIds of the checklists of the records shown, once each,
+    leaving out records that already hold their checklist details."""
+    return list(
+        dict.fromkeys(
+            record["observation"]["subId"]
+            for county in counties
+            for record in county["records"]
+            if record.get("media")
+            and "checklist" not in record
+            and record["observation"].get("subId")
+        )
     )
-    p.add_run(
-        "https://github.com/gbabineau/VARCOM-get-reports"
-    ).hyperlink = "https://github.com/gbabineau/VARCOM-get-reports"
 
 
-def get_day_number(date_string):
+def _prefetch_checklists(
+    ebird_api_key: str,
+    counties: list,
+    max_workers: int = CHECKLIST_FETCH_WORKERS,
+) -> dict:
     """
-    Converts a date string in YYYY-MM-DD format to the day number of the year.
-
-    Args:
-        date_string (str): The date string in "YYYY-MM-DD" format (e.g., "2025-01-20").
+    Fetch the checklists of the records shown in the document concurrently,
+    at most max_workers at a time.
 
     Returns:
-        int: The day number of the year (e.g., 20 for Jan 20th, 365 for Dec 31st non-leap year).
+        dict: Checklists keyed by subId. A checklist that could not be fetched
+            is left out, and is fetched again when its record is added.
     """
-    try:
-        # Parse the string into a datetime object
-        date_object = datetime.strptime(date_string, "%Y-%m-%d")
+    sub_ids = _checklist_ids(counties)
+    logging.info("Fetching %d checklists.", len(sub_ids))
+
+    def fetch(sub_id: str):
+        try:
+            return ebird_data_access.get_checklist_with_retry(
+                ebird_api_key, observation=sub_id
+            )
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = executor.map(fetch, sub_ids)
+        return {
+            sub_id: checklist
+            for sub_id, checklist in zip(sub_ids, fetched)
+            if checklist is not None
+        }
+
+
+LIST_BULLET_STYLE = "List Bullet"
+
+
+def _add_document_header(writer: docx_writer.DocxWriter, header: dict):
+    """Add the header section to the document."""
+    writer.heading(review_renderers.TITLE, 0)
+    for text in review_renderers.header_lines(header):
+        writer.paragraph([text], style=LIST_BULLET_STYLE)
+    for text, link in review_renderers.CREDITS:
+        writer.paragraph(
+            [text, docx_writer.run(link, hyperlink=link)],
+            style=LIST_BULLET_STYLE,
+        )
+
 
-        # Use the strftime method to get the day of the year (%j)
-        # Note: %j returns a zero-padded string, so we convert it to an integer
-        day_number_str = date_object.strftime("%j")
-        day_number = int(day_number_str)
+# Record sets at least this large have their dates parsed with pandas.
+VECTORIZED_SORT_KEYS = 5000
 
-        return day_number
+# date.toordinal() of the first day of the Unix epoch.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
+
+def _date_ordinal(date_string: str):
+    """Return the date ordinal of a "YYYY-MM-DD" string, or None if invalid."""
+    try:
+        return datetime.strptime(date_string, "%Y-%m-%d").toordinal()
     except ValueError as e:
-        print(f"Error: {e}")
+        logging.warning("Invalid observation date %s: %s", date_string, e)
         return None
 
-def _get_species_by_counties(counties: list, taxonomy: list) -> dict:
-    """ rearrange the document by species instead of counties """
+
+def _date_ordinals(date_strings: list) -> list:
+    """
+    Return the date ordinal of each "YYYY-MM-DD" string, or None for an
+    invalid date. Large lists are parsed in one vectorized pass.
+    """
+    if len(date_strings) < VECTORIZED_SORT_KEYS:
+        return [_date_ordinal(date_string) for date_string in date_strings]
+    parsed = pd.to_datetime(
+        pd.Series(date_strings), format="%Y-%m-%d", errors="coerce"
+    )
+    days = parsed.to_numpy().astype("datetime64[D]").astype("int64")
+    ordinals = []
+    for date_string, day, invalid in zip(date_strings, days, parsed.isna()):
+        if invalid:
+            logging.warning("Invalid observation date %s", date_string)
+            ordinals.append(None)
+        else:
+            ordinals.append(int(day) + _EPOCH_ORDINAL)
+    return ordinals
+
+
+def _add_sort_keys(species_by_county: dict) -> dict:
+    """
+    Add the key each species' records are sorted by, (county, date ordinal),
+    as "sort_keys" alongside its "records". The dates of all records are
+    parsed together, once each. Records with an invalid date sort last in
+    their county.
+    """
+    records = [
+        record
+        for species in species_by_county.values()
+        for record in species["records"]
+    ]
+    ordinals = iter(
+        _date_ordinals([r["observation"]["obsDt"][:10] for r in records])
+    )
+    for species in species_by_county.values():
+        species["sort_keys"] = []
+        for record in species["records"]:
+            ordinal = next(ordinals)
+            species["sort_keys"].append(
+                (
+                    record["observation"].get("subnational2Name", ""),
+                    math.inf if ordinal is None else ordinal,
+                )
+            )
+    return species_by_county
+
+def _get_species_by_counties(counties: list, taxonomy) -> dict:
+    """ rearrange the document by species instead of counties. The taxon
+        stored in a record by get_reports is used when present, otherwise it
+        is looked up in the taxonomy, a list or a TaxonomyIndex. """
+    index = taxonomy_index.TaxonomyIndex.of(taxonomy)
     species_by_county = {}
     for county in counties:
         for record in county["records"]:
             species = record["observation"]["comName"]
             if species not in species_by_county:
                 species_by_county[species] = {}
-                species_by_county[species]["taxon"] = next(
-                    (t for t in taxonomy if t.get("comName") == species), {}
-                )
+                species_by_county[species]["taxon"] = record.get(
+                    "taxon"
+                ) or index.taxon(species)
                 species_by_county[species]["records"] = []
 
             species_by_county[species]["records"].append(record)
     return species_by_county
 
-def _iterate_over_species(
-    ebird_api_key: str, document: Document, counties: list, taxonomy: list
-):
-    """Add records for each species to the document."""
-    species_by_county = _get_species_by_counties(counties=counties, taxonomy=taxonomy)
+def _species_in_order(counties: list, taxonomy):
+    """
+    Generate the species of the records in taxonomic order.
+
+    Yields:
+        tuple: (taxon, records) for each species, with its records sorted by
+            county and date.
+    """
+    species_by_county = _add_sort_keys(
+        _get_species_by_counties(counties=counties, taxonomy=taxonomy)
+    )
     for species in sorted(
         species_by_county.keys(),
         key=lambda s: species_by_county[s]["taxon"].get(
             "taxonOrder", float("inf")
         ),
     ):
-        sorted_records = sorted(
-            species_by_county[species]["records"],
-            key=lambda x: (
-                x["observation"].get("subnational2Name", ""),
-                get_day_number(x["observation"]["obsDt"][:10]),
-            ),
-        )
-        last_species = ""
-        for record in sorted_records:
-            if record.get("media"):
-                current_species = record["observation"]["comName"]
-                if current_species != last_species:
-                    _add_species_heading(
-                        document,
-                        current_species,
-                        review_species=record.get("review_species", {}),
-                    )
-                last_species = current_species
-                _add_observation_data(
-                    ebird_api_key,
-                    document,
-                    record,
-                    species_by_county[species]["taxon"],
-                )
-
-
-def _add_species_heading(
-    document: Document, species: str, review_species: dict
-):
-    """Add a heading and details for a species."""
-    document.add_heading(species, level=2)
-
+        yield species_by_county[species]["taxon"], [
+            record
+            for _, record in sorted(
+                zip(
+                    species_by_county[species]["sort_keys"],
+                    species_by_county[species]["records"],
+                ),
+                key=itemgetter(0),
+            )
+        ]
+
+
+def _species_notes(species: str, review_species: dict) -> list:
+    """Return the lines shown under the heading of a species."""
+    notes = []
     if exclude := review_species.get("exclude", []):
-        document.add_paragraph(
+        notes.append(
             f"The species {species} is excluded from review in the following"
-            f"counties and groups of counties: {exclude}",
-            style=LIST_BULLET_STYLE,
+            f"counties and groups of counties: {exclude}"
         )
     if only := review_species.get("only", []):
-        document.add_paragraph(
+        notes.append(
             f"The species {species}: is only reviewed in the following "
-            f"counties or groups of counties: {only}",
-            style=LIST_BULLET_STYLE,
+            f"counties or groups of counties: {only}"
         )
     if unique_exclude_notes := review_species.get("uniqueExcludeNotes", None):
-        document.add_paragraph(
+        notes.append(
             "This species has unique Exclude Notes which could not be "
-            f"automated. {unique_exclude_notes}",
-            style=LIST_BULLET_STYLE,
+            f"automated. {unique_exclude_notes}"
         )
     if not exclude and not only and not unique_exclude_notes:
-        document.add_paragraph(
-            f"The species {species} is reviewable across the entire state.",
-            style=LIST_BULLET_STYLE,
+        notes.append(
+            f"The species {species} is reviewable across the entire state."
         )
+    return notes
+
+
+def _sub_id(observation: dict) -> str:
+    """Return the checklist id of an observation."""
+    sub_id = observation.get("subId", "")
+    if sub_id == "":
+        sub_id = observation.get("SubId", "unknown")
+    return sub_id
+
+
+def _observation_line(
+    ebird_api_key: str,
+    record: dict,
+    species_data: dict,
+    checklists: dict = None,
+) -> dict:
+    """Return the observation line shown for a record. The checklist details
+    stored in the record by get_reports are used when present. Otherwise the
+    checklist is fetched unless it is in checklists, keyed by subId."""
+    observation = record["observation"]
+    checklist = record.get("checklist") or (checklists or {}).get(
+        observation["subId"]
+    )
+    if checklist is None:
+        checklist = ebird_data_access.get_checklist_with_retry(
+            ebird_api_key, observation=observation["subId"]
+        )
+    sub_id = _sub_id(observation)
+    return {
+        "comName": species_data["comName"],
+        "sciName": species_data["sciName"],
+        "howMany": observation["howMany"],
+        "locality": checklist["locId"],
+        "county": observation["subnational2Name"],
+        "observer": checklist["userDisplayName"],
+        "obsDt": observation["obsDt"],
+        "checklist": sub_id,
+        "url": f"https://ebird.org/checklist/{sub_id}",
+    }
+
+
+def _species_groups(
+    ebird_api_key: str,
+    counties: list,
+    taxonomy,
+    checklists: dict = None,
+):
+    """
+    Generate the species groups of the report, in taxonomic order, using
+    the checklists already fetched, keyed by subId, where available. Only
+    records with media are shown, and species without any are left out.
 
+    Yields:
+        dict: A species group as described in review_renderers.
+    """
+    for taxon, sorted_records in _species_in_order(counties, taxonomy):
+        shown = [record for record in sorted_records if record.get("media")]
+        if not shown:
+            continue
+        species = shown[0]["observation"]["comName"]
+        yield {
+            "species": species,
+            "taxonOrder": taxon.get("taxonOrder"),
+            "notes": _species_notes(
+                species, shown[0].get("review_species", {})
+            ),
+            "observations": [
+                _observation_line(ebird_api_key, record, taxon, checklists)
+                for record in shown
+            ],
+        }
 
-def _add_observation_data(
-    ebird_api_key: str, document: Document, record: dict, species_data: dict
-):
-    """Add a hyperlink for a species record."""
-    observation = record["observation"]
-    checklist = ebird_data_access.get_checklist_with_retry(
-        ebird_api_key, observation=record["observation"]["subId"]
+
+def build_report(ebird_api_key: str, observations: dict, taxonomy) -> dict:
+    """
+    Build the report model, described in review_renderers, from the records
+    to review. Checklists that are not stored in the records are fetched
+    here, so that the report can then be rendered in any format.
+    """
+    return {
+        "header": {
+            key: observations[key]
+            for key in ("date of observations", "region", "date of report")
+        },
+        "species": list(
+            _species_groups(
+                ebird_api_key,
+                observations["records"],
+                taxonomy,
+                checklists=_prefetch_checklists(
+                    ebird_api_key, observations["records"]
+                ),
+            )
+        ),
+    }
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def _manifest_file(output: str) -> str:
+    """Return the manifest file kept next to the output for --incremental."""
+    return os.path.splitext(output)[0] + MANIFEST_SUFFIX
+
+
+def _load_manifest(manifest_file: str):
+    """
+    Load the report saved by an earlier --incremental run.
+
+    Returns:
+        dict: The report, or None if there is no usable manifest.
+    """
+    try:
+        with open(manifest_file, "rt", encoding="utf-8") as f:
+            return json.load(f)["report"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning("Ignoring unreadable manifest %s: %s", manifest_file, e)
+        return None
+
+
+def _save_manifest(manifest_file: str, report: dict):
+    """Save the report rendered, so that a later run only adds new records."""
+    tmp_file = f"{manifest_file}.tmp"
+    with open(tmp_file, "wt", encoding="utf-8") as f:
+        json.dump({"report": report}, f, ensure_ascii=False)
+    os.replace(tmp_file, manifest_file)
+
+
+def _record_keys(observations: dict) -> set:
+    """Return the (checklist, species) key of every record shown."""
+    return {
+        (_sub_id(record["observation"]), record["observation"]["comName"])
+        for county in observations["records"]
+        for record in county["records"]
+        if record.get("media")
+    }
+
+
+def _rendered_keys(report: dict) -> set:
+    """Return the (checklist, species) key of every observation line."""
+    return {
+        (line["checklist"], group["species"])
+        for group in report["species"]
+        for line in group["observations"]
+    }
+
+
+def _new_records(observations: dict, previous: dict) -> dict:
+    """Return the observations without the records already in a report."""
+    rendered = _rendered_keys(previous)
+    return dict(
+        observations,
+        records=[
+            dict(
+                county,
+                records=[
+                    record
+                    for record in county["records"]
+                    if (
+                        _sub_id(record["observation"]),
+                        record["observation"]["comName"],
+                    )
+                    not in rendered
+                ],
+            )
+            for county in observations["records"]
+        ],
+    )
+
+
+def _merge_reports(previous: dict, new: dict, current_keys: set) -> dict:
+    """
+    Add the observation lines of a report of new records to an earlier
+    report. Lines whose record is no longer in the records file are
+    dropped. New lines go into the section of their species, or into a new
+    section in taxonomic order, and each section is sorted by county and
+    date as build_report does.
+    """
+    groups = {}
+    for group in previous["species"]:
+        kept = [
+            line
+            for line in group["observations"]
+            if (line["checklist"], group["species"]) in current_keys
+        ]
+        if kept:
+            groups[group["species"]] = dict(group, observations=kept)
+    for group in new["species"]:
+        if group["species"] in groups:
+            group = dict(
+                group,
+                observations=groups[group["species"]]["observations"]
+                + group["observations"],
+            )
+        groups[group["species"]] = group
+    for group in groups.values():
+        ordinals = _date_ordinals(
+            [line["obsDt"][:10] for line in group["observations"]]
+        )
+        group["observations"] = [
+            line
+            for _, line in sorted(
+                zip(
+                    (
+                        (line["county"], math.inf if o is None else o)
+                        for line, o in zip(group["observations"], ordinals)
+                    ),
+                    group["observations"],
+                ),
+                key=itemgetter(0),
+            )
+        ]
+    return {
+        "header": new["header"],
+        "species": sorted(
+            groups.values(),
+            key=lambda group: (
+                math.inf
+                if group.get("taxonOrder") is None
+                else group["taxonOrder"]
+            ),
+        ),
+    }
+
+
+def _add_species_group(writer, group: dict):
+    """Add the heading, notes and observations of a species to a DocxWriter
+    or DocxFragment."""
+    writer.heading(group["species"], level=2)
+    for note in group["notes"]:
+        writer.paragraph([note], style=LIST_BULLET_STYLE)
+    for line in group["observations"]:
+        _add_observation(writer, line)
+
+
+def _add_observation(writer, line: dict):
+    """Add an observation line with a hyperlink to its checklist."""
+    writer.paragraph(
+        [
+            docx_writer.run(line["comName"], bold=True),
+            " (",
+            docx_writer.run(line["sciName"], italic=True),
+            docx_writer.run(
+                f"): {review_renderers.observation_details(line)};"
+                f"{line['url']}",
+                hyperlink=line["url"],
+            ),
+        ]
+    )
+
+
+def _species_section(group: dict) -> docx_writer.DocxFragment:
+    """Render the section of a species, in a worker process."""
+    fragment = docx_writer.DocxFragment()
+    _add_species_group(fragment, group)
+    return fragment
+
+
+def _render_docx(report: dict, output: str, jobs: int = 1):
+    """
+    Write the report as a Word document, one paragraph at a time.
+
+    With more than one job, the species sections are rendered in that many
+    worker processes and added to the document in taxonomic order.
+    """
+    with docx_writer.DocxWriter(output) as writer:
+        _add_document_header(writer, report["header"])
+        if jobs <= 1:
+            for group in report["species"]:
+                _add_species_group(writer, group)
+            return
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for fragment in executor.map(
+                _species_section,
+                report["species"],
+                chunksize=max(1, len(report["species"]) // (jobs * 4)),
+            ):
+                writer.add_fragment(fragment)
+
+
+# Renderers of the report model by output format. Each takes the report and
+# the output file name.
+RENDERERS = {
+    "docx": _render_docx,
+    "html": review_renderers.render_html,
+    "md": review_renderers.render_markdown,
+    "csv": review_renderers.render_csv,
+}
+
+
+def _outputs(output: str, formats: list = None) -> list:
+    """
+    Return the (format, file name) of each output to write.
+
+    Without formats, the format is taken from the extension of output, and
+    defaults to docx. With formats, one file is written per format, named
+    after output with the extension of the format.
+    """
+    base, extension = os.path.splitext(output)
+    if not formats:
+        extension = extension.lstrip(".").lower()
+        if extension == "htm":
+            extension = "html"
+        return [(extension if extension in RENDERERS else "docx", output)]
+    return [
+        (output_format, f"{base}.{output_format}") for output_format in formats
+    ]
+
+
+def _needs_ebird(observations: dict) -> bool:
+    """Return True if a record shown in the document lacks the checklist or
+    taxon details stored by get_reports, so that eBird must be queried."""
+    return any(
+        record.get("media")
+        and ("checklist" not in record or "taxon" not in record)
+        for county in observations["records"]
+        for record in county["records"]
     )
-    observer_name = checklist["userDisplayName"]
-    locality = checklist["locId"]
-    checklist = observation.get("subId", "")
-    if checklist == "":
-        checklist = observation.get("SubId", "unknown")
-    p = document.add_paragraph()
-    p.add_run(f"{species_data['comName']}").bold = True
-    p.add_run(" (")
-    p.add_run(f"{species_data['sciName']}").italic = True
-    p.add_run(
-        f"): {observation['howMany']}, {locality} "
-        f"{observation['subnational2Name']} [ph. {observer_name}] "
-        f"{observation['obsDt']};"
-        f"https://ebird.org/checklist/{checklist}"
-    ).hyperlink = f"https://ebird.org/checklist/{checklist}"
-
-
-def _save_document(document: Document, output: str):
-    """Save the document to a file."""
-    if os.path.exists(output):
-        os.remove(output)
-    document.save(output)
 
 
 def main():
-    """Main function for the app."""
+    """Main function for the app. The eBird API is only used when the
+    records file lacks some of the details shown in the document."""
     args = _parse_arguments()
 
     if args.verbose:
         logging.basicConfig(level=logging.INFO)
-    ebird_api_key = get_ebird_api_key.get_ebird_api_key()
-    taxonomy = get_taxonomy(ebird_api_key)
 
     observations = _load_observations(args.input)
-    document = _create_document(ebird_api_key, observations, taxonomy=taxonomy)
-    _save_document(document, args.output)
+    manifest_file = _manifest_file(args.output)
+    previous = _load_manifest(manifest_file) if args.incremental else None
+    if previous is not None:
+        all_observations = observations
+        observations = _new_records(observations, previous)
+    if _needs_ebird(observations):
+        ebird_api_key = get_ebird_api_key.get_ebird_api_key()
+        taxonomy = taxonomy_index.TaxonomyIndex(get_taxonomy(ebird_api_key))
+    else:
+        logging.info("Creating the document from the records file only.")
+        ebird_api_key = ""
+        taxonomy = taxonomy_index.TaxonomyIndex([])
+    report = build_report(ebird_api_key, observations, taxonomy)
+    if previous is not None:
+        logging.info(
+            "Adding %d new records to %s.",
+            len(_record_keys(observations)),
+            args.output,
+        )
+        report = _merge_reports(
+            previous, report, _record_keys(all_observations)
+        )
+    for output_format, output in _outputs(args.output, args.format):
+        logging.info("Writing %s", output)
+        if output_format == "docx":
+            _render_docx(report, output, jobs=args.jobs)
+        else:
+            RENDERERS[output_format](report, output)
+    if args.incremental:
+        _save_manifest(manifest_file, report)
 
 
 if __name__ == "__main__":
     main()
-if __name__ == "__main__":
-    main()
@@ -0,0 +1,221 @@
+"""
+Module to write Word (.docx) documents one paragraph at a time.
+
+python-docx builds the whole document tree in memory and only writes it when
+the document is saved. DocxWriter instead writes the WordprocessingML of each
+paragraph straight into the zip file as it is added, so memory and time stay
+linear in the number of paragraphs. The styles, numbering and other parts are
+copied from the python-docx default template, so the paragraphs look the same
+as those python-docx creates.
+
+Parts of a document can also be rendered separately, e.g. in worker
+processes, as DocxFragments and then added to the writer in order.
+"""
+
+import hashlib
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import docx
+
+DEFAULT_TEMPLATE = os.path.join(
+    os.path.dirname(docx.__file__), "templates", "default.docx"
+)
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+
+HYPERLINK_RELATIONSHIP = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+    "hyperlink"
+)
+
+# Characters that are not allowed in XML 1.0.
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def run(
+    text: str, bold: bool = False, italic: bool = False, hyperlink: str = None
+) -> dict:
+    """Return a run of text for DocxWriter.paragraph."""
+    return {
+        "text": text,
+        "bold": bold,
+        "italic": italic,
+        "hyperlink": hyperlink,
+    }
+
+
+def _style_id(style: str) -> str:
+    """Return the style id of a built-in style name, e.g. "List Bullet"."""
+    return style.replace(" ", "")
+
+
+def _hyperlink_id(url: str) -> str:
+    """Return the relationship id of a hyperlink. The id depends only on the
+    url, so paragraphs rendered separately can be merged."""
+    return "rIdLink" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def paragraph_xml(runs: list = None, style: str = None) -> str:
+    """
+    Return the WordprocessingML of a paragraph.
+
+    Args:
+        runs (list): Runs made by run(), or strings for plain text.
+        style (str, optional): The name of a built-in paragraph style,
+            e.g. "List Bullet".
+    """
+    xml = ["<w:p>"]
+    if style is not None:
+        xml.append(f'<w:pPr><w:pStyle w:val="{_style_id(style)}"/></w:pPr>')
+    for text_run in runs or []:
+        if isinstance(text_run, str):
+            text_run = run(text_run)
+        properties = ""
+        if text_run["bold"]:
+            properties += "<w:b/>"
+        if text_run["italic"]:
+            properties += "<w:i/>"
+        if text_run["hyperlink"]:
+            properties += '<w:color w:val="0563C1"/><w:u w:val="single"/>'
+        text = escape(_INVALID_XML_CHARS.sub("", str(text_run["text"])))
+        run_xml = (
+            f"<w:r>{'<w:rPr>' + properties + '</w:rPr>' if properties else ''}"
+            f'<w:t xml:space="preserve">{text}</w:t></w:r>'
+        )
+        if text_run["hyperlink"]:
+            run_xml = (
+                f'<w:hyperlink r:id="{_hyperlink_id(text_run["hyperlink"])}">'
+                f"{run_xml}</w:hyperlink>"
+            )
+        xml.append(run_xml)
+    xml.append("</w:p>")
+    return "".join(xml)
+
+
+class _Paragraphs:
+    """Adds paragraphs and headings, leaving where they go to subclasses."""
+
+    def _add(self, xml: str, hyperlinks: list):
+        raise NotImplementedError
+
+    def paragraph(self, runs: list = None, style: str = None):
+        """
+        Add a paragraph.
+
+        Args:
+            runs (list): Runs made by run(), or strings for plain text.
+            style (str, optional): The name of a built-in paragraph style,
+                e.g. "List Bullet".
+        """
+        self._add(
+            paragraph_xml(runs, style),
+            [
+                text_run["hyperlink"]
+                for text_run in runs or []
+                if isinstance(text_run, dict) and text_run["hyperlink"]
+            ],
+        )
+
+    def heading(self, text: str, level: int = 1):
+        """Add a heading, using the Title style for level 0 as python-docx
+        does."""
+        self.paragraph(
+            [text], style="Title" if level == 0 else f"Heading {level}"
+        )
+
+
+class DocxFragment(_Paragraphs):
+    """
+    Paragraphs rendered apart from a document, e.g. in another process, and
+    added to it later with DocxWriter.add_fragment. Fragments can be pickled.
+    """
+
+    def __init__(self):
+        self.xml = []
+        self.hyperlinks = []
+
+    def _add(self, xml: str, hyperlinks: list):
+        self.xml.append(xml)
+        self.hyperlinks.extend(hyperlinks)
+
+
+class DocxWriter(_Paragraphs):
+    """
+    Write a .docx file one paragraph at a time.
+
+    Use as a context manager, or call close when done:
+
+        with DocxWriter("review.docx") as writer:
+            writer.heading("Title", 0)
+            writer.paragraph([run("Bold", bold=True), run(" plain")])
+    """
+
+    def __init__(self, output: str, template: str = DEFAULT_TEMPLATE):
+        """
+        Parameters
+        ----------
+        output : str
+            The .docx file to write. Replaced if it exists.
+        template : str
+            The .docx file whose styles and other parts are used.
+        """
+        self._hyperlinks = {}
+        with zipfile.ZipFile(template) as source:
+            document = source.read(DOCUMENT_PART).decode("utf-8")
+            self._relationships = source.read(DOCUMENT_RELS_PART).decode(
+                "utf-8"
+            )
+            self._zip = zipfile.ZipFile(
+                output, "w", compression=zipfile.ZIP_DEFLATED
+            )
+            for item in source.infolist():
+                if item.filename not in (DOCUMENT_PART, DOCUMENT_RELS_PART):
+                    self._zip.writestr(item, source.read(item.filename))
+        # Paragraphs go between the opening of the body and the section
+        # properties, which must come last.
+        body_start = document.index(">", document.index("<w:body")) + 1
+        self._closing = document[document.index("<w:sectPr") :]
+        self._stream = self._zip.open(DOCUMENT_PART, "w", force_zip64=True)
+        self._write(document[:body_start])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, xml: str):
+        self._stream.write(xml.encode("utf-8"))
+
+    def _add(self, xml: str, hyperlinks: list):
+        self._write(xml)
+        for url in hyperlinks:
+            self._hyperlinks.setdefault(url, _hyperlink_id(url))
+
+    def add_fragment(self, fragment: DocxFragment):
+        """Add the paragraphs of a fragment."""
+        self._add("".join(fragment.xml), fragment.hyperlinks)
+
+    def close(self):
+        """Finish the document and the zip file."""
+        if self._zip is None:
+            return
+        self._write(self._closing)
+        self._stream.close()
+        links = "".join(
+            f'<Relationship Id="{link_id}" Type="{HYPERLINK_RELATIONSHIP}" '
+            f'Target={quoteattr(url)} TargetMode="External"/>'
+            for url, link_id in self._hyperlinks.items()
+        )
+        self._zip.writestr(
+            DOCUMENT_RELS_PART,
+            self._relationships.replace(
+                "</Relationships>", f"{links}</Relationships>"
+            ),
+        )
+        self._zip.close()
+        self._zip = None
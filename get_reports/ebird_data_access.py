@@ -6,6 +6,22 @@ import pandas as pd
 
 from ebird.api import get_checklist, get_historic_observations
 
+# The most observations the eBird API returns for one historic query.
+HISTORIC_RESULT_CAP = 10000
+
+# HistoricObservationCache used by get_historic_observations_with_retry, or
+# None to always call the API.
+_historic_cache = None
+
+
+def set_historic_cache(cache) -> None:
+    """
+    Sets the HistoricObservationCache that get_historic_observations_with_retry
+    reads from and writes to. Pass None to disable caching.
+    """
+    global _historic_cache  # pylint: disable=global-statement
+    _historic_cache = cache
+
 
 def get_checklist_with_retry(api_key: str, observation: str) -> list:
     """
@@ -44,11 +60,19 @@ def get_historic_observations_with_retry(
 ) -> list:
     """
     Calls the eBird API get_historic_observations with retries
+
+    When a cache has been set with set_historic_cache, a valid cached
+    response is returned without calling the API, and API responses are
+    stored in the cache.
     """
+    if _historic_cache is not None:
+        cached = _historic_cache.get(area, day, category, rank, detail)
+        if cached is not None:
+            return cached
     attempts = 0
     while attempts < 3:
         try:
-            return get_historic_observations(
+            observations = get_historic_observations(
                 token=token,
                 area=area,
                 date=day,
@@ -56,6 +80,11 @@ def get_historic_observations_with_retry(
                 rank=rank,
                 detail=detail,
             )
+            if _historic_cache is not None:
+                _historic_cache.put(
+                    area, day, category, rank, detail, observations
+                )
+            return observations
         except OSError as exc:
             attempts += 1
             sleep(0.1 * attempts)
@@ -82,9 +111,25 @@ def get_historic_observations_with_retry(
                 )
                 raise
 
-def read_database(database_file: str) -> list:
+def rollup_species_codes(species_codes: pd.Series, rollup: dict) -> pd.Series:
+    """ Vectorized form of the taxonomy rollup: maps each code in the column
+        to the code of the species it is reported as, leaving codes that do
+        not roll up unchanged.
+    """
+    return species_codes.map(rollup).fillna(species_codes)
+
+
+def read_database(
+    database_file: str, species_codes: dict = None, rollup: dict = None
+) -> list:
     """ Reads an EBD file and formats it for use similar to what the API
         provides.
+
+        The EBD has no eBird species code, so when species_codes (a mapping
+        of common name to species code) is given, a "speciesCode" column is
+        added with a single vectorized lookup. Names without a code get "".
+        When rollup is also given, a "reportAs" column holds the code of the
+        species each observation rolls up to.
     """
     logging.info("Reading observations from %s", database_file)
 
@@ -107,6 +152,10 @@ def read_database(database_file: str) -> list:
             "media",
             "approved",
         ]
+        if species_codes is not None:
+            df["speciesCode"] = df["comName"].map(species_codes).fillna("")
+            if rollup is not None:
+                df["reportAs"] = rollup_species_codes(df["speciesCode"], rollup)
 
         database = df.to_dict("records")
     except FileNotFoundError:
@@ -123,19 +172,49 @@ def read_database(database_file: str) -> list:
         )
     return database
 
+def index_database(database: list) -> dict:
+    """ Index observations read by read_database by (county, date), so that
+        the observations for a county-day are found without a scan of the
+        whole database.
+
+        Returns:
+            dict: Lists of observations keyed by (county code, "YYYY-MM-DD").
+    """
+    index = {}
+    for observation in database:
+        index.setdefault(
+            (observation.get("county"), observation["obsDt"][:10]), []
+        ).append(observation)
+    return index
+
+
 def get_historic_observations_from_database(
-    database: dict,
+    database,
     area=str,
     day=str,
     category=str,
 ) -> list:
-    """ Read observations from a database formatted as above """
+    """ Read observations from a database formatted as above, or from an
+        index of it made by index_database.
+
+        category is a set of taxonomic categories, or a comma separated
+        string of them as the API takes, e.g. "species,issf,form".
+    """
     day_string = day.strftime("%Y-%m-%d")
+    categories = (
+        set(category.split(",")) if isinstance(category, str) else category
+    )
+    if isinstance(database, dict):
+        return [
+            obs
+            for obs in database.get((area, day_string), [])
+            if obs.get("category") in categories
+        ]
     observations_of_interest = [
         obs
         for obs in database
         if obs.get("county") == area
-        and obs.get("category") == category
+        and obs.get("category") in categories
         and obs["obsDt"][:10] == day_string
     ]
     return observations_of_interest
\ No newline at end of file
@@ -2,11 +2,27 @@
 Module gets the records to review based on VARCOM (or other) review rules.
 """
 
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
 from calendar import monthrange
-from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
 
-from get_reports import continuation_record, ebird_data_access
+from get_reports import (
+    continuation_record,
+    ebird_data_access,
+    get_review_rules,
+    taxonomy_index,
+)
+
+# The taxonomic categories of the observations reviewed. Subspecies groups
+# and forms are reviewed as the species they roll up to. Slashes, spuhs and
+# hybrids do not roll up to a species, so would be taken for new records.
+OBSERVATION_CATEGORIES = "species,issf,form"
 
 
 def _county_in_list_or_group(
@@ -36,46 +52,78 @@ def _county_in_list_or_group(
     return included
 
 
-def _is_new_record(observation: dict, state_list: list) -> bool:
+def _rolled_up_code(observation: dict, rollup: dict) -> str:
+    """
+    Returns the code of the species an observation rolls up to.
+
+    Args:
+        observation (dict): A dictionary representing an observation. EBD
+            observations may already carry the rolled up code in "reportAs".
+        rollup (dict): The taxonomy rollup table, mapping forms to species.
+
+    Returns:
+        str: The species code, which is the observation's own "speciesCode"
+            when it does not roll up to another taxon.
+    """
+    if "reportAs" in observation:
+        return observation["reportAs"]
+    code = observation.get("speciesCode")
+    return rollup.get(code, code)
+
+
+def _is_new_record(
+    observation: dict, state_codes: frozenset, rollup: dict = None
+) -> bool:
     """
     Determines if a given observation is a new record based on its exotic category
-    and whether its common name is already present in the state list.
+    and whether its species code is already present in the state list.
 
     Args:
         observation (dict): A dictionary containing details of the observation.
-            Expected to have at least the key "exoticCategory" (str) and "comName" (str).
-        state_list (list): A list of dictionaries, each representing a species in the state.
-            Each dictionary is expected to have the key "comName" (str).
+            Expected to have at least the key "exoticCategory" (str) and
+            "speciesCode" (str).
+        state_codes (frozenset): The species codes of the species on the state
+            list.
+        rollup (dict, optional): The taxonomy rollup table. When given, a form
+            is not new if the species it rolls up to is on the state list.
 
     Returns:
         bool: True if the observation is a new record (i.e., its "exoticCategory" is not "X"
-              and its "comName" is not found in the state list), otherwise False.
+              and neither its "speciesCode" nor the species it rolls up to is
+              found in the state list), otherwise False.
     """
-    return observation.get("exoticCategory", "") != "X" and not any(
-        species["comName"] == observation["comName"] for species in state_list
+    return (
+        observation.get("exoticCategory", "") != "X"
+        and observation.get("speciesCode") not in state_codes
+        and _rolled_up_code(observation, rollup or {}) not in state_codes
     )
 
 
-def _reviewable_species(observation: dict, species_to_review: list) -> bool:
+def _reviewable_species(
+    observation: dict, species_by_code: dict, rollup: dict = None
+) -> dict:
     """
     Determines if a given observation corresponds to a species in the review list.
 
+    A review rule for the observation's own taxon (for example a form such as
+    "Green-winged Teal (Eurasian)") takes precedence over a rule for the
+    species it rolls up to.
+
     Args:
         observation (dict): A dictionary representing an observation.
-        species_to_review (list): A list of species requiring review
+        species_by_code (dict): Species requiring review keyed by species code.
+        rollup (dict, optional): The taxonomy rollup table.
 
     Returns:
-        bool: True if the observation's "comName" matches the "comName" of any
-            species in the review list, otherwise False.
-    """
-    return next(
-        (
-            species
-            for species in species_to_review
-            if species["comName"] == observation["comName"]
-        ),
-        None,
-    )
+        dict: The review species matching the observation's "speciesCode", or
+            None if the species is not reviewable.
+    """
+    matching_species = species_by_code.get(observation.get("speciesCode"))
+    if matching_species is None:
+        matching_species = species_by_code.get(
+            _rolled_up_code(observation, rollup or {})
+        )
+    return matching_species
 
 
 def _reviewable_species_with_no_exclusions(
@@ -112,11 +160,78 @@ def _reviewable_species_with_no_exclusions(
     return reviewable
 
 
+def _get_checklist(
+    ebird_api_key: str, sub_id: str, checklists: dict = None
+) -> dict:
+    """
+    Gets a checklist from the eBird API, reusing it if it was already fetched.
+
+    Args:
+        ebird_api_key (str): The API key for accessing eBird data.
+        sub_id (str): The checklist (submission) identifier.
+        checklists (dict, optional): Checklists already fetched, keyed by
+            sub_id. Updated with the fetched checklist.
+
+    Returns:
+        dict: The checklist.
+    """
+    if checklists is None:
+        return ebird_data_access.get_checklist_with_retry(
+            ebird_api_key, observation=sub_id
+        )
+    if sub_id not in checklists:
+        checklists[sub_id] = ebird_data_access.get_checklist_with_retry(
+            ebird_api_key, observation=sub_id
+        )
+    return checklists[sub_id]
+
+
+def _checklist_details(checklist: dict) -> dict:
+    """
+    Return the checklist fields shown in the review document, so that the
+    document can be created from the records file without fetching the
+    checklist again.
+    """
+    return {
+        "userDisplayName": checklist.get("userDisplayName", ""),
+        "locId": checklist.get("locId", ""),
+    }
+
+
+def _add_taxa(records: list, index) -> list:
+    """
+    Add the taxonomy fields shown in the review document to each record, so
+    that the document can be created without the eBird taxonomy.
+
+    Args:
+        records (list): Records to review. Updated in place.
+        index (TaxonomyIndex): The taxonomy, or None to leave the records
+            unchanged.
+
+    Returns:
+        list: The same records, for convenience.
+    """
+    if index is None:
+        return records
+    for record in records:
+        taxon = index.taxon_by_code.get(
+            record["observation"].get("speciesCode")
+        )
+        if taxon is not None:
+            record["taxon"] = {
+                key: taxon[key]
+                for key in ("comName", "sciName", "taxonOrder")
+                if key in taxon
+            }
+    return records
+
+
 def _pelagic_record(
     ebird_api_key: str,
     database: list,
     observation: dict,
     pelagic_counties: list,
+    checklists: dict = None,
 ) -> bool:
     """
     Determines if a given observation is a pelagic record.
@@ -129,6 +244,8 @@ def _pelagic_record(
         database (list): filtered eBird database.
         observation (dict): A dictionary containing observation details.
         pelagic_counties (list): A list of county names considered pelagic.
+        checklists (dict, optional): Checklists already fetched, keyed by
+            subId.
 
     Returns:
         bool: True if the observation is a pelagic record, False otherwise.
@@ -136,8 +253,8 @@ def _pelagic_record(
     if observation["subnational2Name"] in pelagic_counties:
         # get checklist and see if it uses the pelagic protocol
         if database == []:
-            checklist = ebird_data_access.get_checklist_with_retry(
-                ebird_api_key, observation=observation["subId"]
+            checklist = _get_checklist(
+                ebird_api_key, observation["subId"], checklists
             )
             return checklist.get("protocolId", "") == "P60"
         return observation["protocolId"] == "P60"
@@ -146,7 +263,10 @@ def _pelagic_record(
 
 
 def _observation_has_media(
-    ebird_api_key: str, database: list, observation: dict
+    ebird_api_key: str,
+    database: list,
+    observation: dict,
+    checklists: dict = None,
 ) -> bool:
     """
     Determines if an observation has associated media (photos, videos, etc.).
@@ -155,13 +275,15 @@ def _observation_has_media(
         ebird_api_key: str.
         database (list): filtered eBird database.
         observation (dict): A dictionary representing an observation.
+        checklists (dict, optional): Checklists already fetched, keyed by
+            subId.
 
     Returns:
         bool: True if the observation has associated media, False otherwise.
     """
     if database == []:
-        checklist = ebird_data_access.get_checklist_with_retry(
-            ebird_api_key, observation=observation["subId"]
+        checklist = _get_checklist(
+            ebird_api_key, observation["subId"], checklists
         )
         return any(
             obs.get("speciesCode") == observation["speciesCode"]
@@ -172,28 +294,61 @@ def _observation_has_media(
         return True  # filtered data all has media
 
 
-def _find_record_of_interest(
+def _get_observations(
+    ebird_api_key: str, database: list, county: dict, day: date
+) -> list:
+    """
+    Gets the species observations for a county on a day, from the eBird API
+    or from the database when one is loaded.
+
+    Args:
+        ebird_api_key (str): The API key for accessing eBird data.
+        database (list): filtered eBird database, or [] to use the API.
+        county (dict): A dictionary containing the county "code".
+        day (date): The date for which observations are being retrieved.
+
+    Returns:
+        list: The observations.
+    """
+    if database == []:
+        return ebird_data_access.get_historic_observations_with_retry(
+            token=ebird_api_key,
+            area=county["code"],
+            day=day,
+            category=OBSERVATION_CATEGORIES,
+            rank="create",
+            detail="full",
+        )
+    return ebird_data_access.get_historic_observations_from_database(
+        database=database,
+        area=county["code"],
+        day=day,
+        category=OBSERVATION_CATEGORIES,
+    )
+
+
+def _classify_observations(
     ebird_api_key: str,
     database: list,
-    state_list: list,
+    observations: list,
+    rules: dict,
     county: dict,
-    day: date,
-    review_species: dict,
+    checklists: dict = None,
 ) -> list:
     """
-    Identifies records of interest from historic bird observations based on
+    Identifies records of interest in a list of observations based on
     specified criteria such as new species, reviewable species, and exclusions.
 
     Args:
         ebird_api_key (str): The API key for accessing eBird data.
-        database (list): filtered
-        state_list (list): A list of species already recorded in the state.
+        database (list): filtered eBird database, or [] if using the API.
+        observations (list): The observations for the county.
+        rules (dict): Review rules compiled by
+            get_review_rules.compile_review_rules.
         county (dict): A dictionary containing county information, including
             "code" (county identifier) and "name" (county name).
-        day (date): The date for which observations are being retrieved.
-        review_species (dict): A dictionary containing reviewable species
-            information, including "review_species" (list of species to review)
-            and any exclusion criteria.
+        checklists (dict, optional): Checklists already fetched, keyed by
+            subId, so that each checklist is fetched at most once.
 
     Returns:
         list: A list of dictionaries representing records of interest. Each
@@ -202,43 +357,20 @@ def _find_record_of_interest(
             - "new" (bool): Whether the species is new to the state list.
             - "reviewable" (bool, optional): Whether the species is reviewable.
             - "review_species" (list, optional): Matching reviewable species.
+            - "checklist" (dict, optional): The observer name and location
+              of the checklist, when it was fetched for the pelagic or media
+              checks.
     """
-
-    if database == []:
-        observations = ebird_data_access.get_historic_observations_with_retry(
-            token=ebird_api_key,
-            area=county["code"],
-            day=day,
-            category="species",
-            rank="create",
-            detail="full",
-        )
-    else:
-        observations = (
-            ebird_data_access.get_historic_observations_from_database(
-                database=database,
-                area=county["code"],
-                day=day,
-                category="species",
-            )
-        )
-
-    pelagic_counties = next(
-        (
-            group["counties"]
-            for group in review_species.get("county_groups", [])
-            if group["name"] == "Pelagic Counties"
-        ),
-        [],
-    )
+    pelagic_counties = rules["pelagic_counties"]
     records_of_interest = []
     for observation in observations:
-        if _is_new_record(observation, state_list):
+        if _is_new_record(observation, rules["state_codes"], rules["rollup"]):
             if not _pelagic_record(
                 ebird_api_key=ebird_api_key,
                 database=database,
                 observation=observation,
                 pelagic_counties=pelagic_counties,
+                checklists=checklists,
             ):
                 logging.info(
                     "Species %s not in state list. A new record?",
@@ -252,19 +384,21 @@ def _find_record_of_interest(
                             ebird_api_key=ebird_api_key,
                             database=database,
                             observation=observation,
+                            checklists=checklists,
                         ),
                     }
                 )
         elif matching_species := _reviewable_species(
-            observation, review_species["review_species"]
+            observation, rules["species_by_code"], rules["rollup"]
         ):
             if _reviewable_species_with_no_exclusions(
-                matching_species, review_species, county
+                matching_species, rules, county
             ) and not _pelagic_record(
                 ebird_api_key=ebird_api_key,
                 database=database,
                 observation=observation,
                 pelagic_counties=pelagic_counties,
+                checklists=checklists,
             ):
                 logging.info(
                     "Species %s is reviewable in %s.",
@@ -281,12 +415,46 @@ def _find_record_of_interest(
                             ebird_api_key=ebird_api_key,
                             database=database,
                             observation=observation,
+                            checklists=checklists,
                         ),
                     }
                 )
+    for record in records_of_interest:
+        checklist = (checklists or {}).get(record["observation"].get("subId"))
+        if checklist is not None:
+            record["checklist"] = _checklist_details(checklist)
     return records_of_interest
 
 
+def _find_record_of_interest(
+    ebird_api_key: str,
+    database: list,
+    rules: dict,
+    county: dict,
+    day: date,
+) -> list:
+    """
+    Identifies records of interest from historic bird observations based on
+    specified criteria such as new species, reviewable species, and exclusions.
+
+    Args:
+        ebird_api_key (str): The API key for accessing eBird data.
+        database (list): filtered
+        rules (dict): Review rules compiled by
+            get_review_rules.compile_review_rules.
+        county (dict): A dictionary containing county information, including
+            "code" (county identifier) and "name" (county name).
+        day (date): The date for which observations are being retrieved.
+
+    Returns:
+        list: A list of records of interest, as for _classify_observations.
+    """
+    observations = _get_observations(ebird_api_key, database, county, day)
+    return _classify_observations(
+        ebird_api_key, database, observations, rules, county, checklists={}
+    )
+
+
 def _iterate_days_in_month(year: int, month: int, day):
     """
     Generate an iterator over all the days in a given month of a specific year.
@@ -311,36 +479,468 @@ def _iterate_days_in_month(year: int, month: int, day):
         yield date(year, month, day)
 
 
+def _iterate_days(year: int, month: int, day: int):
+    """
+    Generate the days of a period given as year, month and day, where a month
+    of 0 means the whole year and a day of 0 means the whole month.
+
+    Yields:
+        datetime.date: A date object for each day in the period.
+    """
+    if month == 0:
+        month_range = range(1, 13)
+    else:
+        month_range = range(month, month + 1)
+
+    for month_in_year in month_range:
+        yield from _iterate_days_in_month(year, month_in_year, day)
+
+
+def _iterate_period(year: int, month: int, day: int, date_range: tuple = None):
+    """
+    Generate the days of a period, either the inclusive (start, end) dates of
+    date_range or, when that is None, the days given by year, month and day
+    as for _iterate_days.
+
+    Yields:
+        datetime.date: A date object for each day in the period.
+    """
+    if date_range is None:
+        yield from _iterate_days(year, month, day)
+        return
+    start, end = date_range
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def _state_prefilter(ebird_api_key: str, state: str, counties: list):
+    """
+    Make a filter that uses one state-level historic query per day to decide
+    which counties need to be queried that day.
+
+    The eBird historic endpoint returns one observation per species for the
+    region queried, so the state-level response lists every species seen
+    anywhere in the state that day, but not every county it was seen in. A
+    county only needs its own query on a day when a species in the state
+    response is not on the state list, or is reviewable in that county. A
+    species not on the state list sends every county to be queried even if
+    the one observation returned for it is of an escapee, since another
+    county may have an observation of it that is a new record. If the state
+    response reaches the API result cap, every county is queried.
+
+    Args:
+        ebird_api_key (str): The API key for accessing eBird data.
+        state (str): The state code, e.g. US-VA.
+        counties (list): The counties being reviewed.
+
+    Returns:
+        callable: A function (rules, county, day) -> bool that is True when
+            the county must be queried for the day. The state-level query for
+            each day is made once and its species remembered. They are checked
+            against the rules given on each call, so that rules reloaded part
+            way through a day are used for the counties after the reload.
+    """
+    # The species codes of each day's state query, or None if it hit the cap.
+    species_by_day = {}
+    # The counties to query for each day, with the rules they were found with.
+    counties_by_day = {}
+
+    def state_species(day: date):
+        observations = ebird_data_access.get_historic_observations_with_retry(
+            token=ebird_api_key,
+            area=state,
+            day=day,
+            category=OBSERVATION_CATEGORIES,
+            rank="create",
+            detail="full",
+        )
+        if len(observations) >= ebird_data_access.HISTORIC_RESULT_CAP:
+            logging.warning(
+                "State query for %s on %s hit the result cap; querying "
+                "every county.",
+                state,
+                day,
+            )
+            return None
+        return [
+            {
+                key: observation[key]
+                for key in ("speciesCode", "reportAs")
+                if key in observation
+            }
+            for observation in observations
+        ]
+
+    def counties_to_query(rules: dict, day: date) -> set:
+        if day not in species_by_day:
+            species_by_day[day] = state_species(day)
+        all_counties = {county["code"] for county in counties}
+        if species_by_day[day] is None:
+            return all_counties
+        to_query = set()
+        for observation in species_by_day[day]:
+            if (
+                observation.get("speciesCode") not in rules["state_codes"]
+                and _rolled_up_code(observation, rules["rollup"])
+                not in rules["state_codes"]
+            ):
+                return all_counties
+            if matching_species := _reviewable_species(
+                observation, rules["species_by_code"], rules["rollup"]
+            ):
+                to_query.update(
+                    county["code"]
+                    for county in counties
+                    if _reviewable_species_with_no_exclusions(
+                        matching_species, rules, county
+                    )
+                )
+        logging.info(
+            "State query for %s on %s: %d of %d counties to query.",
+            state,
+            day,
+            len(to_query),
+            len(all_counties),
+        )
+        return to_query
+
+    def county_needed(rules: dict, county: dict, day: date) -> bool:
+        # Compiled rules are never changed, so the same object means the
+        # same rules.
+        if day not in counties_by_day or counties_by_day[day][0] is not rules:
+            counties_by_day[day] = (rules, counties_to_query(rules, day))
+        return county["code"] in counties_by_day[day][1]
+
+    return county_needed
+
+
+def _both_needed(day_needed, county_needed):
+    """
+    Combine a (county, day) filter with an optional (rules, county, day)
+    filter. day_needed is checked first so that the state-level query made by
+    a prefilter is skipped for days that are not needed anyway.
+    """
+
+    def needed(rules: dict, county: dict, day: date) -> bool:
+        if not day_needed(county, day):
+            return False
+        return county_needed is None or county_needed(rules, county, day)
+
+    return needed
+
+
+def _iterate_county_records(
+    ebird_api_key: str,
+    database: list,
+    rules: dict,
+    county: dict,
+    year: int,
+    month: int,
+    day: int,
+    county_needed=None,
+    date_range: tuple = None,
+    continuation=None,
+):
+    """
+    Generate the records for a county one day at a time.
+
+    county_needed, when given, is a filter (rules, county, day) -> bool, e.g.
+    made by _state_prefilter, and days on which it is False for the county
+    are skipped. The period is date_range when given, otherwise year, month
+    and day. Days the continuation record holds as finished are skipped.
+
+    Yields:
+        tuple: (day, records) for each day of the period that is reviewed,
+            with an empty list of records if there are none.
+    """
+    for day_in_period in _iterate_period(year, month, day, date_range):
+        if continuation is not None and continuation.day_finished(
+            county, day_in_period
+        ):
+            continue
+        if county_needed is not None and not county_needed(
+            rules, county, day_in_period
+        ):
+            continue
+        yield day_in_period, _find_record_of_interest(
+            ebird_api_key,
+            database,
+            rules,
+            county,
+            day_in_period,
+        )
+
+
 def _get_county_records(
     ebird_api_key: str,
     database: list,
-    state_list: list,
+    rules: dict,
     county: str,
     year: int,
     month: int,
     day: int,
-    review_species: dict,
+    county_needed=None,
+    date_range: tuple = None,
+    continuation=None,
 ) -> list:
-    """ Get the records for a county over for a time period"""
-    county_records = []
-    if month == 0:
-        month_range = range(1, 13)
-    else:
-        month_range = range(month, month + 1)
+    """ Get the records for a county over for a time period.
 
-    for month_in_year in month_range:
-        for day_in_month in _iterate_days_in_month(year, month_in_year, day):
-            records_for_county = _find_record_of_interest(
+        The arguments are as for _iterate_county_records. With a continuation
+        record, each day is checkpointed as it is finished, and on restart
+        the days finished earlier are skipped and their records reused.
+    """
+    county_records = (
+        list(continuation.day_records(county))
+        if continuation is not None
+        else []
+    )
+    for day_in_period, records_for_county in _iterate_county_records(
+        ebird_api_key,
+        database,
+        rules,
+        county,
+        year,
+        month,
+        day,
+        county_needed,
+        date_range,
+        continuation,
+    ):
+        county_records.extend(records_for_county)
+        if continuation is not None:
+            continuation.day_done(county, day_in_period, records_for_county)
+    return county_records
+
+
+# The database and rules of a worker process, set once by _init_worker.
+_worker_state = {}
+
+
+def _init_worker(database: dict, rules: dict):
+    """Keep the database index and rules for the counties a worker reviews."""
+    _worker_state["database"] = database
+    _worker_state["rules"] = rules
+
+
+def _review_county_in_worker(
+    ebird_api_key: str,
+    county: dict,
+    year: int,
+    month: int,
+    day: int,
+    date_range: tuple,
+    partial_file: str,
+) -> str:
+    """
+    Review one county in a worker process and write its records to
+    partial_file, replacing it atomically.
+
+    Returns:
+        str: The partial file written.
+    """
+    records = _get_county_records(
+        ebird_api_key,
+        _worker_state["database"],
+        _worker_state["rules"],
+        county,
+        year,
+        month,
+        day,
+        date_range=date_range,
+    )
+    tmp_file = f"{partial_file}.tmp"
+    with open(tmp_file, "wt", encoding="utf-8") as f:
+        json.dump({"county": county["name"], "records": records}, f)
+    os.replace(tmp_file, partial_file)
+    return partial_file
+
+
+def _process_context():
+    """
+    Return the multiprocessing context for the worker pool. Forked workers
+    share the parent's database index without copying or re-reading it;
+    where fork is not available the index is sent to each worker once.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _review_counties_in_processes(
+    ebird_api_key: str,
+    database: dict,
+    rules: dict,
+    counties: list,
+    year: int,
+    month: int,
+    day: int,
+    date_range: tuple,
+    jobs: int,
+    partial_directory: Path,
+):
+    """
+    Review counties in a pool of worker processes.
+
+    Each county is reviewed by one worker, which writes the county's records
+    to its own partial file in partial_directory. A county whose partial file
+    is left from an interrupted run is not reviewed again.
+
+    Yields:
+        tuple: (county, records) for each county, in the order of counties
+            whatever order the workers finish in.
+    """
+    partial_directory.mkdir(parents=True, exist_ok=True)
+    partial_files = [
+        partial_directory / f"{county['code']}.json" for county in counties
+    ]
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=_process_context(),
+        initializer=_init_worker,
+        initargs=(database, rules),
+    ) as executor:
+        futures = {
+            partial_file: executor.submit(
+                _review_county_in_worker,
                 ebird_api_key,
-                database,
-                state_list,
                 county,
-                day_in_month,
-                review_species,
+                year,
+                month,
+                day,
+                date_range,
+                str(partial_file),
             )
-            if records_for_county:
-                county_records.extend(records_for_county)
-    return county_records
+            for county, partial_file in zip(counties, partial_files)
+            if not partial_file.exists()
+        }
+        for county, partial_file in zip(counties, partial_files):
+            if partial_file in futures:
+                futures[partial_file].result()
+            with open(partial_file, "rt", encoding="utf-8") as f:
+                yield county, json.load(f)["records"]
+
+
+def _species_codes_by_name(
+    state_list: list, review_species: dict, taxonomy: list
+) -> dict:
+    """
+    Map common names to species codes for observations that lack a code.
+
+    Uses the full taxonomy when available. Otherwise the codes already resolved
+    on the state list and review species are used, which is sufficient since
+    any other species is not on the state list and so is a new record anyway.
+    """
+    if taxonomy is not None:
+        return taxonomy_index.TaxonomyIndex.of(taxonomy).code_by_name
+    return {
+        species["comName"]: species["speciesCode"]
+        for species in state_list + review_species.get("review_species", [])
+        if "speciesCode" in species
+    }
+
+
+def run_key(
+    database_file: str,
+    state_list: list,
+    counties: list,
+    year: int,
+    month: int,
+    day: int,
+    review_species: dict,
+    date_range: tuple = None,
+) -> str:
+    """
+    Identify a review by its data source, counties, period and rules, so
+    that its continuation record is not shared with any other review.
+
+    Returns:
+        str: A short hash of the parameters.
+    """
+    parameters = {
+        "database": database_file,
+        "counties": sorted(county["code"] for county in counties),
+        "period": (
+            [date_range[0].isoformat(), date_range[1].isoformat()]
+            if date_range is not None
+            else [year, month, day]
+        ),
+        "state_list": state_list,
+        "review_species": review_species,
+    }
+    return hashlib.sha256(
+        json.dumps(parameters, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _read_database(
+    database_file: str,
+    state_list: list,
+    review_species: dict,
+    taxonomy,
+    rollup: dict,
+):
+    """Read and index the database, or return [] if it has no observations."""
+    database = ebird_data_access.read_database(
+        database_file,
+        species_codes=_species_codes_by_name(
+            state_list, review_species, taxonomy
+        ),
+        rollup=rollup,
+    )
+    if database:
+        database = ebird_data_access.index_database(database)
+    return database
+
+
+def _prepare_review(
+    ebird_api_key: str,
+    database_file: str,
+    state_list: list,
+    counties: list,
+    review_species: dict,
+    taxonomy,
+    fetch_strategy: str,
+    day_needed,
+    database_cache: dict = None,
+) -> tuple:
+    """
+    Compile the rules, read the database and build the county-day filter
+    for a review, as described for get_records_to_review.
+
+    Returns:
+        tuple: (rules, database, county_needed), where county_needed is a
+            filter (rules, county, day) -> bool or None.
+    """
+    rollup = (
+        taxonomy_index.TaxonomyIndex.of(taxonomy).rollup
+        if taxonomy is not None
+        else None
+    )
+    rules = get_review_rules.compile_review_rules(
+        state_list, review_species, rollup
+    )
+    if database_file == "":
+        database = []
+    elif database_cache is not None and taxonomy is not None:
+        # With a taxonomy the database does not depend on the rules, so
+        # every review of the same file can share it.
+        if database_file not in database_cache:
+            database_cache[database_file] = _read_database(
+                database_file, state_list, review_species, taxonomy, rollup
+            )
+        database = database_cache[database_file]
+    else:
+        database = _read_database(
+            database_file, state_list, review_species, taxonomy, rollup
+        )
+    county_needed = None
+    if fetch_strategy == "state" and database == [] and counties:
+        county_needed = _state_prefilter(
+            ebird_api_key, counties[0]["code"][:5], counties
+        )
+    if day_needed is not None:
+        county_needed = _both_needed(day_needed, county_needed)
+    return rules, database, county_needed
 
 
 def get_records_to_review(
@@ -352,6 +952,14 @@ def get_records_to_review(
     month: int,
     day: int,
     review_species: dict,
+    taxonomy: list = None,
+    rules_holder=None,
+    fetch_strategy: str = "county",
+    day_needed=None,
+    date_range: tuple = None,
+    jobs: int = 1,
+    database_cache: dict = None,
+    continuation=None,
 ) -> list:
     """
     Retrieves a list of bird observation records that require review for a given
@@ -367,35 +975,304 @@ def get_records_to_review(
         month (int): The month for which to retrieve records (1-12).
         review_species (dict): A dictionary of species to review, where keys are
             species names and values are additional filtering criteria.
+        taxonomy (list, optional): The eBird taxonomy, used to give EBD
+            observations a species code and to roll forms up to their
+            species. Without it only the species in the state list and review
+            rules can be resolved and forms are matched exactly.
+        rules_holder (ReviewRulesHolder, optional): When given, the rules are
+            taken from the holder at the start of each county, so that changes
+            to the rules file take effect without restarting. A county that
+            has started is finished with the rules it started with.
+        fetch_strategy (str, optional): "county" queries the API for every
+            county and day. "state" first makes one state-level query per day
+            and only queries the counties that may have records that day.
+            Ignored when using the database.
+        day_needed (callable, optional): A function (county, day) -> bool.
+            Days on which it is False for a county are not fetched, e.g.
+            because an earlier incremental run already has them.
+        date_range (tuple, optional): Inclusive (start, end) dates to review
+            instead of year, month and day.
+        jobs (int, optional): When using the database, the number of worker
+            processes to review counties in. Each worker writes a partial
+            result file per county and the results are merged in county
+            order. The rules are taken once at the start, and day_needed
+            cannot be used.
+        database_cache (dict, optional): The indexed databases of earlier
+            reviews, keyed by database_file. With a taxonomy, the database
+            is read from the cache, or read once and added to it, so that
+            reviews of several regions read the file once.
+        continuation (ContinuationRecord, optional): The continuation record
+            to use, e.g. a TransientContinuationRecord when the review is
+            restartable in another way. One keyed by run_key is created if
+            not given.
 
     Returns:
         list: A list of dictionaries, where each dictionary contains:
             - "county" (str): The name of the county.
             - "records" (list): A list of records for the county that match the
-              review criteria.
+              review criteria. With a taxonomy, each record has a "taxon"
+              with the common and scientific names and taxonomic order.
     """
-    continuation = continuation_record.ContinuationRecord(counties)
-    records_to_review = continuation.records()
-    if database_file == "":
-        database = []
-    else:
-        database = ebird_data_access.read_database(database_file)
+    if continuation is None:
+        continuation = continuation_record.ContinuationRecord(
+            counties,
+            run_key(
+                database_file,
+                state_list,
+                counties,
+                year,
+                month,
+                day,
+                review_species,
+                date_range,
+            ),
+        )
+    try:
+        records_to_review = continuation.records()
+        if taxonomy is not None:
+            taxonomy = taxonomy_index.TaxonomyIndex.of(taxonomy)
+        rules, database, county_needed = _prepare_review(
+            ebird_api_key,
+            database_file,
+            state_list,
+            counties,
+            review_species,
+            taxonomy,
+            fetch_strategy,
+            day_needed,
+            database_cache,
+        )
+
+        if jobs > 1 and database != [] and day_needed is None:
+            for county, county_records in _review_counties_in_processes(
+                ebird_api_key,
+                database,
+                rules_holder.current() if rules_holder is not None else rules,
+                continuation.counties(),
+                year,
+                month,
+                day,
+                date_range,
+                jobs,
+                continuation.partial_directory(),
+            ):
+                if county_records:
+                    records_to_review.append(
+                        {
+                            "county": county["name"],
+                            "records": _add_taxa(county_records, taxonomy),
+                        }
+                    )
+                continuation.update(county, records_to_review)
+            continuation.complete()
+            return records_to_review
+        if jobs > 1:
+            logging.warning(
+                "Reviewing counties in one process; worker processes are only "
+                "used with a database and without incremental runs."
+            )
+
+        for county in continuation.counties():
+            if rules_holder is not None:
+                rules = rules_holder.current()
+            county_records = _get_county_records(
+                ebird_api_key,
+                database,
+                rules,
+                county,
+                year,
+                month,
+                day,
+                county_needed,
+                date_range,
+                continuation,
+            )
+            if county_records:
+                records_to_review.append(
+                    {
+                        "county": county["name"],
+                        "records": _add_taxa(county_records, taxonomy),
+                    }
+                )
+            continuation.update(county, records_to_review)
+        continuation.complete()
+        return records_to_review
+    finally:
+        # complete() releases the lock when the review finishes; this
+        # releases it when the review stops with an error.
+        continuation.release()
+
+
+def iterate_records_to_review(
+    ebird_api_key: str,
+    database_file: str,
+    state_list: list,
+    counties: list,
+    year: int,
+    month: int,
+    day: int,
+    review_species: dict,
+    taxonomy: list = None,
+    rules_holder=None,
+    fetch_strategy: str = "county",
+    day_needed=None,
+    date_range: tuple = None,
+    continuation=None,
+    database_cache: dict = None,
+):
+    """
+    Generate the records to review one county-day at a time.
 
-    for county in continuation.counties():
-        county_records = _get_county_records(
+    This is the streaming form of get_records_to_review and takes the same
+    arguments. Nothing is accumulated, so the caller can write each county-day
+    out as it is produced and memory does not grow with the length of the
+    period.
+
+    Progress is kept in the continuation record one county-day at a time, but
+    since the records have already been handed to the caller they are not
+    stored in it. A day is recorded as finished when the caller asks for the
+    next county-day, so a day that was interrupted is reviewed again when the
+    run is restarted.
+
+    Args:
+        continuation (ContinuationRecord, optional): The continuation record
+            to use, so the caller can tell whether the run is being restarted.
+            One keyed by run_key is created if not given.
+        database_cache (dict, optional): As for get_records_to_review.
+
+    Yields:
+        dict: For each county-day with records:
+            - "county" (str): The name of the county.
+            - "day" (date): The day of the observations.
+            - "records" (list): The records for the county on that day.
+    """
+    if continuation is None:
+        continuation = continuation_record.ContinuationRecord(
+            counties,
+            run_key(
+                database_file,
+                state_list,
+                counties,
+                year,
+                month,
+                day,
+                review_species,
+                date_range,
+            ),
+        )
+    try:
+        if taxonomy is not None:
+            taxonomy = taxonomy_index.TaxonomyIndex.of(taxonomy)
+        rules, database, county_needed = _prepare_review(
             ebird_api_key,
-            database,
+            database_file,
             state_list,
-            county,
-            year,
-            month,
-            day,
+            counties,
             review_species,
+            taxonomy,
+            fetch_strategy,
+            day_needed,
+            database_cache,
         )
-        if county_records:
-            records_to_review.append(
-                {"county": county["name"], "records": county_records}
+        for county in continuation.counties():
+            if rules_holder is not None:
+                rules = rules_holder.current()
+            for day_in_period, records in _iterate_county_records(
+                ebird_api_key,
+                database,
+                rules,
+                county,
+                year,
+                month,
+                day,
+                county_needed,
+                date_range,
+                continuation,
+            ):
+                if records:
+                    yield {
+                        "county": county["name"],
+                        "day": day_in_period,
+                        "records": _add_taxa(records, taxonomy),
+                    }
+                continuation.day_done(county, day_in_period, [])
+            continuation.update(county, [])
+        continuation.complete()
+    finally:
+        # Release the lock if the review stops with an error or the caller
+        # stops asking for county-days; complete() has released it otherwise.
+        continuation.release()
+
+
+def get_records_for_rule_sets(
+    ebird_api_key: str,
+    database_file: str,
+    rule_sets: list,
+    counties: list,
+    year: int,
+    month: int,
+    day: int,
+    taxonomy: list,
+    date_range: tuple = None,
+) -> list:
+    """
+    Classifies a single pass of observations against several sets of review
+    rules at once.
+
+    Each county-day of observations is read once, from the eBird API or from
+    the database, and classified with every rule set. Checklists needed for
+    the pelagic and media checks are fetched at most once per county-day.
+
+    Args:
+        ebird_api_key (str): The API key for accessing eBird data.
+        database_file (str): eBird database file or "" if using API.
+        rule_sets (list): Rules compiled by
+            get_review_rules.compile_review_rules, one per rule set.
+        counties (list): The counties to review.
+        year (int): The year for which to retrieve records.
+        month (int): The month for which to retrieve records, 0 for all.
+        day (int): The day for which to retrieve records, 0 for all.
+        taxonomy (list): The eBird taxonomy, used to resolve EBD observations.
+        date_range (tuple, optional): Inclusive (start, end) dates to review
+            instead of year, month and day.
+
+    Returns:
+        list: One list of records to review per rule set, in the same order
+            and with the same format as get_records_to_review returns.
+    """
+    index = taxonomy_index.TaxonomyIndex.of(taxonomy)
+    if database_file == "":
+        database = []
+    else:
+        database = ebird_data_access.read_database(
+            database_file,
+            species_codes=index.code_by_name,
+            rollup=index.rollup,
+        )
+        if database:
+            database = ebird_data_access.index_database(database)
+    records_by_rule_set = [[] for _ in rule_sets]
+    for county in counties:
+        county_records = [[] for _ in rule_sets]
+        for day_in_period in _iterate_period(year, month, day, date_range):
+            observations = _get_observations(
+                ebird_api_key, database, county, day_in_period
             )
-        continuation.update(county, records_to_review)
-    continuation.complete()
-    return records_to_review
+            checklists = {}
+            for rules, records in zip(rule_sets, county_records):
+                records.extend(
+                    _classify_observations(
+                        ebird_api_key,
+                        database,
+                        observations,
+                        rules,
+                        county,
+                        checklists,
+                    )
+                )
+        for records, all_records in zip(county_records, records_by_rule_set):
+            if records:
+                all_records.append(
+                    {"county": county["name"], "records": records}
+                )
+    return records_by_rule_set
@@ -1,18 +1,26 @@
 """Get eBird reports of interest."""
 
 import argparse
+import hashlib
 import json
 import logging
 import os
-from datetime import datetime
+from datetime import date, datetime
 
 from ebird.api import get_regions, get_taxonomy
 
 from get_reports import (
+    continuation_record,
+    ebird_data_access,
     get_ebird_api_key,
     get_review_rules,
     get_state_list,
     get_records_to_review,
+    historic_observation_cache,
+    review_rules_holder,
+    taxonomy_index,
+    watermark,
+    work_queue,
 )
 
 
@@ -24,13 +32,38 @@ def _parse_arguments() -> argparse.Namespace:
         argparse.Namespace: Parsed command-line arguments.
 
     Command-line arguments:
-        --year (int, required): Year to review in YYYY format.
-        --month (int, required): Month to review in MM format.
-        --input (str, optional): Path to the JSON file containing species requiring review.
-            Defaults to "get_reports/data/varcom_review_species.json".
-        --region (str, optional): State or county to review in the format US-SS, or US-SS-CCC.
-            Defaults to "US-VA".
+        --year (int): Year to review in YYYY format. Required unless --start
+            and --end are given.
+        --month (int, optional): Month to review in MM format.
+        --day (int, optional): Day to review in DD format.
+        --start, --end (date, optional): First and last day to review in
+            YYYY-MM-DD format, instead of --year, --month and --day.
+        --input (str, optional): Path to the JSON file containing species
+            requiring review, or a directory of per-state files named
+            US-SS.json. Defaults to
+            "get_reports/data/varcom_review_species.json".
+        --region (str, optional): One or more states or counties to review in
+            the format US-SS, or US-SS-CCC. Defaults to "US-VA", or to every
+            state in the --input directory.
         --EBD (str, optional): Use eBird Database file rather than API
+        --watch-rules: Reload the review rules between counties if the input
+            file changes.
+        --fetch-strategy (str, optional): "county" (default) or "state" to
+            prefilter county queries with one state-level query per day.
+        --cache (str, optional): Directory to cache eBird historic
+            observations in.
+        --incremental: Only fetch county-days not fetched by an earlier run
+            and merge the results into the existing records file.
+        --jsonl: Append records to a JSON Lines file as they are found rather
+            than writing the JSON records file at the end.
+        --jobs (int, optional): Number of processes to review counties in
+            when using --EBD. Defaults to 1.
+        --queue (str, optional): Shared work queue directory for a review
+            split across machines.
+        --queue-role (str, optional): "enqueue" to add a unit per county of
+            the regions and period, "work" (default) to review queued units
+            until none are left, or "merge" to write the records files of the
+            finished regions.
         --version: Displays the program version and exits.
         --verbose: Increases verbosity of the program output.
     """
@@ -38,7 +71,7 @@ def _parse_arguments() -> argparse.Namespace:
         prog="get_reports", description="Get eBird reports of interest."
     )
     arg_parser.add_argument(
-        "--year", type=int, help="Year to review YYYY", required=True
+        "--year", type=int, help="Year to review YYYY", default=None
     )
     arg_parser.add_argument(
         "--month",
@@ -54,32 +87,163 @@ def _parse_arguments() -> argparse.Namespace:
         required=False,
         default=0,
     )
+    arg_parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        help="First day to review YYYY-MM-DD, instead of --year",
+        default=None,
+    )
+    arg_parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        help="Last day to review YYYY-MM-DD, used with --start",
+        default=None,
+    )
     arg_parser.add_argument(
         "--input",
-        help="Species requiring review",
+        help="Species requiring review, or a directory of US-SS.json files",
         default="get_reports/data/varcom_review_species.json",
     )
     arg_parser.add_argument(
         "--region",
-        help="Region to review in the format US-SS, or US-SS-CCC",
-        default="US-VA",
+        nargs="+",
+        help="Regions to review in the format US-SS, or US-SS-CCC",
+        default=None,
     )
     arg_parser.add_argument(
         "--EBD",
         help="eBird Database file",
         default=""
     )
+    arg_parser.add_argument(
+        "--watch-rules",
+        action="store_true",
+        help="reload the review rules between counties if --input changes",
+    )
+    arg_parser.add_argument(
+        "--fetch-strategy",
+        choices=["county", "state"],
+        default="county",
+        help="query every county each day, or only the counties a "
+        "state-level query shows may have records",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        help="Directory to cache eBird historic observations in",
+        default="",
+    )
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only fetch days not already fetched and merge into the "
+        "existing records file",
+    )
+    arg_parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="append records to a .jsonl file as they are found; convert "
+        "it with get_reports.jsonl_to_json",
+    )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes to review counties in with --EBD",
+    )
+    arg_parser.add_argument(
+        "--queue",
+        help="Shared work queue directory for a review split across machines",
+        default="",
+    )
+    arg_parser.add_argument(
+        "--queue-role",
+        choices=["enqueue", "work", "merge"],
+        default="work",
+        help="add units for the regions and period to the queue, review "
+        "queued units, or merge the results of finished regions",
+    )
     arg_parser.add_argument(
         "--version", action="version", version="%(prog)s 0.0.0"
     )
     arg_parser.add_argument(
         "--verbose", action="store_true", help="increase verbosity"
     )
-    return arg_parser.parse_args()
+    args = arg_parser.parse_args()
+    # Queue workers take the period of each unit from the queue.
+    period_required = not (args.queue and args.queue_role == "work")
+    if args.start is None and args.end is None:
+        if args.year is None and period_required:
+            arg_parser.error("--year, or --start and --end, are required")
+    elif args.start is None or args.end is None:
+        arg_parser.error("--start and --end must be given together")
+    elif args.year is not None:
+        arg_parser.error("--year cannot be used with --start and --end")
+    elif args.end < args.start:
+        arg_parser.error("--end is before --start")
+    if args.jsonl and args.incremental:
+        arg_parser.error("--jsonl cannot be used with --incremental")
+    if args.jobs < 1:
+        arg_parser.error("--jobs must be at least 1")
+    if args.jobs > 1 and (args.jsonl or args.incremental):
+        arg_parser.error("--jobs cannot be used with --jsonl or --incremental")
+    if args.queue and (args.jsonl or args.incremental):
+        arg_parser.error("--queue cannot be used with --jsonl or --incremental")
+    return args
+
+
+def _date_range(args: argparse.Namespace):
+    """Return the (start, end) dates to review, or None if not given."""
+    if args.start is None:
+        return None
+    return (args.start, args.end)
+
+
+def _records_file_name(
+    year: int,
+    month: int,
+    day: int,
+    region: str,
+    region_in_file_name: bool = False,
+    date_range: tuple = None,
+) -> tuple:
+    """
+    Return the records file name and the observation date written in it.
+
+    A month of 0 means the whole year and a day of 0 the whole month. When
+    date_range is given, the period is its inclusive (start, end) dates.
+    """
+    if date_range is not None:
+        start, end = date_range
+        observation_date = f"{start.isoformat()}/{end.isoformat()}"
+        save_file_name = (
+            f"reports/records_to_review_{start:%Y_%m_%d}_to_{end:%Y_%m_%d}.json"
+        )
+    elif month == 0:
+        observation_date = datetime(year, 1, 1).strftime("%Y")
+        save_file_name = f"reports/records_to_review_{year:04d}.json"
+    elif day == 0:
+        observation_date = datetime(year, month, 1).strftime("%Y-%m")
+        save_file_name = (
+            f"reports/records_to_review_{year:04d}_{month:02d}.json"
+        )
+    else:
+        save_file_name = (
+            f"reports/records_to_review_{year:04d}_{month:02d}_{day:02d}.json"
+        )
+        observation_date = datetime(year, month, day).strftime("%Y-%m-%d")
+    if region_in_file_name:
+        save_file_name = save_file_name.replace(".json", f"_{region}.json")
+    return save_file_name, observation_date
 
 
 def _save_records_to_file(
-    records: list, year: int, month: int, day: int, region: str
+    records: list,
+    year: int,
+    month: int,
+    day: int,
+    region: str,
+    region_in_file_name: bool = False,
+    date_range: tuple = None,
 ) -> None:
     """
     Save a list of records to a JSON file with metadata.
@@ -95,6 +259,10 @@ def _save_records_to_file(
         month (int): The month associated with the records. 0, indicates all months
             in the year.
         region (str): The region associated with the records.
+        region_in_file_name (bool): Append the region to the file name so that
+            the outputs of a multi-region run do not overwrite each other.
+        date_range (tuple): Inclusive (start, end) dates of the records, used
+            instead of year, month and day when given.
     Returns:
         None
     """
@@ -102,15 +270,9 @@ def _save_records_to_file(
 
         def get_current_date_string():
             return datetime.now().strftime("%Y-%m-%d")
-        if month == 0:
-            observation_date = datetime(year, 1, 1).strftime("%Y")
-            save_file_name = f"reports/records_to_review_{year:04d}.json"
-        elif day == 0:
-            observation_date = datetime(year, month, 1).strftime("%Y-%m")
-            save_file_name = f"reports/records_to_review_{year:04d}_{month:02d}.json"
-        else:
-            save_file_name = f"reports/records_to_review_{year:04d}_{month:02d}_{day:02d}.json"
-            observation_date = datetime(year, month, day).strftime("%Y-%m-%d")
+        save_file_name, observation_date = _records_file_name(
+            year, month, day, region, region_in_file_name, date_range
+        )
         output_json = {
             "date of observations": observation_date,
             "region": region,
@@ -125,6 +287,622 @@ def _save_records_to_file(
             json.dump(output_json, f, ensure_ascii=False, indent=4)
 
 
+def _load_saved_records(file_name: str) -> list:
+    """Return the records in an existing records file, or [] if there is
+    none."""
+    try:
+        with open(file_name, "rt", encoding="utf-8") as f:
+            return json.load(f)["records"]
+    except FileNotFoundError:
+        return []
+
+
+def _merge_records(saved: list, new: list, fetched: set) -> list:
+    """
+    Merge newly fetched records into the records saved by an earlier run.
+
+    Saved records for the county-days that were fetched again are replaced by
+    the new records for those days. A record is identified by county,
+    checklist and species, so a record is never listed twice.
+
+    Args:
+        saved (list): Records to review from the existing records file.
+        new (list): Records to review from this run.
+        fetched (set): (county name, ISO date) of every county-day fetched
+            in this run.
+
+    Returns:
+        list: The merged records to review, in the format returned by
+            get_records_to_review, with each county's records in date order.
+    """
+    merged = {}
+    for county in saved:
+        merged[county["county"]] = [
+            record
+            for record in county["records"]
+            if (county["county"], record["observation"]["obsDt"][:10])
+            not in fetched
+        ]
+    for county in new:
+        records = merged.setdefault(county["county"], [])
+        seen = {
+            (
+                record["observation"].get("subId"),
+                record["observation"].get("speciesCode"),
+            )
+            for record in records
+        }
+        for record in county["records"]:
+            key = (
+                record["observation"].get("subId"),
+                record["observation"].get("speciesCode"),
+            )
+            if key not in seen:
+                records.append(record)
+                seen.add(key)
+    return [
+        {
+            "county": county,
+            "records": sorted(
+                records, key=lambda record: record["observation"]["obsDt"]
+            ),
+        }
+        for county, records in merged.items()
+        if records
+    ]
+
+
+def _regions_and_rules_files(region_args: list, input_path: str) -> list:
+    """
+    Pair each region to review with the review rules file to use for it.
+
+    Args:
+        region_args (list): Regions from --region, or None if not given.
+        input_path (str): The --input file, or a directory containing one
+            US-SS.json rules file per state.
+
+    Returns:
+        list: (region, rules file) tuples in the order they should be run.
+    """
+    if os.path.isdir(input_path):
+        if region_args is None:
+            region_args = sorted(
+                os.path.splitext(f)[0]
+                for f in os.listdir(input_path)
+                if f.endswith(".json")
+            )
+        return [
+            (region, os.path.join(input_path, f"{region[:5]}.json"))
+            for region in region_args
+        ]
+    return [(region, input_path) for region in region_args or ["US-VA"]]
+
+
+def _region_review_arguments(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    region: str,
+    rules_file: str,
+    state_cache: dict,
+    day_needed=None,
+):
+    """
+    Work out the arguments to review one region with.
+
+    State lists, review rules and county lists are cached in state_cache,
+    keyed by state and rules file, so that several regions in the same state
+    only load them once. The indexed EBD is cached in it under "databases",
+    so that it is read once for all regions. day_needed is passed on to
+    get_records_to_review.
+
+    Returns:
+        dict: Keyword arguments for get_records_to_review, or None if the
+            region is not found.
+    """
+    state = region[:5]
+    cache_key = (state, rules_file)
+    if cache_key not in state_cache:
+        state_cache[cache_key] = {
+            "state_list": get_state_list.get_state_list(
+                rules_file, taxonomy=taxonomy
+            ),
+            "county_list": get_regions(
+                token=ebird_api_key, rtype="subnational2", region=state
+            ),
+        }
+    cached = state_cache[cache_key]
+    county_list = cached["county_list"]
+    if state == region:
+        counties = county_list
+    else:
+        matching_county = next(
+            (county for county in county_list if county["code"] == region),
+            None,
+        )
+        if not matching_county:
+            logging.error(
+                "Region %s not found in county list of %s. Skipping.",
+                region,
+                state,
+            )
+            return None
+        counties = [matching_county]
+    if "review_species" not in cached:
+        cached["review_species"] = get_review_rules.get_review_rules(
+            rules_file, taxonomy, county_list, state
+        )
+    return {
+        "ebird_api_key": ebird_api_key,
+        "database_file": args.EBD,
+        "state_list": cached["state_list"],
+        "counties": counties,
+        "year": args.year,
+        "month": args.month,
+        "day": args.day,
+        "review_species": cached["review_species"],
+        "taxonomy": taxonomy,
+        "rules_holder": (
+            review_rules_holder.ReviewRulesHolder(
+                rules_file, taxonomy, county_list, state
+            )
+            if args.watch_rules
+            else None
+        ),
+        "fetch_strategy": args.fetch_strategy,
+        "day_needed": day_needed,
+        "date_range": _date_range(args),
+        "jobs": args.jobs,
+        "database_cache": state_cache.setdefault("databases", {}),
+    }
+
+
+def _get_region_records(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    region: str,
+    rules_file: str,
+    state_cache: dict,
+    day_needed=None,
+):
+    """
+    Get the records to review for one region.
+
+    Returns:
+        list: The records to review, or None if the region is not found.
+    """
+    review_arguments = _region_review_arguments(
+        args,
+        ebird_api_key,
+        taxonomy,
+        region,
+        rules_file,
+        state_cache,
+        day_needed,
+    )
+    if review_arguments is None:
+        return None
+    return get_records_to_review.get_records_to_review(**review_arguments)
+
+
+def _drop_incomplete_last_line(file_name: str):
+    """
+    Cut off the last line of a file if it does not end with a newline, as
+    when a crash interrupted writing it, so that appended lines start on a
+    line of their own.
+    """
+    with open(file_name, "r+b") as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            start = max(position - 4096, 0)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            position = start
+        else:
+            end = 0
+        if end < f.seek(0, os.SEEK_END):
+            logging.warning("Dropping incomplete last line of %s", file_name)
+            f.truncate(end)
+
+
+def _stream_records_to_file(
+    county_days, file_name: str, header: dict, append: bool
+) -> int:
+    """
+    Write records to a JSON Lines file as they are produced.
+
+    The first line of a new file is the header, with the same metadata as the
+    JSON records file. Every other line is one record, as
+    {"county": name, "record": record}. The file is flushed after each
+    county-day so that the records found so far survive a crash.
+
+    Args:
+        county_days (iterable): County-days as yielded by
+            get_records_to_review.iterate_records_to_review.
+        file_name (str): The .jsonl file to write.
+        header (dict): The metadata for the first line.
+        append (bool): Append to the file of an interrupted run instead of
+            starting a new file. A last line the interrupted run did not
+            finish writing is dropped first.
+
+    Returns:
+        int: The number of records written.
+    """
+    written = 0
+    if append:
+        _drop_incomplete_last_line(file_name)
+        # Nothing, not even the header, survived the interrupted run.
+        append = os.path.getsize(file_name) > 0
+    with open(file_name, "at" if append else "wt", encoding="utf-8") as f:
+        if not append:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for county_day in county_days:
+            for record in county_day["records"]:
+                f.write(
+                    json.dumps(
+                        {"county": county_day["county"], "record": record},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                written += 1
+            f.flush()
+    return written
+
+
+def _stream_region_records(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    region: str,
+    rules_file: str,
+    state_cache: dict,
+    region_in_file_name: bool,
+):
+    """
+    Stream the records to review for one region to a JSON Lines file.
+
+    If the run is a restart of an interrupted one, the records are appended
+    to the file the interrupted run was writing.
+    """
+    review_arguments = _region_review_arguments(
+        args, ebird_api_key, taxonomy, region, rules_file, state_cache
+    )
+    if review_arguments is None:
+        return
+    del review_arguments["jobs"]
+    continuation = continuation_record.ContinuationRecord(
+        review_arguments["counties"],
+        get_records_to_review.run_key(
+            review_arguments["database_file"],
+            review_arguments["state_list"],
+            review_arguments["counties"],
+            review_arguments["year"],
+            review_arguments["month"],
+            review_arguments["day"],
+            review_arguments["review_species"],
+            review_arguments["date_range"],
+        ),
+    )
+    json_file_name, observation_date = _records_file_name(
+        args.year,
+        args.month,
+        args.day,
+        region,
+        region_in_file_name,
+        _date_range(args),
+    )
+    file_name = os.path.splitext(json_file_name)[0] + ".jsonl"
+    try:
+        written = _stream_records_to_file(
+            get_records_to_review.iterate_records_to_review(
+                **review_arguments, continuation=continuation
+            ),
+            file_name,
+            {
+                "date of observations": observation_date,
+                "region": region,
+                "date of report": datetime.now().strftime("%Y-%m-%d"),
+            },
+            append=continuation.restarted() and os.path.exists(file_name),
+        )
+    finally:
+        continuation.release()
+    logging.info("Wrote %d records to %s.", written, file_name)
+
+
+def _rules_version(rules_file: str, database_file: str) -> str:
+    """
+    Identify the rules and data source an incremental run classified with,
+    so that a change to either causes every day to be fetched again.
+
+    The rules are identified by their contents. The EBD is identified by its
+    path, size and modification time rather than a hash of its contents,
+    which would mean reading the whole file; replacing it at the same path,
+    as in a monthly refresh, changes its modification time.
+    """
+    with open(rules_file, "rb") as fh:
+        rules_hash = hashlib.sha256(fh.read()).hexdigest()
+    if database_file == "":
+        return f"{rules_hash}:"
+    stat = os.stat(database_file)
+    return f"{rules_hash}:{database_file}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _update_region_records(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    region: str,
+    rules_file: str,
+    state_cache: dict,
+    region_in_file_name: bool,
+):
+    """
+    Incrementally update the records file of one region.
+
+    Only county-days the region's watermark does not hold as current are
+    fetched. Their records replace the saved records for those days, and the
+    watermark is updated once the merged records file has been written.
+    """
+    region_watermark = watermark.Watermark(
+        region, _rules_version(rules_file, args.EBD)
+    )
+    fetched = set()
+
+    def day_needed(county: dict, day) -> bool:
+        if region_watermark.is_current(county["code"], day):
+            return False
+        fetched.add((county["code"], county["name"], day))
+        return True
+
+    records_to_review = _get_region_records(
+        args,
+        ebird_api_key,
+        taxonomy,
+        region,
+        rules_file,
+        state_cache,
+        day_needed,
+    )
+    if records_to_review is None:
+        return
+    logging.info(
+        "Fetched %d county-days for %s incrementally.", len(fetched), region
+    )
+    file_name, _ = _records_file_name(
+        args.year,
+        args.month,
+        args.day,
+        region,
+        region_in_file_name,
+        _date_range(args),
+    )
+    _save_records_to_file(
+        _merge_records(
+            _load_saved_records(file_name),
+            records_to_review,
+            {(name, day.isoformat()) for _, name, day in fetched},
+        ),
+        args.year,
+        args.month,
+        args.day,
+        region,
+        region_in_file_name=region_in_file_name,
+        date_range=_date_range(args),
+    )
+    for county_code, _, day in fetched:
+        region_watermark.mark(county_code, day)
+    region_watermark.save()
+
+
+def _queue_units(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    region: str,
+    rules_file: str,
+    state_cache: dict,
+) -> list:
+    """
+    Split the review of a region into one work unit per county.
+
+    A unit holds everything a worker on another machine needs to review it:
+    the region, county, period, rules file and EBD file. The rules and EBD
+    files must be at the same path on every machine.
+
+    Returns:
+        list: The units, or [] if the region is not found.
+    """
+    review_arguments = _region_review_arguments(
+        args, ebird_api_key, taxonomy, region, rules_file, state_cache
+    )
+    if review_arguments is None:
+        return []
+    _, period = _records_file_name(
+        args.year, args.month, args.day, region, date_range=_date_range(args)
+    )
+    return [
+        {
+            "id": f"{region}_{period.replace('/', '_')}_{county['code']}",
+            "region": region,
+            "period": period,
+            "order": order,
+            "county": county,
+            "rules_file": rules_file,
+            "EBD": args.EBD,
+            "year": args.year,
+            "month": args.month,
+            "day": args.day,
+            "start": args.start.isoformat() if args.start else None,
+            "end": args.end.isoformat() if args.end else None,
+        }
+        for order, county in enumerate(review_arguments["counties"])
+    ]
+
+
+def _unit_arguments(args: argparse.Namespace, unit: dict) -> argparse.Namespace:
+    """Return the command line arguments with the period and files of a unit."""
+    unit_args = argparse.Namespace(**vars(args))
+    unit_args.year = unit["year"]
+    unit_args.month = unit["month"]
+    unit_args.day = unit["day"]
+    unit_args.start = (
+        date.fromisoformat(unit["start"]) if unit["start"] else None
+    )
+    unit_args.end = date.fromisoformat(unit["end"]) if unit["end"] else None
+    unit_args.EBD = unit["EBD"]
+    return unit_args
+
+
+def _review_unit(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    unit: dict,
+    state_cache: dict,
+) -> list:
+    """
+    Review the county of a unit.
+
+    No continuation file is kept: a unit that is interrupted is reviewed
+    again from the start when its lease expires, perhaps on another machine,
+    and a continuation file locked by a machine that died would stop that.
+
+    Returns:
+        list: The records to review, or [] if the county is not found.
+    """
+    review_arguments = _region_review_arguments(
+        _unit_arguments(args, unit),
+        ebird_api_key,
+        taxonomy,
+        unit["county"]["code"],
+        unit["rules_file"],
+        state_cache,
+    )
+    if review_arguments is None:
+        return []
+    return get_records_to_review.get_records_to_review(
+        **review_arguments,
+        continuation=continuation_record.TransientContinuationRecord(
+            review_arguments["counties"]
+        ),
+    )
+
+
+def _work_on_queue(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    queue: work_queue.WorkQueue,
+) -> int:
+    """
+    Claim and review units from the queue until none are pending.
+
+    The lease on a unit is renewed while it is reviewed. If the review fails
+    the unit is released for another worker and the error is raised. The
+    state lists, rules and indexed EBD are kept in a cache shared by the
+    units, so the EBD is read once per worker rather than once per unit.
+
+    Returns:
+        int: The number of units reviewed.
+    """
+    state_cache = {}
+    reviewed = 0
+    while (unit := queue.claim()) is not None:
+        logging.info("Reviewing unit %s", unit["id"])
+        finished = False
+        try:
+            with queue.leased(unit):
+                records_to_review = _review_unit(
+                    args, ebird_api_key, taxonomy, unit, state_cache
+                )
+            queue.complete(unit, records_to_review)
+            finished = True
+            reviewed += 1
+        finally:
+            if not finished:
+                queue.release(unit)
+    return reviewed
+
+
+def _merge_queue_results(queue: work_queue.WorkQueue, region: str, period: str):
+    """
+    Merge the results of the units of a region, in county order.
+
+    Returns:
+        list: The records to review, or None if some units are not finished.
+    """
+    units = [
+        (state, unit)
+        for state, unit in queue.units()
+        if unit["region"] == region and unit["period"] == period
+    ]
+    finished = {unit["id"]: unit for state, unit in units if state == "results"}
+    unfinished = {unit["id"] for state, unit in units if state != "results"}
+    unfinished -= finished.keys()
+    if unfinished or not finished:
+        logging.error(
+            "%d units of %s for %s are not finished. Not merging.",
+            len(unfinished),
+            region,
+            period,
+        )
+        return None
+    records_to_review = []
+    for unit in sorted(finished.values(), key=lambda unit: unit["order"]):
+        records_to_review.extend(queue.result(unit["id"]))
+    return records_to_review
+
+
+def _run_queue_role(
+    args: argparse.Namespace,
+    ebird_api_key: str,
+    taxonomy: taxonomy_index.TaxonomyIndex,
+    regions: list,
+):
+    """Enqueue, work on or merge the work queue, as given by --queue-role."""
+    queue = work_queue.WorkQueue(args.queue)
+    if args.queue_role == "work":
+        reviewed = _work_on_queue(args, ebird_api_key, taxonomy, queue)
+        logging.info("Reviewed %d units; no units pending.", reviewed)
+        return
+    state_cache = {}
+    for region, rules_file in regions:
+        if args.queue_role == "enqueue":
+            units = _queue_units(
+                args, ebird_api_key, taxonomy, region, rules_file, state_cache
+            )
+            added = sum(queue.add(unit) for unit in units)
+            logging.info(
+                "Queued %d of %d units of %s.", added, len(units), region
+            )
+            continue
+        _, period = _records_file_name(
+            args.year,
+            args.month,
+            args.day,
+            region,
+            date_range=_date_range(args),
+        )
+        records_to_review = _merge_queue_results(queue, region, period)
+        if records_to_review is not None:
+            _save_records_to_file(
+                records_to_review,
+                args.year,
+                args.month,
+                args.day,
+                region,
+                region_in_file_name=len(regions) > 1,
+                date_range=_date_range(args),
+            )
+
+
 def main():
     """
     Main function to execute the report generation process.
@@ -136,12 +914,20 @@ def main():
     1. Parse command-line arguments.
     2. Configure logging if verbose mode is enabled.
     3. Retrieve the eBird API key.
-    4. Fetch taxonomy data using the eBird API key.
-    5. Retrieve the state list based on the review species file and taxonomy.
-    6. Fetch county-level regions for the specified state.
-    7. Determine species to review based on review rules, taxonomy, and counties.
-    8. Retrieve records to review for the specified year, month, and species.
-    9. Save the records to a file.
+    4. Fetch taxonomy data using the eBird API key and index it by name.
+    5. For each region, in a single process sharing the taxonomy:
+        a. Retrieve the state list based on the review species file and
+           taxonomy.
+        b. Fetch county-level regions for the state.
+        c. Determine species to review based on review rules, taxonomy, and
+           counties.
+        d. Retrieve records to review for the specified year, month, and
+           species, or for every day from --start to --end in one pass.
+        e. Save the records to a file, one per region. With --incremental, only
+           county-days not already fetched are fetched and merged into the file.
+           With --jsonl, each county-day is appended to a .jsonl file as it is
+           classified. With --queue, the counties are instead added to, reviewed
+           from, or merged from a shared work queue.
     Args:
         None (arguments are parsed internally).
     Returns:
@@ -153,47 +939,56 @@ def main():
         logging.basicConfig(level=logging.INFO)
 
     ebird_api_key = get_ebird_api_key.get_ebird_api_key()
-    taxonomy = get_taxonomy(ebird_api_key)
+    taxonomy = taxonomy_index.TaxonomyIndex(get_taxonomy(ebird_api_key))
     if args.EBD != "" and not os.path.exists(args.EBD):
         logging.error("eBird Database file %s not found. Exiting.", args.EBD)
         return
-    region = args.region
-    state = region[:5]
-    state_list = get_state_list.get_state_list(args.input, taxonomy=taxonomy)
-    county_list = get_regions(
-        token=ebird_api_key, rtype="subnational2", region=state
-    )
-    if state == region:
-        counties = county_list
-    else:
-        matching_county = next(
-            (county for county in county_list if county["code"] == region),
-            None,
+    if args.cache:
+        ebird_data_access.set_historic_cache(
+            historic_observation_cache.HistoricObservationCache(args.cache)
         )
-        if not matching_county:
-            logging.error(
-                "Region %s not found in county list of %s. Exiting.",
+    regions = _regions_and_rules_files(args.region, args.input)
+    if args.queue:
+        _run_queue_role(args, ebird_api_key, taxonomy, regions)
+        return
+    state_cache = {}
+    for region, rules_file in regions:
+        if args.jsonl:
+            _stream_region_records(
+                args,
+                ebird_api_key,
+                taxonomy,
                 region,
-                state,
+                rules_file,
+                state_cache,
+                region_in_file_name=len(regions) > 1,
             )
-            return
-        counties = [matching_county]
-    species = get_review_rules.get_review_rules(
-        args.input, taxonomy, county_list, state
-    )
-    records_to_review = get_records_to_review.get_records_to_review(
-        ebird_api_key=ebird_api_key,
-        database_file=args.EBD,
-        state_list=state_list,
-        counties=counties,
-        year=args.year,
-        month=args.month,
-        day=args.day,
-        review_species=species,
-    )
-    _save_records_to_file(
-        records_to_review, args.year, args.month, args.day, region
-    )
+            continue
+        if args.incremental:
+            _update_region_records(
+                args,
+                ebird_api_key,
+                taxonomy,
+                region,
+                rules_file,
+                state_cache,
+                region_in_file_name=len(regions) > 1,
+            )
+            continue
+        records_to_review = _get_region_records(
+            args, ebird_api_key, taxonomy, region, rules_file, state_cache
+        )
+        if records_to_review is None:
+            continue
+        _save_records_to_file(
+            records_to_review,
+            args.year,
+            args.month,
+            args.day,
+            region,
+            region_in_file_name=len(regions) > 1,
+            date_range=_date_range(args),
+        )
 
 
 if __name__ == "__main__":
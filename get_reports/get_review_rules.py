@@ -4,6 +4,8 @@ import json
 import logging
 import os
 
+from get_reports import taxonomy_index
+
 
 def _check_counties_in_groups(county_list, review_species):
     """
@@ -33,34 +35,29 @@ def _check_counties_in_groups(county_list, review_species):
 def _check_species_in_taxonomy(review_species, taxonomy):
     """
     Checks if the species in the review list are present in the provided eBird
-    taxonomy.
+    taxonomy and records the eBird species code of each one that is.
     Logs an informational message at the start of the check. For each species
-    in the review list, it verifies whether the species' common name matches
-    any common name in the taxonomy. If a species is not found in the taxonomy,
-    a warning is logged.
+    in the review list, it looks up the species' common name in the taxonomy.
+    If found, the species is given a "speciesCode" key so that observations
+    can be matched by code. If a species is not found in the taxonomy, a
+    warning is logged.
 
     Args:
         review_species (dict): A dictionary containing a list of species under
             the key "review_species". Each species is expected to be a
             dictionary with a "comName" key.
         taxonomy (list): A list of dictionaries representing the eBird
-            taxonomy. Each dictionary is expected to have a "comName" key.
+            taxonomy. Each dictionary is expected to have "comName" and
+            "speciesCode" keys. A TaxonomyIndex may be passed instead.
 
     Logs:
         info: Indicates the start of the species check process.
         warning: Indicates that a species from the review list is not found in
             the taxonomy.
     """
-    logging.info(
-        "Checking species in state review list against eBird taxonomy."
+    taxonomy_index.resolve_species_codes(
+        review_species["review_species"], taxonomy, "state review list"
     )
-    for species in review_species["review_species"]:
-        if not any(
-            taxon["comName"] == species["comName"] for taxon in taxonomy
-        ):
-            logging.warning(
-                "Species %s not found in eBird taxonomy", species["comName"]
-            )
 
 
 def _check_exclusions_in_counties(review_species, county_list, state):
@@ -144,3 +141,54 @@ def get_review_rules(
     _check_exclusions_in_counties(review_species, county_list, state)
 
     return review_species
+
+
+def compile_review_rules(
+    state_list: list, review_species: dict, rollup: dict = None
+) -> dict:
+    """
+    Build the lookup structures used when classifying observations.
+
+    The state list and review species must already have been resolved to
+    eBird species codes by get_state_list and get_review_rules, so matching an
+    observation is a set or dictionary lookup on its "speciesCode".
+
+    Args:
+        state_list (list): Species on the state list, each with a
+            "speciesCode" key when found in the taxonomy.
+        review_species (dict): Review rules as returned by get_review_rules.
+        rollup (dict, optional): The taxonomy rollup table from
+            TaxonomyIndex.rollup, mapping forms to their species.
+
+    Returns:
+        dict: The compiled rules with keys:
+            - "state_codes" (frozenset): Species codes on the state list.
+            - "species_by_code" (dict): Review species keyed by species code.
+            - "county_groups" (list): The county groups of the review rules.
+            - "pelagic_counties" (list): Counties in the "Pelagic Counties"
+              group.
+            - "rollup" (dict): The taxonomy rollup table, empty if not given.
+    """
+    county_groups = review_species.get("county_groups", [])
+    return {
+        "state_codes": frozenset(
+            species["speciesCode"]
+            for species in state_list
+            if "speciesCode" in species
+        ),
+        "species_by_code": {
+            species["speciesCode"]: species
+            for species in review_species.get("review_species", [])
+            if "speciesCode" in species
+        },
+        "county_groups": county_groups,
+        "pelagic_counties": next(
+            (
+                group["counties"]
+                for group in county_groups
+                if group["name"] == "Pelagic Counties"
+            ),
+            [],
+        ),
+        "rollup": rollup if rollup is not None else {},
+    }
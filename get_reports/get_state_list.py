@@ -2,15 +2,21 @@ import json
 import logging
 import os
 
+from get_reports import taxonomy_index
+
 
 def get_state_list(file_name: str, taxonomy: list) -> dict:
     """
     Reads a JSON file containing a list of states and validates species against a given taxonomy.
 
+    Each species found in the taxonomy is given its eBird "speciesCode" so that
+    observations can later be matched by code rather than by common name.
+
     Args:
         file_name (str): The path to the JSON file containing the state list.
         taxonomy (list): A list of dictionaries representing the eBird taxonomy,
                          where each dictionary contains species information.
+                         A TaxonomyIndex may be passed instead.
 
     Returns:
         dict: A dictionary containing the state list if the file exists and is valid,
@@ -26,12 +32,6 @@ def get_state_list(file_name: str, taxonomy: list) -> dict:
         return {}
     with open(file_name, "rt", encoding="utf-8") as f:
         state_list = json.load(f)["state_list"]
-    logging.info("Checking species in state list against eBird taxonomy.")
-    for species in state_list:
-        if not any(
-            taxon["comName"] == species["comName"] for taxon in taxonomy
-        ):
-            logging.warning(
-                "Species %s not found in eBird taxonomy", species["comName"]
-            )
-    return state_list
+    return taxonomy_index.resolve_species_codes(
+        state_list, taxonomy, "state list"
+    )
@@ -0,0 +1,131 @@
+"""
+This module provides the HistoricObservationCache class which keeps eBird
+historic observation responses on disk, so that reruns and backfills do not
+refetch county-days that are unlikely to have changed.
+
+Each response is stored in its own small JSON file keyed by area, date,
+category, rank and detail. How long a response is trusted depends on how old
+the observation date was when the response was fetched: checklists for recent
+days are still being submitted and reviewed, while a day months in the past
+rarely changes. A response fetched the day after the observations is
+therefore only trusted for a short time, however long ago that was. Empty
+responses are cached too, for a shorter time.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import date
+from pathlib import Path
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# (maximum age of the observation date in days when the response was fetched,
+# seconds to keep a response, seconds to keep an empty response), checked in
+# order.
+TTL_BY_AGE = [
+    (3, HOUR, HOUR),
+    (14, 12 * HOUR, 2 * HOUR),
+    (90, 7 * DAY, DAY),
+    (None, 180 * DAY, 30 * DAY),
+]
+
+
+class HistoricObservationCache:
+    """
+    On-disk cache of eBird get_historic_observations responses.
+
+    Entries are written to a temporary file and renamed into place so that a
+    crash while writing never leaves a partial entry behind.
+    """
+
+    def __init__(self, directory: str = "reports/cache/historic", now=None):
+        """
+        Parameters
+        ----------
+        directory : str
+            The directory the cache entries are stored in. Created if needed.
+        now : callable, optional
+            Returns the current time in seconds since the epoch. Defaults to
+            time.time; tests may substitute a fixed clock.
+        """
+        self._directory = Path(directory)
+        self._now = now or time.time
+
+    def _path(
+        self, area: str, day: date, category: str, rank: str, detail: str
+    ) -> Path:
+        """Return the file holding the entry for a query."""
+        return (
+            self._directory
+            / area
+            / f"{day.isoformat()}_{category}_{rank}_{detail}.json"
+        )
+
+    def ttl(self, day: date, empty: bool, fetched: float = None) -> int:
+        """
+        Return how many seconds a response for the day stays valid.
+
+        Args:
+            day (date): The observation date of the response.
+            empty (bool): Whether the response had no observations.
+            fetched (float, optional): When the response was fetched, in
+                seconds since the epoch. Defaults to now.
+
+        Returns:
+            int: The time to live in seconds.
+        """
+        if fetched is None:
+            fetched = self._now()
+        age = (date.fromtimestamp(fetched) - day).days
+        for max_age, ttl, empty_ttl in TTL_BY_AGE:
+            if max_age is None or age <= max_age:
+                return empty_ttl if empty else ttl
+        return 0
+
+    def get(
+        self, area: str, day: date, category: str, rank: str, detail: str
+    ):
+        """
+        Return the cached observations for a query, or None if there is no
+        valid entry.
+        """
+        path = self._path(area, day, category, rank, detail)
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logging.warning("Ignoring unreadable cache entry %s: %s", path, exc)
+            return None
+        observations = entry["observations"]
+        if self._now() - entry["fetched"] > self.ttl(
+            day, not observations, entry["fetched"]
+        ):
+            return None
+        return observations
+
+    def put(
+        self,
+        area: str,
+        day: date,
+        category: str,
+        rank: str,
+        detail: str,
+        observations: list,
+    ):
+        """Store the observations returned for a query."""
+        path = self._path(area, day, category, rank, detail)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as fh:
+                json.dump(
+                    {"fetched": self._now(), "observations": observations}, fh
+                )
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logging.warning("Could not write cache entry %s: %s", path, exc)
@@ -0,0 +1,135 @@
+"""Convert a JSON Lines records file written by get_reports --jsonl to the
+JSON records file format read by create_review_document."""
+
+import argparse
+import json
+import logging
+import os
+
+
+def _parse_arguments() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    arg_parser = argparse.ArgumentParser(
+        prog="jsonl_to_json",
+        description="Convert a .jsonl records file to a .json records file.",
+    )
+    arg_parser.add_argument(
+        "--input", help="JSON Lines records file", required=True
+    )
+    arg_parser.add_argument(
+        "--output",
+        help="JSON records file. Defaults to the input with a .json suffix.",
+        default="",
+    )
+    arg_parser.add_argument(
+        "--verbose", action="store_true", help="increase verbosity"
+    )
+    return arg_parser.parse_args()
+
+
+def iter_jsonl_records(file_name: str):
+    """
+    Read a JSON Lines records file one line at a time.
+
+    A county that was interrupted and reviewed again from its first day has
+    some records twice; a record is identified by its checklist and species
+    and only yielded once.
+
+    Args:
+        file_name (str): The .jsonl file. The first line is the header.
+
+    Yields:
+        tuple: (None, header) for a header line and (county, record) for
+            each record.
+    """
+    seen = set()
+    with open(file_name, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logging.warning("Skipping incomplete line in %s", file_name)
+                continue
+            if "record" not in entry:
+                yield None, entry
+                continue
+            observation = entry["record"]["observation"]
+            key = (
+                entry["county"],
+                observation.get("subId"),
+                observation.get("speciesCode", observation.get("comName")),
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            yield entry["county"], entry["record"]
+
+
+def read_jsonl_records(file_name: str) -> tuple:
+    """
+    Read a JSON Lines records file.
+
+    Records are grouped by county, in the order the counties first appear,
+    and each record is only kept once, as for iter_jsonl_records.
+
+    Args:
+        file_name (str): The .jsonl file. The first line is the header.
+
+    Returns:
+        tuple: (header, records), where records has the format returned by
+            get_records_to_review.get_records_to_review.
+    """
+    header = {}
+    records_by_county = {}
+    for county, entry in iter_jsonl_records(file_name):
+        if county is None:
+            header = entry
+        else:
+            records_by_county.setdefault(county, []).append(entry)
+    return header, [
+        {"county": county, "records": records}
+        for county, records in records_by_county.items()
+    ]
+
+
+def convert(jsonl_file: str, json_file: str = "") -> str:
+    """
+    Convert a JSON Lines records file to a JSON records file.
+
+    Args:
+        jsonl_file (str): The .jsonl file to read.
+        json_file (str): The .json file to write. Defaults to jsonl_file with
+            a .json suffix.
+
+    Returns:
+        str: The name of the file written.
+    """
+    if json_file == "":
+        json_file = os.path.splitext(jsonl_file)[0] + ".json"
+    header, records = read_jsonl_records(jsonl_file)
+    output_json = {
+        "date of observations": header.get("date of observations", ""),
+        "region": header.get("region", ""),
+        "date of report": header.get("date of report", ""),
+        "records": records,
+    }
+    with open(json_file, "wt", encoding="utf-8") as f:
+        json.dump(output_json, f, ensure_ascii=False, indent=4)
+    return json_file
+
+
+def main():
+    """Convert the --input .jsonl file to a .json records file."""
+    args = _parse_arguments()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    json_file = convert(args.input, args.output)
+    logging.info("Wrote %s", json_file)
+
+
+if __name__ == "__main__":
+    main()
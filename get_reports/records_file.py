@@ -0,0 +1,221 @@
+"""
+Module to read the records files written by get_reports a county at a time.
+
+json.load builds the whole file in memory before anything can be done with
+it. The reader here decodes one county of the "records" list at a time, so
+create_review_document can keep only what the document shows. It keeps the
+records with media and the fields used to render them. Dictionaries that
+repeat across records, such as the review rules and taxon of a species, are
+shared rather than held once per record. Peak memory is then a fraction of
+the size of a multi-year file.
+
+Both the .json format and the .jsonl format of get_reports --jsonl are read.
+"""
+
+import json
+import sys
+
+from get_reports import jsonl_to_json
+
+# Characters read from the file at a time.
+CHUNK_SIZE = 1 << 16
+
+# Fields of an observation used by create_review_document.
+OBSERVATION_FIELDS = (
+    "comName",
+    "speciesCode",
+    "subId",
+    "SubId",
+    "howMany",
+    "subnational2Name",
+    "obsDt",
+)
+
+# Fields of a record used by create_review_document.
+RECORD_FIELDS = (
+    "new",
+    "reviewable",
+    "media",
+    "review_species",
+    "checklist",
+    "taxon",
+)
+
+# Fields of a record that repeat across the records of a species, and so are
+# shared. Other dictionaries, such as checklists, are mostly seen once.
+SHARED_FIELDS = ("review_species", "taxon")
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonReader:
+    """Decodes the JSON values of a text file one at a time."""
+
+    def __init__(self, file):
+        self._file = file
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = CHUNK_SIZE) -> bool:
+        """Read more of the file. Returns False at the end of the file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(max(size, CHUNK_SIZE))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+    def next_char(self) -> str:
+        """Skip whitespace and return the next character, without consuming
+        it, or "" at the end of the file."""
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in _WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer) or not self._fill():
+                return self._buffer[self._position : self._position + 1]
+
+    def expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of characters."""
+        char = self.next_char()
+        if char == "" or char not in characters:
+            raise ValueError(
+                f"Expected one of {characters!r} but found {char!r}"
+            )
+        self._position += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value."""
+        self.next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._position
+                )
+                # A number at the end of the buffer may continue in the file.
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Double the buffer, so that a large county is decoded in a
+            # number of attempts that grows with the log of its size.
+            self._fill(len(self._buffer) - self._position)
+
+
+def iter_records_file(file_name: str):
+    """
+    Read a .json records file one county at a time.
+
+    Yields:
+        tuple: ("header", (key, value)) for each top level key other than
+            "records", and ("county", county) for each county in "records",
+            in the order they are in the file.
+    """
+    with open(file_name, "rt", encoding="utf-8") as f:
+        reader = _JsonReader(f)
+        reader.expect("{")
+        if reader.next_char() == "}":
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == "records":
+                reader.expect("[")
+                if reader.next_char() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield "county", reader.value()
+                        if reader.expect(",]") == "]":
+                            break
+            else:
+                yield "header", (key, reader.value())
+            if reader.expect(",}") == "}":
+                return
+
+
+class _Shared:
+    """Returns one shared copy of equal dictionaries."""
+
+    def __init__(self):
+        self._values = {}
+
+    def __call__(self, value):
+        if not isinstance(value, dict):
+            return value
+        key = json.dumps(value, sort_keys=True)
+        return self._values.setdefault(key, value)
+
+
+def _shown_record(record: dict, shared: _Shared):
+    """Return the fields of a record that the document shows, or None if it
+    is not shown."""
+    if not record.get("media"):
+        return None
+    observation = {
+        field: record["observation"][field]
+        for field in OBSERVATION_FIELDS
+        if field in record["observation"]
+    }
+    for field in ("comName", "subnational2Name"):
+        if isinstance(observation.get(field), str):
+            observation[field] = sys.intern(observation[field])
+    shown = {"observation": observation}
+    for field in RECORD_FIELDS:
+        if field in SHARED_FIELDS and field in record:
+            shown[field] = shared(record[field])
+        elif field in record:
+            shown[field] = record[field]
+    return shown
+
+
+def load_shown_records(file_name: str) -> dict:
+    """
+    Load the records of a .json or .jsonl records file that the review
+    document shows.
+
+    Returns:
+        dict: The header of the file and its "records", in the format of
+            the .json records file, with only the records with media and
+            only the fields the document uses.
+    """
+    observations = {}
+    counties = []
+    shared = _Shared()
+    if file_name.endswith(".jsonl"):
+        by_county = {}
+        for county, entry in jsonl_to_json.iter_jsonl_records(file_name):
+            if county is None:
+                observations.update(entry)
+            elif record := _shown_record(entry, shared):
+                if county not in by_county:
+                    by_county[county] = {"county": county, "records": []}
+                    counties.append(by_county[county])
+                by_county[county]["records"].append(record)
+    else:
+        for kind, item in iter_records_file(file_name):
+            if kind == "header":
+                observations[item[0]] = item[1]
+                continue
+            records = [
+                record
+                for record in (
+                    _shown_record(record, shared)
+                    for record in item.get("records", [])
+                )
+                if record is not None
+            ]
+            if records:
+                counties.append(dict(item, records=records))
+    observations["records"] = counties
+    return observations
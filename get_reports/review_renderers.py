@@ -0,0 +1,137 @@
+"""
+Renderers that write a review report to HTML, Markdown or CSV.
+
+The report is the model built once by create_review_document.build_report:
+
+    {
+        "header": {"date of observations", "region", "date of report"},
+        "species": [
+            {
+                "species": common name,
+                "taxonOrder": eBird taxonomic order, or None,
+                "notes": [lines shown under the species heading],
+                "observations": [
+                    {"comName", "sciName", "howMany", "locality", "county",
+                     "observer", "obsDt", "checklist", "url"},
+                ],
+            },
+        ],
+    }
+
+Each renderer writes the file as it goes through the report, one species at a
+time, rather than building the whole text first.
+"""
+
+import csv
+import html
+
+TITLE = "DRAFT Records for Expedited Review"
+
+# (text, link) lines at the end of the header of every format.
+CREDITS = [
+    (
+        "Produced for and by VARCOM (Virginia Avian Records Committee)"
+        ", of the VSO (Virginia Society of Ornithology). ",
+        "https://www.virginiabirds.org/varcom",
+    ),
+    (
+        "Automatically generated by VARCOM-get-reports. ",
+        "https://github.com/gbabineau/VARCOM-get-reports",
+    ),
+]
+
+
+def header_lines(header: dict) -> list:
+    """Return the plain text lines of the report header, before the credits."""
+    return [
+        f"Dates of observations: {header['date of observations']}",
+        f"Region: {header['region']}",
+        f"Dates of report creation: {header['date of report']}",
+    ]
+
+
+def observation_details(line: dict) -> str:
+    """Return the text of an observation line after the species names."""
+    return (
+        f"{line['howMany']}, {line['locality']} {line['county']} "
+        f"[ph. {line['observer']}] {line['obsDt']}"
+    )
+
+
+def render_markdown(report: dict, output: str):
+    """Write the report as Markdown."""
+    with open(output, "wt", encoding="utf-8") as f:
+        f.write(f"# {TITLE}\n\n")
+        for text in header_lines(report["header"]):
+            f.write(f"- {text}\n")
+        for text, link in CREDITS:
+            f.write(f"- {text}<{link}>\n")
+        for group in report["species"]:
+            f.write(f"\n## {group['species']}\n\n")
+            for note in group["notes"]:
+                f.write(f"- {note}\n")
+            f.write("\n")
+            for line in group["observations"]:
+                f.write(
+                    f"**{line['comName']}** (*{line['sciName']}*): "
+                    f"{observation_details(line)}; [{line['url']}]"
+                    f"({line['url']})\n\n"
+                )
+
+
+def render_html(report: dict, output: str):
+    """Write the report as a standalone HTML page."""
+    escape = html.escape
+    with open(output, "wt", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{escape(TITLE)}</title>\n</head>\n<body>\n"
+            f"<h1>{escape(TITLE)}</h1>\n<ul>\n"
+        )
+        for text in header_lines(report["header"]):
+            f.write(f"<li>{escape(text)}</li>\n")
+        for text, link in CREDITS:
+            f.write(
+                f"<li>{escape(text)}<a href=\"{escape(link)}\">"
+                f"{escape(link)}</a></li>\n"
+            )
+        f.write("</ul>\n")
+        for group in report["species"]:
+            f.write(f"<h2>{escape(group['species'])}</h2>\n<ul>\n")
+            for note in group["notes"]:
+                f.write(f"<li>{escape(note)}</li>\n")
+            f.write("</ul>\n")
+            for line in group["observations"]:
+                f.write(
+                    f"<p><b>{escape(line['comName'])}</b> "
+                    f"(<i>{escape(line['sciName'])}</i>): "
+                    f"{escape(observation_details(line))}; "
+                    f"<a href=\"{escape(line['url'])}\">"
+                    f"{escape(line['url'])}</a></p>\n"
+                )
+        f.write("</body>\n</html>\n")
+
+
+CSV_COLUMNS = [
+    "comName",
+    "sciName",
+    "howMany",
+    "locality",
+    "county",
+    "observer",
+    "obsDt",
+    "checklist",
+    "url",
+]
+
+
+def render_csv(report: dict, output: str):
+    """Write the observations of the report as CSV, one row per observation.
+    The header and species notes are not included."""
+    with open(output, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=CSV_COLUMNS, extrasaction="ignore"
+        )
+        writer.writeheader()
+        for group in report["species"]:
+            writer.writerows(group["observations"])
@@ -0,0 +1,121 @@
+"""
+This module provides the ReviewRulesHolder class which keeps a compiled set of
+review rules for a long-running process and reloads it when the rules file
+changes, without reloading the taxonomy or county list.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+from get_reports import get_review_rules, get_state_list, taxonomy_index
+
+
+class ReviewRulesHolder:
+    """
+    Hold the compiled review rules for a rules file and swap in a recompiled
+    version when the file changes.
+
+    The file is checked on every call to current(). Its modification time is
+    compared first and the file is only hashed when that changes, so an
+    unchanged file costs one stat call. The compiled rules are replaced by a
+    single assignment, so a caller that already has the old rules keeps using
+    them until it asks again. The taxonomy index and county list are kept
+    across reloads.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        taxonomy,
+        county_list: list,
+        state: str,
+    ):
+        """
+        Load and compile the rules in file_name.
+
+        Parameters
+        ----------
+        file_name : str
+            The review rules JSON file, containing the state list and the
+            review species.
+        taxonomy : list | TaxonomyIndex
+            The eBird taxonomy. It is indexed once and reused on reload.
+        county_list : list
+            The counties of the state, used to validate the rules.
+        state : str
+            The state the rules are for, used for logging.
+
+        Raises
+        ------
+        OSError
+            If the rules file cannot be read.
+        """
+        self._file_name = file_name
+        self._taxonomy = taxonomy_index.TaxonomyIndex.of(taxonomy)
+        self._county_list = county_list
+        self._state = state
+        self._lock = threading.Lock()
+        self._mtime = os.stat(file_name).st_mtime_ns
+        self._hash = self._file_hash()
+        self._rules = self._compile()
+
+    def _file_hash(self) -> str:
+        """Return the SHA-256 hash of the rules file contents."""
+        with open(self._file_name, "rb") as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+
+    def _compile(self) -> dict:
+        """Load the rules file and compile it for classification."""
+        return get_review_rules.compile_review_rules(
+            get_state_list.get_state_list(self._file_name, self._taxonomy),
+            get_review_rules.get_review_rules(
+                self._file_name, self._taxonomy, self._county_list, self._state
+            ),
+            self._taxonomy.rollup,
+        )
+
+    def _reload_if_changed(self):
+        """
+        Recompile the rules if the file has changed since it was last loaded.
+
+        Errors while reading or parsing the file, including valid JSON that
+        lacks a key or has a value of the wrong type, are logged and the
+        current rules are kept, so that a partly written or mistaken file
+        does not stop the process.
+        """
+        try:
+            mtime = os.stat(self._file_name).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            file_hash = self._file_hash()
+            if file_hash != self._hash:
+                logging.info("Reloading review rules from %s", self._file_name)
+                self._rules = self._compile()
+                self._hash = file_hash
+            self._mtime = mtime
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logging.error(
+                "Error reloading review rules %s, keeping current rules. %s",
+                self._file_name,
+                exc,
+            )
+
+    def current(self) -> dict:
+        """
+        Return the current compiled rules, reloading them first if the rules
+        file has changed.
+
+        Returns:
+            dict: Rules as returned by get_review_rules.compile_review_rules.
+                The dictionary is never modified after it is returned.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            return self._rules
+
+    def version(self) -> str:
+        """Return the SHA-256 hash of the rules file the current rules came
+        from."""
+        return self._hash
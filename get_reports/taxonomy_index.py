@@ -0,0 +1,108 @@
+"""
+Module to index the eBird taxonomy so that species can be matched by their
+eBird species code rather than by common name.
+
+Common names are only compared when the index is built. Everything downstream
+of the load step uses the (interned) species codes, which are cheap to compare
+and do not change when eBird renames a species in its annual taxonomy update.
+
+The index also holds a rollup table from each subspecies group (issf), form
+and intergrade to the species it is reported as, so that an observation of
+"Snow Goose (Lesser)" can be matched against a rule for "Snow Goose". Taxa
+such as slashes and spuhs have no single parent species and roll up to
+themselves.
+"""
+
+import logging
+import sys
+
+
+class TaxonomyIndex:
+    """
+    Lookup tables built once from the list returned by eBird get_taxonomy.
+
+    Attributes:
+        taxonomy (list): The original taxonomy list.
+        code_by_name (dict): Maps common name to (interned) species code.
+        taxon_by_code (dict): Maps species code to the taxon dictionary.
+        taxon_by_name (dict): Maps common name to the taxon dictionary,
+            including taxa without a species code.
+        rollup (dict): Maps the code of each taxon with a "reportAs" field
+            (issf, form, intergrade, ...) to the code of its species.
+    """
+
+    def __init__(self, taxonomy: list):
+        self.taxonomy = taxonomy
+        self.code_by_name = {}
+        self.taxon_by_code = {}
+        self.taxon_by_name = {}
+        self.rollup = {}
+        for taxon in taxonomy:
+            if "comName" in taxon:
+                self.taxon_by_name.setdefault(taxon["comName"], taxon)
+            code = taxon.get("speciesCode")
+            if code is None:
+                continue
+            code = sys.intern(code)
+            self.taxon_by_code[code] = taxon
+            if "comName" in taxon:
+                self.code_by_name[taxon["comName"]] = code
+            if taxon.get("reportAs"):
+                self.rollup[code] = sys.intern(taxon["reportAs"])
+
+    @classmethod
+    def of(cls, taxonomy) -> "TaxonomyIndex":
+        """
+        Return an index for the taxonomy, building one only when needed.
+
+        Args:
+            taxonomy (list | TaxonomyIndex): A taxonomy list or an existing
+                index, which is returned unchanged.
+
+        Returns:
+            TaxonomyIndex: The index for the taxonomy.
+        """
+        if isinstance(taxonomy, cls):
+            return taxonomy
+        return cls(taxonomy)
+
+    def species_code(self, com_name: str):
+        """Return the species code for a common name, or None if unknown."""
+        return self.code_by_name.get(com_name)
+
+    def taxon(self, com_name: str) -> dict:
+        """Return the taxon with a common name, or {} if unknown."""
+        return self.taxon_by_name.get(com_name, {})
+
+    def species_for(self, code: str) -> str:
+        """Return the code of the species a taxon rolls up to."""
+        return self.rollup.get(code, code)
+
+
+def resolve_species_codes(entries: list, taxonomy, description: str) -> list:
+    """
+    Add the eBird "speciesCode" to each entry based on its "comName".
+
+    Entries whose common name is not in the taxonomy are left without a code
+    and a warning is logged. This is the only place where common names are
+    compared; matching afterwards uses the species code.
+
+    Args:
+        entries (list): Dictionaries with a "comName" key. Updated in place.
+        taxonomy (list | TaxonomyIndex): The eBird taxonomy.
+        description (str): Name of the list being resolved, for logging.
+
+    Returns:
+        list: The same entries, for convenience.
+    """
+    index = TaxonomyIndex.of(taxonomy)
+    logging.info("Checking species in %s against eBird taxonomy.", description)
+    for entry in entries:
+        code = index.species_code(entry["comName"])
+        if code is None:
+            logging.warning(
+                "Species %s not found in eBird taxonomy", entry["comName"]
+            )
+        else:
+            entry["speciesCode"] = code
+    return entries
@@ -0,0 +1,106 @@
+"""
+This module provides the Watermark class which records, per region, which
+county-days have already been fetched and classified, so that an incremental
+run of get_reports only fetches days that are new or may have changed.
+"""
+
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+# eBird checklists for a day keep arriving and being reviewed for a while
+# afterwards. A county-day fetched sooner than this many days after the
+# observation date is fetched again by the next incremental run.
+SETTLE_DAYS = 14
+
+
+class Watermark:
+    """
+    Persist the county-days of a region that have been fetched and classified.
+
+    The watermark file (default "reports/watermark_<region>.json") contains:
+    - "rules": a hash identifying the review rules the days were classified
+      with. If the rules change, every day is treated as not fetched.
+    - "county_days": for each county code, a mapping of ISO date to the ISO
+      date on which that county-day was fetched.
+    """
+
+    _directory = "reports"
+
+    def __init__(self, region: str, rules_version: str, today: date = None):
+        """
+        Load the watermark for a region, or start an empty one.
+
+        Parameters
+        ----------
+        region : str
+            The region the watermark is for, e.g. US-VA.
+        rules_version : str
+            Identifies the review rules in use, e.g. a hash of the rules file.
+        today : date, optional
+            The date of the run. Defaults to today.
+        """
+        self._path = Path(self._directory) / f"watermark_{region}.json"
+        self._rules_version = rules_version
+        self._today = today or date.today()
+        self._county_days = {}
+        try:
+            with self._path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("rules") == rules_version:
+                self._county_days = data["county_days"]
+            else:
+                logging.info(
+                    "Review rules changed since the last run of %s; "
+                    "fetching all days.",
+                    region,
+                )
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as exc:
+            logging.warning(
+                "Ignoring unreadable watermark %s: %s", self._path, exc
+            )
+
+    def is_current(self, county_code: str, day: date) -> bool:
+        """
+        Return True if the county-day was fetched after it had settled, so it
+        does not need to be fetched again.
+        """
+        fetched = self._county_days.get(county_code, {}).get(day.isoformat())
+        if fetched is None:
+            return False
+        return (
+            datetime.strptime(fetched, "%Y-%m-%d").date() - day
+        ).days >= SETTLE_DAYS
+
+    def mark(self, county_code: str, day: date):
+        """Record that the county-day was fetched and classified today."""
+        self._county_days.setdefault(county_code, {})[day.isoformat()] = (
+            self._today.isoformat()
+        )
+
+    def save(self):
+        """
+        Write the watermark, replacing the previous file atomically.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        tmp_path = self._path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as fh:
+                json.dump(
+                    {
+                        "rules": self._rules_version,
+                        "county_days": self._county_days,
+                    },
+                    fh,
+                    indent=4,
+                )
+            os.replace(tmp_path, self._path)
+        except OSError as exc:
+            logging.error("Error saving watermark %s", exc)
+            raise
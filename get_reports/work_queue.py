@@ -0,0 +1,191 @@
+"""
+This module provides the WorkQueue class, a queue of work units kept as files
+in a shared directory so that get_reports processes on several machines can
+share a large review. Only a filesystem shared by all the machines is needed.
+
+Each unit is a JSON file that moves between three subdirectories:
+- pending/: units waiting for a worker.
+- claimed/: units a worker is reviewing. The modification time of the file
+  is the start of the worker's lease, which the worker renews while it works.
+  A unit whose lease has expired, e.g. because its worker died, is moved back
+  to pending/.
+- results/: the results of finished units, one file per unit.
+
+Units are claimed and reclaimed by renaming their file, which is atomic, so
+exactly one worker gets each unit. Leases compare file times with the local
+clock, so the clocks of the machines should be kept in sync.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Seconds a claim lasts unless it is renewed.
+LEASE_SECONDS = 15 * 60
+
+
+class WorkQueue:
+    """
+    A queue of work units in a shared directory.
+
+    A unit is a dictionary with an "id" key, which is used as its file name,
+    and any other JSON-serializable keys.
+    """
+
+    def __init__(
+        self, directory: str, lease_seconds: int = LEASE_SECONDS, now=None
+    ):
+        """
+        Parameters
+        ----------
+        directory : str
+            The shared queue directory. Created if needed.
+        lease_seconds : int
+            How long a claim lasts unless renewed.
+        now : callable, optional
+            Returns the current time in seconds since the epoch. Defaults to
+            time.time.
+        """
+        self._directory = Path(directory)
+        self._lease_seconds = lease_seconds
+        self._now = now or time.time
+        for state in ("pending", "claimed", "results"):
+            (self._directory / state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, unit_id: str) -> Path:
+        """Return the file of a unit in a state directory."""
+        return self._directory / state / f"{unit_id}.json"
+
+    @staticmethod
+    def _write(path: Path, data: dict):
+        """Write a JSON file atomically."""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def add(self, unit: dict) -> bool:
+        """
+        Add a unit to the queue.
+
+        Returns:
+            bool: False if a unit with the same id is already pending,
+                claimed or finished.
+        """
+        if any(
+            self._path(state, unit["id"]).exists()
+            for state in ("pending", "claimed", "results")
+        ):
+            return False
+        self._write(self._path("pending", unit["id"]), unit)
+        return True
+
+    def _reclaim_expired(self):
+        """Move units whose lease has expired back to pending."""
+        for path in (self._directory / "claimed").glob("*.json"):
+            try:
+                if self._now() - path.stat().st_mtime <= self._lease_seconds:
+                    continue
+                os.rename(path, self._directory / "pending" / path.name)
+                logging.warning("Lease on %s expired; requeued.", path.stem)
+            except FileNotFoundError:
+                # Finished, or reclaimed by another process.
+                continue
+
+    def claim(self):
+        """
+        Claim the next pending unit.
+
+        Returns:
+            dict: The unit, or None if no unit is pending.
+        """
+        self._reclaim_expired()
+        for path in sorted((self._directory / "pending").glob("*.json")):
+            claimed = self._directory / "claimed" / path.name
+            try:
+                # Start the lease before the file appears in claimed/.
+                os.utime(path, (self._now(), self._now()))
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            with claimed.open("r", encoding="utf-8") as fh:
+                return json.load(fh)
+        return None
+
+    def renew(self, unit: dict):
+        """Extend the lease on a claimed unit."""
+        try:
+            os.utime(
+                self._path("claimed", unit["id"]), (self._now(), self._now())
+            )
+        except FileNotFoundError:
+            logging.warning("Unit %s is no longer claimed.", unit["id"])
+
+    @contextmanager
+    def leased(self, unit: dict):
+        """Renew the lease on a unit in the background while it is worked on."""
+        stop = threading.Event()
+
+        def renew_until_stopped():
+            while not stop.wait(self._lease_seconds / 3):
+                self.renew(unit)
+
+        renewer = threading.Thread(target=renew_until_stopped, daemon=True)
+        renewer.start()
+        try:
+            yield unit
+        finally:
+            stop.set()
+            renewer.join()
+
+    def complete(self, unit: dict, result):
+        """Store the result of a claimed unit and remove its claim."""
+        self._write(
+            self._path("results", unit["id"]),
+            {"unit": unit, "result": result},
+        )
+        self._path("claimed", unit["id"]).unlink(missing_ok=True)
+
+    def release(self, unit: dict):
+        """Give up a claimed unit so that another worker can take it."""
+        try:
+            os.rename(
+                self._path("claimed", unit["id"]),
+                self._path("pending", unit["id"]),
+            )
+        except FileNotFoundError:
+            logging.warning("Unit %s is no longer claimed.", unit["id"])
+
+    def units(self) -> list:
+        """
+        Return every unit in the queue with its state.
+
+        Returns:
+            list: (state, unit) tuples, where state is "pending", "claimed"
+                or "results".
+        """
+        found = []
+        for state in ("pending", "claimed", "results"):
+            for path in sorted((self._directory / state).glob("*.json")):
+                try:
+                    with path.open("r", encoding="utf-8") as fh:
+                        data = json.load(fh)
+                except FileNotFoundError:
+                    continue
+                found.append(
+                    (state, data["unit"] if state == "results" else data)
+                )
+        return found
+
+    def result(self, unit_id: str):
+        """Return the result of a finished unit, or None if not finished."""
+        try:
+            path = self._path("results", unit_id)
+            with path.open("r", encoding="utf-8") as fh:
+                return json.load(fh)["result"]
+        except FileNotFoundError:
+            return None
@@ -1,10 +1,80 @@
 """Function to convert .docx files to very simple plain text files to test that
-expected text is in docx files."""
+expected text is in docx files.
+
+The text is streamed from word/document.xml in the .docx zip file with an
+iterative XML parser, one paragraph at a time, rather than loading the whole
+document with python-docx. This keeps integration tests over large generated
+reports quick and memory-light. The text can also be compared line by line
+with a file of expected text.
+"""
 
 import argparse
+import difflib
 import logging
+import re
+import sys
+import zipfile
+from collections import deque
+from itertools import zip_longest
+from xml.etree import ElementTree
+
+from docx.opc.exceptions import PackageNotFoundError
+
+DOCUMENT_PART = "word/document.xml"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_PARAGRAPH = _W + "p"
+_TEXT = _W + "t"
+# Elements inside a run that python-docx shows as characters.
+_CHARACTERS = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n"}
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@$")
+
 
-from docx import Document
+def iter_paragraph_text(input_file):
+    """
+    Yield the text of each paragraph in the body of a .docx file, as
+    python-docx Document(input_file).paragraphs does, without building the
+    document in memory.
+
+    Raises:
+        PackageNotFoundError: If the input file is not a .docx file.
+    """
+    if not zipfile.is_zipfile(input_file):
+        raise PackageNotFoundError(f"Package not found at '{input_file}'")
+    with zipfile.ZipFile(input_file) as package:
+        with package.open(DOCUMENT_PART) as document:
+            body = None
+            # Nesting level of the current element, and of the body.
+            level = body_level = 0
+            paragraph = None
+            for event, element in ElementTree.iterparse(
+                document, events=("start", "end")
+            ):
+                if event == "start":
+                    level += 1
+                    if element.tag == _BODY:
+                        body, body_level = element, level
+                    elif element.tag == _PARAGRAPH and level == body_level + 1:
+                        paragraph = []
+                    continue
+                level -= 1
+                if paragraph is None:
+                    continue
+                if element.tag == _TEXT:
+                    paragraph.append(element.text or "")
+                elif element.tag in _CHARACTERS:
+                    # Page and column breaks are not shown as text.
+                    if element.get(_W + "type", "textWrapping") == (
+                        "textWrapping"
+                    ):
+                        paragraph.append(_CHARACTERS[element.tag])
+                elif element.tag == _PARAGRAPH and level == body_level:
+                    yield "".join(paragraph)
+                    paragraph = None
+                    # Drop the parsed paragraphs so memory stays flat.
+                    body.clear()
 
 
 def extract_text_from_docx(input_file, output_file):
@@ -20,25 +90,112 @@ def extract_text_from_docx(input_file, output_file):
         None
 
     Raises:
-        FileNotFoundError: If the input file does not exist.
+        PackageNotFoundError: If the input file is not a .docx file.
         IOError: If there is an error reading the input file or writing to the output file.
 
     Example:
         extract_text_from_docx("example.docx", "output.txt")
     """
+    paragraphs = iter_paragraph_text(input_file)
+    # Raise PackageNotFoundError before the output file is created.
+    first = next(paragraphs, None)
     try:
-        # Load the .docx file
-        doc = Document(input_file)
-        # Extract all text
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        # Write the text to the output file
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(text)
+            if first is not None:
+                f.write(first)
+            for text in paragraphs:
+                f.write("\n")
+                f.write(text)
         logging.info("Text successfully extracted to %s.", output_file)
     except (FileNotFoundError, IOError) as e:
         print(f"An error occurred: {e}")
 
 
+def _offset_hunk_header(line: str, offset: int) -> str:
+    """Move the line numbers of a unified diff hunk header by offset."""
+    match = _HUNK_HEADER.match(line)
+    if match is None:
+        return line
+    old_start, old_length, new_start, new_length = match.groups()
+    return (
+        f"@@ -{int(old_start) + offset}{old_length or ''}"
+        f" +{int(new_start) + offset}{new_length or ''} @@"
+    )
+
+
+def diff_lines(actual, expected, context: int = 3) -> list:
+    """
+    Compare two sequences of lines and return a unified diff of them.
+
+    The lines are compared one pair at a time until they first differ, so
+    equal text is compared in a single pass without being held in memory.
+    Only the lines from the first difference on, less their common ending,
+    are passed to difflib.
+
+    Args:
+        actual (iterable): The lines extracted from the document.
+        expected (iterable): The expected lines.
+        context (int): The number of unchanged lines shown around changes.
+
+    Returns:
+        list: The lines of a unified diff, without line endings, or [] if
+            the lines are the same.
+    """
+    leading = deque(maxlen=context)
+    line_number = 0
+    actual_rest, expected_rest = [], []
+    missing = object()
+    actual, expected = iter(actual), iter(expected)
+    for actual_line, expected_line in zip_longest(
+        actual, expected, fillvalue=missing
+    ):
+        if actual_line != expected_line:
+            if actual_line is not missing:
+                actual_rest = [actual_line, *actual]
+            if expected_line is not missing:
+                expected_rest = [expected_line, *expected]
+            break
+        leading.append(actual_line)
+        line_number += 1
+    else:
+        return []
+    trailing = 0
+    while (
+        trailing < min(len(actual_rest), len(expected_rest))
+        and actual_rest[-1 - trailing] == expected_rest[-1 - trailing]
+    ):
+        trailing += 1
+    trailing = max(trailing - context, 0)
+    actual_rest = actual_rest[: len(actual_rest) - trailing]
+    expected_rest = expected_rest[: len(expected_rest) - trailing]
+    return [
+        _offset_hunk_header(line, line_number - len(leading))
+        for line in difflib.unified_diff(
+            [*leading, *expected_rest],
+            [*leading, *actual_rest],
+            fromfile="expected",
+            tofile="actual",
+            n=context,
+            lineterm="",
+        )
+    ]
+
+
+def _read_lines(file_name):
+    """Yield the lines of a text file without line endings."""
+    with open(file_name, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def diff_text_files(actual_file, expected_file, context: int = 3) -> list:
+    """Return a unified diff of two text files, or [] if they are the same.
+    See diff_lines."""
+    return diff_lines(
+        _read_lines(actual_file), _read_lines(expected_file), context
+    )
+
+
 def _parse_arguments() -> argparse.Namespace:
     """
     Parse command-line arguments for the script.
@@ -47,12 +204,18 @@ def _parse_arguments() -> argparse.Namespace:
         argparse.Namespace: Parsed arguments containing:
             - input (str): The input .docx filename (required).
             - output (str): The output text filename (required).
+            - expected (str): A file of the expected text (optional).
     """
     parser = argparse.ArgumentParser(
         description="Convert .docx file to plain text."
     )
     parser.add_argument("--input", required=True, help="Input .docx filename")
     parser.add_argument("--output", required=True, help="Output text filename")
+    parser.add_argument(
+        "--expected",
+        help="Text file to compare the output with. Differences are printed "
+        "as a unified diff and the exit status is 1.",
+    )
     return parser.parse_args()
 
 
@@ -65,11 +228,19 @@ def main():
     Command-line arguments:
         --input: Path to the input DOCX file.
         --output: Path to the output file where the extracted text will be saved.
+        --expected: Optional path to a file of the expected text, which the
+            extracted text is compared with.
     """
 
     args = _parse_arguments()
 
     extract_text_from_docx(args.input, args.output)
+    if args.expected:
+        differences = diff_text_files(args.output, args.expected)
+        for line in differences:
+            print(line)
+        if differences:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""Tests for compare_review_rules.py module."""
+
+import json
+import sys
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from get_reports.compare_review_rules import (
+    _compare,
+    _observation_period,
+    _parse_arguments,
+    main,
+)
+from get_reports.historic_observation_cache import HistoricObservationCache
+
+# pylint: disable=C0116
+
+
+def _records(county, *observations):
+    return [
+        {
+            "county": county,
+            "records": [
+                {"observation": observation, "new": False}
+                for observation in observations
+            ],
+        }
+    ]
+
+
+OBS_A = {"comName": "SpeciesA", "speciesCode": "speca", "subId": "S1"}
+OBS_B = {"comName": "SpeciesB", "speciesCode": "specb", "subId": "S2"}
+
+
+def test_parse_arguments():
+    sys.argv = [
+        "compare_review_rules",
+        "--year",
+        "2024",
+        "--rules",
+        "current.json",
+        "proposed.json",
+    ]
+    args = _parse_arguments()
+    assert args.rules == ["current.json", "proposed.json"]
+    assert args.month == 0
+    assert args.region == "US-VA"
+    assert args.output == "reports/rule_comparison.json"
+    assert args.start is None
+    assert args.cache == ""
+
+
+def test_parse_arguments_date_range():
+    sys.argv = [
+        "compare_review_rules",
+        "--start",
+        "2023-12-30",
+        "--end",
+        "2024-01-02",
+        "--rules",
+        "current.json",
+        "--cache",
+        "cache",
+    ]
+    args = _parse_arguments()
+    assert args.year is None
+    assert (args.start, args.end) == (date(2023, 12, 30), date(2024, 1, 2))
+    assert args.cache == "cache"
+
+
+@pytest.mark.parametrize(
+    "period",
+    [
+        [],
+        ["--start", "2024-01-02"],
+        ["--year", "2024", "--start", "2024-01-01", "--end", "2024-01-02"],
+        ["--start", "2024-01-02", "--end", "2024-01-01"],
+    ],
+)
+def test_parse_arguments_invalid_period(period):
+    sys.argv = ["compare_review_rules", "--rules", "current.json", *period]
+    with pytest.raises(SystemExit):
+        _parse_arguments()
+
+
+def test_observation_period():
+    assert _observation_period(2024, 0, 0) == "2024"
+    assert _observation_period(2024, 3, 0) == "2024-03"
+    assert _observation_period(2024, 3, 9) == "2024-03-09"
+    assert (
+        _observation_period(
+            None, 0, 0, (date(2023, 12, 30), date(2024, 1, 2))
+        )
+        == "2023-12-30/2024-01-02"
+    )
+
+
+def test_compare_reports_added_and_removed():
+    differences = _compare(
+        ["current", "proposed"],
+        [_records("CountyA", OBS_A), _records("CountyA", OBS_B)],
+    )
+
+    assert len(differences) == 1
+    assert differences[0]["name"] == "proposed"
+    assert differences[0]["baseline"] == "current"
+    assert [r["comName"] for r in differences[0]["added"]] == ["SpeciesB"]
+    assert [r["comName"] for r in differences[0]["removed"]] == ["SpeciesA"]
+
+
+def test_compare_identical_rule_sets():
+    differences = _compare(
+        ["current", "same"],
+        [_records("CountyA", OBS_A), _records("CountyA", OBS_A)],
+    )
+
+    assert differences[0]["added"] == []
+    assert differences[0]["removed"] == []
+
+
+@patch("get_reports.compare_review_rules._parse_arguments")
+@patch("get_reports.compare_review_rules.get_ebird_api_key.get_ebird_api_key")
+@patch("get_reports.compare_review_rules.get_taxonomy")
+@patch("get_reports.compare_review_rules.get_regions")
+@patch("get_reports.compare_review_rules.get_state_list.get_state_list")
+@patch("get_reports.compare_review_rules.get_review_rules.get_review_rules")
+@patch(
+    "get_reports.compare_review_rules.get_records_to_review"
+    ".get_records_for_rule_sets"
+)
+def test_main_writes_comparison(
+    mock_get_records_for_rule_sets,
+    mock_get_review_rules,
+    mock_get_state_list,
+    mock_get_regions,
+    mock_get_taxonomy,
+    mock_get_ebird_api_key,
+    mock_parse_arguments,
+    tmp_path,
+):
+    output = tmp_path / "comparison.json"
+    mock_args = MagicMock()
+    mock_args.year = 2024
+    mock_args.month = 5
+    mock_args.day = 0
+    mock_args.start = None
+    mock_args.end = None
+    mock_args.cache = ""
+    mock_args.region = "US-VA-003"
+    mock_args.rules = ["current.json", "proposed.json"]
+    mock_args.EBD = ""
+    mock_args.output = str(output)
+    mock_args.verbose = False
+    mock_parse_arguments.return_value = mock_args
+    mock_get_ebird_api_key.return_value = "key"
+    mock_get_taxonomy.return_value = []
+    mock_get_regions.return_value = [
+        {"code": "US-VA-003", "name": "Albemarle"},
+        {"code": "US-VA-005", "name": "Alleghany"},
+    ]
+    mock_get_state_list.return_value = []
+    mock_get_review_rules.return_value = {"review_species": []}
+    mock_get_records_for_rule_sets.return_value = [
+        _records("Albemarle", OBS_A),
+        _records("Albemarle", OBS_A, OBS_B),
+    ]
+
+    main()
+
+    assert mock_get_records_for_rule_sets.call_count == 1
+    kwargs = mock_get_records_for_rule_sets.call_args.kwargs
+    assert len(kwargs["rule_sets"]) == 2
+    assert kwargs["counties"] == [{"code": "US-VA-003", "name": "Albemarle"}]
+    content = json.loads(output.read_text(encoding="utf-8"))
+    assert content["date of observations"] == "2024-05"
+    assert [r["name"] for r in content["rule sets"]] == [
+        "current.json",
+        "proposed.json",
+    ]
+    assert [r["comName"] for r in content["differences"][0]["added"]] == [
+        "SpeciesB"
+    ]
+
+
+@patch("get_reports.compare_review_rules._parse_arguments")
+@patch("get_reports.compare_review_rules.get_ebird_api_key.get_ebird_api_key")
+@patch("get_reports.compare_review_rules.get_taxonomy")
+@patch("get_reports.compare_review_rules.get_regions")
+@patch("get_reports.compare_review_rules.ebird_data_access.set_historic_cache")
+@patch(
+    "get_reports.compare_review_rules.get_records_to_review"
+    ".get_records_for_rule_sets"
+)
+def test_main_date_range_and_cache(
+    mock_get_records_for_rule_sets,
+    mock_set_historic_cache,
+    mock_get_regions,
+    mock_get_taxonomy,
+    mock_get_ebird_api_key,
+    mock_parse_arguments,
+    tmp_path,
+):
+    output = tmp_path / "comparison.json"
+    mock_args = MagicMock()
+    mock_args.year = None
+    mock_args.month = 0
+    mock_args.day = 0
+    mock_args.start = date(2023, 12, 30)
+    mock_args.end = date(2024, 1, 2)
+    mock_args.cache = str(tmp_path / "cache")
+    mock_args.region = "US-VA-003"
+    mock_args.rules = []
+    mock_args.EBD = ""
+    mock_args.output = str(output)
+    mock_args.verbose = False
+    mock_parse_arguments.return_value = mock_args
+    mock_get_ebird_api_key.return_value = "key"
+    mock_get_taxonomy.return_value = []
+    mock_get_regions.return_value = [{"code": "US-VA-003", "name": "Albemarle"}]
+    mock_get_records_for_rule_sets.return_value = [[]]
+
+    main()
+
+    assert isinstance(
+        mock_set_historic_cache.call_args.args[0], HistoricObservationCache
+    )
+    assert mock_get_records_for_rule_sets.call_args.kwargs["date_range"] == (
+        date(2023, 12, 30),
+        date(2024, 1, 2),
+    )
+    content = json.loads(output.read_text(encoding="utf-8"))
+    assert content["date of observations"] == "2023-12-30/2024-01-02"
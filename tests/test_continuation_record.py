@@ -1,8 +1,16 @@
 # pylint: disable=W0212, C0116, C0114
 import json
+import os
+import socket
+from datetime import date
 from pathlib import Path
 
-from get_reports.continuation_record import ContinuationRecord
+import pytest
+
+from get_reports.continuation_record import (
+    ContinuationRecord,
+    TransientContinuationRecord,
+)
 
 
 def test_init_creates_file_when_missing(tmp_path):
@@ -14,7 +22,7 @@ def test_init_creates_file_when_missing(tmp_path):
     p = Path(ContinuationRecord._continuation_file)
     assert p.exists()
     content = json.loads(p.read_text(encoding="utf-8"))
-    assert content == {"counties": [], "records": []}
+    assert content == {"counties": [], "records": [], "days": {}, "sequence": 0}
     assert cr.counties() == initial
     assert cr.records() == []
 
@@ -40,13 +48,130 @@ def test_update_writes_county_and_records_to_file(tmp_path):
     p.write_text(json.dumps(initial_data), encoding="utf-8")
     cr = ContinuationRecord(["CountyX"])
     cr.update({"id": "CountyX"}, ["r1", "r2"])
-    content = json.loads(p.read_text(encoding="utf-8"))
-    assert content["counties"] == [{"id": "CountyX"}]
-    assert content["records"] == ["r1", "r2"]
+    journal = Path(ContinuationRecord._continuation_file + ".journal")
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert entries == [
+        {"sequence": 1, "county": {"id": "CountyX"}, "records": ["r1", "r2"]}
+    ]
     # object's in-memory records are not updated by update(); ensure current behavior
     assert cr.records() == []
 
 
+def test_update_appends_only_new_records(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    cr = ContinuationRecord(["A", "B", "C"])
+    records = cr.records()
+    records.append("r1")
+    cr.update("A", records)
+    records.append("r2")
+    cr.update("B", records)
+
+    journal = Path(ContinuationRecord._continuation_file + ".journal")
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert [entry["records"] for entry in entries] == [["r1"], ["r2"]]
+    restarted = ContinuationRecord(["A", "B", "C"])
+    assert restarted.counties() == ["C"]
+    assert restarted.records() == ["r1", "r2"]
+    assert not journal.exists()
+    content = json.loads(
+        Path(ContinuationRecord._continuation_file).read_text()
+    )
+    assert content == {
+        "counties": ["A", "B"],
+        "records": ["r1", "r2"],
+        "days": {},
+        "sequence": 2,
+    }
+
+
+def test_update_compacts_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr("get_reports.continuation_record.COMPACT_MIN_BYTES", 0)
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    cr = ContinuationRecord(["A", "B", "C"])
+    cr.update("A", ["r1"])
+    journal = Path(ContinuationRecord._continuation_file + ".journal")
+    assert journal.exists()
+    # The journal is now larger than the continuation file.
+    cr.update("B", ["r1", "r" * 200])
+
+    assert not journal.exists()
+    content = json.loads(
+        Path(ContinuationRecord._continuation_file).read_text()
+    )
+    assert content["counties"] == ["A", "B"]
+    assert content["records"] == ["r1", "r" * 200]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_long_run_compacts_journal_rarely(tmp_path, monkeypatch):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    counties = [{"code": f"US-XX-{n:03}"} for n in range(133)]
+    monkeypatch.setattr(os, "fsync", lambda fd: None)
+    cr = ContinuationRecord(counties)
+    writes = []
+    write_checkpoint = cr._write_checkpoint
+    monkeypatch.setattr(
+        cr,
+        "_write_checkpoint",
+        lambda *args: writes.append(1) or write_checkpoint(*args),
+    )
+    records = []
+    for county in counties:
+        for day in range(1, 366):
+            cr.day_done(county, date.fromordinal(day), [])
+        records.append({"county": county["code"]})
+        cr.update(county, records)
+
+    # A rewrite for each 50 journal lines, as once made, would be 974.
+    assert len(writes) < 133
+    restarted = ContinuationRecord(counties + [{"code": "US-XX-999"}])
+    assert restarted.counties() == [{"code": "US-XX-999"}]
+    assert restarted.records() == records
+
+
+def test_restart_ignores_incomplete_journal_line(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    cr = ContinuationRecord(["A", "B"])
+    cr.update("A", ["r1"])
+    journal = Path(ContinuationRecord._continuation_file + ".journal")
+    with journal.open("a", encoding="utf-8") as fh:
+        fh.write('{"sequence": 2, "county": "B", "rec')
+
+    restarted = ContinuationRecord(["A", "B"])
+
+    assert restarted.counties() == ["B"]
+    assert restarted.records() == ["r1"]
+
+
+def test_restart_skips_journal_lines_already_compacted(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    p = Path(ContinuationRecord._continuation_file)
+    p.write_text(
+        json.dumps({"counties": ["A"], "records": ["r1"], "sequence": 1}),
+        encoding="utf-8",
+    )
+    journal = Path(ContinuationRecord._continuation_file + ".journal")
+    journal.write_text(
+        json.dumps({"sequence": 1, "county": "A", "records": ["r1"]}) + "\n",
+        encoding="utf-8",
+    )
+
+    restarted = ContinuationRecord(["A", "B"])
+
+    assert restarted.counties() == ["B"]
+    assert restarted.records() == ["r1"]
+
+
 def test_complete_deletes_file(tmp_path):
     ContinuationRecord._continuation_file = str(
         tmp_path / "continuation_data.dat"
@@ -70,3 +195,169 @@ def test_update_logs_error_when_file_missing(tmp_path, caplog):
     caplog.clear()
     cr.update({"id": "One"}, ["r"])
     assert "Continuation file doesn't exist." in caplog.text
+
+
+def test_day_done_survives_restart(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    county = {"code": "US-VA-003", "name": "Albemarle"}
+    cr = ContinuationRecord([county])
+    cr.day_done(county, date(2024, 1, 1), ["r1"])
+    cr.day_done(county, date(2024, 1, 2), [])
+
+    restarted = ContinuationRecord([county])
+
+    assert restarted.counties() == [county]
+    assert restarted.day_finished(county, date(2024, 1, 1))
+    assert restarted.day_finished(county, date(2024, 1, 2))
+    assert not restarted.day_finished(county, date(2024, 1, 3))
+    assert restarted.day_records(county) == ["r1"]
+    content = json.loads(
+        Path(ContinuationRecord._continuation_file).read_text()
+    )
+    assert content["days"] == {
+        "US-VA-003": {"days": ["2024-01-01", "2024-01-02"], "records": ["r1"]}
+    }
+
+
+def test_finished_county_drops_its_days(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    county = {"code": "US-VA-003", "name": "Albemarle"}
+    cr = ContinuationRecord([county])
+    cr.day_done(county, date(2024, 1, 1), ["r1"])
+    cr.update(county, ["r1"])
+
+    restarted = ContinuationRecord([county])
+
+    assert restarted.counties() == []
+    assert restarted.records() == ["r1"]
+    assert not restarted.day_finished(county, date(2024, 1, 1))
+    assert restarted.day_records(county) == []
+
+
+def test_run_key_selects_continuation_file(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    first = ContinuationRecord(["A", "B"], run_key="run1")
+    first.update("A", [])
+    second = ContinuationRecord(["A", "B"], run_key="run2")
+
+    assert (tmp_path / "continuation_run1.dat").exists()
+    assert (tmp_path / "continuation_run2.dat").exists()
+    assert second.counties() == ["A", "B"]
+    first.complete()
+    assert not (tmp_path / "continuation_run1.dat").exists()
+    assert not (tmp_path / "continuation_run1.dat.lock").exists()
+
+
+def test_finished_counties_compared_by_code(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    p = Path(ContinuationRecord._continuation_file)
+    p.write_text(
+        json.dumps(
+            {
+                "counties": [{"code": "US-VA-003", "name": "Old name"}],
+                "records": [],
+            }
+        ),
+        encoding="utf-8",
+    )
+    cr = ContinuationRecord(
+        [
+            {"code": "US-VA-003", "name": "Albemarle"},
+            {"code": "US-VA-005", "name": "Alleghany"},
+        ]
+    )
+    assert cr.counties() == [{"code": "US-VA-005", "name": "Alleghany"}]
+
+
+def test_lock_held_by_running_process(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    lock = tmp_path / "continuation_data.dat.lock"
+    lock.write_text(f"{os.getppid()} {socket.gethostname()}", encoding="utf-8")
+
+    with pytest.raises(FileExistsError):
+        ContinuationRecord(["A"])
+
+
+def test_lock_held_on_other_host(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    lock = tmp_path / "continuation_data.dat.lock"
+    lock.write_text("1 some-other-host", encoding="utf-8")
+
+    with pytest.raises(FileExistsError):
+        ContinuationRecord(["A"])
+
+
+def test_stale_lock_is_taken_over(tmp_path, monkeypatch):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    lock = tmp_path / "continuation_data.dat.lock"
+    lock.write_text(f"999999999 {socket.gethostname()}", encoding="utf-8")
+
+    def no_such_process(pid, signal):
+        raise ProcessLookupError
+
+    monkeypatch.setattr(
+        "get_reports.continuation_record.os.kill", no_such_process
+    )
+    ContinuationRecord(["A"])
+
+    assert lock.read_text(encoding="utf-8").startswith(f"{os.getpid()} ")
+
+
+def test_complete_removes_partial_directory(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    cr = ContinuationRecord(["A"], run_key="run1")
+    partial_directory = cr.partial_directory()
+    assert partial_directory == tmp_path / "continuation_run1.partial"
+    partial_directory.mkdir()
+    (partial_directory / "A.json").write_text("{}", encoding="utf-8")
+
+    cr.complete()
+
+    assert not partial_directory.exists()
+
+
+def test_restarted(tmp_path):
+    ContinuationRecord._continuation_file = str(
+        tmp_path / "continuation_data.dat"
+    )
+    cr = ContinuationRecord([{"code": "A"}])
+    assert not cr.restarted()
+    cr.day_done({"code": "A"}, date(2024, 1, 1), [])
+    cr.release()
+
+    cr = ContinuationRecord([{"code": "A"}])
+    assert cr.restarted()
+    assert cr.counties() == [{"code": "A"}]
+
+
+def test_transient_record_keeps_nothing_on_disk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cr = TransientContinuationRecord([{"code": "A"}, {"code": "B"}])
+    cr.day_done({"code": "A"}, date(2024, 1, 1), ["r1"])
+    cr.update({"code": "A"}, ["r1"])
+    partial_directory = cr.partial_directory()
+    assert partial_directory.is_dir()
+
+    cr.complete()
+
+    assert cr.counties() == [{"code": "A"}, {"code": "B"}]
+    assert not cr.day_finished({"code": "A"}, date(2024, 1, 1))
+    assert not cr.restarted()
+    assert not partial_directory.exists()
+    assert not list(tmp_path.iterdir())
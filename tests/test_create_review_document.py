@@ -1,18 +1,45 @@
 """Unit tests for create_review_document module."""
 
+import json
 from unittest.mock import patch
 
 import pytest
 from docx import Document
 
+from get_reports import create_review_document
+from get_reports.docx_writer import DocxWriter
 from get_reports.create_review_document import (_add_document_header,
-                                                _add_observation_data,
-                                                _add_species_heading,
-                                                _create_document,
-                                                _iterate_over_species,
+                                                _add_observation,
+                                                _add_species_group,
+                                                _date_ordinals,
+                                                _load_manifest,
                                                 _load_observations,
+                                                _merge_reports,
+                                                _needs_ebird,
+                                                _new_records,
+                                                _observation_line,
+                                                _outputs,
                                                 _parse_arguments,
-                                                _save_document, get_day_number)
+                                                _prefetch_checklists,
+                                                _render_docx,
+                                                _save_manifest,
+                                                _species_groups,
+                                                _species_notes,
+                                                build_report, main)
+
+
+class WrittenDocument:
+    """A DocxWriter whose document is read back with python-docx."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.writer = DocxWriter(self.path)
+
+    @property
+    def paragraphs(self):
+        """Close the writer and return the paragraphs written."""
+        self.writer.close()
+        return Document(self.path).paragraphs
 
 
 class TestParseArguments:
@@ -25,6 +52,7 @@ class TestParseArguments:
             assert args.input == "reports/records_to_review.json"
             assert args.output == "reports/records_to_review.docx"
             assert args.verbose is False
+            assert args.jobs == 1
 
     def test_custom_input_output(self):
         """Test parsing custom input and output paths."""
@@ -48,11 +76,17 @@ class TestLoadObservations:
 
     def test_load_valid_json(self, tmp_path):
         """Test loading valid JSON file."""
-        test_data = {"records": [{"id": 1}], "region": "Virginia"}
+        test_data = {
+            "records": [
+                {"county": "A", "records": [_record("Robin", locName="x")]}
+            ],
+            "region": "Virginia",
+        }
         file_path = tmp_path / "test.json"
-        file_path.write_text('{"records": [{"id": 1}], "region": "Virginia"}')
+        file_path.write_text(json.dumps(test_data))
 
         result = _load_observations(str(file_path))
+        test_data["records"][0]["records"][0].pop("locName")
         assert result == test_data
 
     def test_load_nonexistent_file(self):
@@ -61,62 +95,121 @@ class TestLoadObservations:
             _load_observations("nonexistent.json")
 
 
-class TestGetDayNumber:
-    """Tests for get_day_number function."""
-
-    def test_valid_date_january(self):
-        """Test converting January date to day number."""
-        assert get_day_number("2025-01-01") == 1
-        assert get_day_number("2025-01-20") == 20
+class TestDateOrdinals:
+    """Tests for _date_ordinals function."""
 
-    def test_valid_date_december(self):
-        """Test converting December date to day number."""
-        assert get_day_number("2025-12-31") == 365
+    DATES = ["2025-01-20", "2024-12-31", "invalid", "2024-02-29"]
 
-    def test_leap_year(self):
-        """Test day number in leap year."""
-        assert get_day_number("2024-12-31") == 366
+    def test_ordinals(self):
+        """Test dates are converted to date ordinals."""
+        assert _date_ordinals(self.DATES) == [
+            739271,
+            739251,
+            None,
+            738945,
+        ]
 
-    def test_invalid_date_format(self):
-        """Test invalid date format returns None."""
-        assert get_day_number("2025/01/01") is None
-        assert get_day_number("invalid") is None
+    def test_vectorized_matches(self):
+        """Test the vectorized path gives the same ordinals."""
+        with patch.object(create_review_document, "VECTORIZED_SORT_KEYS", 1):
+            assert _date_ordinals(self.DATES) == [739271, 739251, None, 738945]
 
 
-class TestCreateDocument:
-    """Tests for _create_document function."""
+class TestBuildReport:
+    """Tests for build_report function."""
 
-    @patch("get_reports.create_review_document._iterate_over_species")
-    @patch("get_reports.create_review_document._add_document_header")
-    def test_create_document_structure(self, mock_header, mock_iterate):
-        """Test document creation calls header and iterate functions."""
+    def test_report_model(self):
+        """Test the report holds the header and species groups."""
         observations = {
-            "records": [],
-            "region": "Virginia",
-            "date of observations": "2025-01-01",
-            "date of report": "2025-01-20",
+            "date of observations": "2025-01",
+            "region": "US-VA",
+            "date of report": "2025-02-01",
+            "records": [
+                {
+                    "county": "County A",
+                    "records": [
+                        {
+                            "observation": {
+                                "comName": "Robin",
+                                "subId": "S1",
+                                "howMany": 1,
+                                "subnational2Name": "County A",
+                                "obsDt": "2025-01-20 08:00",
+                            },
+                            "media": True,
+                            "checklist": {
+                                "userDisplayName": "Jane Smith",
+                                "locId": "L1",
+                            },
+                            "taxon": {"comName": "Robin", "sciName": "T. m"},
+                        }
+                    ],
+                }
+            ],
         }
-        taxonomy = []
 
-        doc = _create_document("test_key", observations, taxonomy)
-        assert(doc.paragraphs==[])
-        mock_header.assert_called_once()
-        mock_iterate.assert_called_once()
+        report = build_report("", observations, [])
+
+        assert report["header"] == {
+            "date of observations": "2025-01",
+            "region": "US-VA",
+            "date of report": "2025-02-01",
+        }
+        assert report["species"] == [
+            {
+                "species": "Robin",
+                "taxonOrder": None,
+                "notes": [
+                    "The species Robin is reviewable across the entire state."
+                ],
+                "observations": [
+                    {
+                        "comName": "Robin",
+                        "sciName": "T. m",
+                        "howMany": 1,
+                        "locality": "L1",
+                        "county": "County A",
+                        "observer": "Jane Smith",
+                        "obsDt": "2025-01-20 08:00",
+                        "checklist": "S1",
+                        "url": "https://ebird.org/checklist/S1",
+                    }
+                ],
+            }
+        ]
+
+
+class TestOutputs:
+    """Tests for _outputs function."""
+
+    def test_format_from_extension(self):
+        """Test the format is taken from the output extension."""
+        assert _outputs("r.md") == [("md", "r.md")]
+        assert _outputs("r.HTM") == [("html", "r.HTM")]
+        assert _outputs("r.docx") == [("docx", "r.docx")]
+        assert _outputs("r") == [("docx", "r")]
+
+    def test_several_formats(self):
+        """Test one file is written per format."""
+        assert _outputs("reports/r.docx", ["csv", "html"]) == [
+            ("csv", "reports/r.csv"),
+            ("html", "reports/r.html"),
+        ]
 
 
 class TestAddDocumentHeader:
     """Tests for _add_document_header function."""
 
-    def test_header_content(self):
+    def test_header_content(self, tmp_path):
         """Test header contains required information."""
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         observations = {
             "date of observations": "2025-01-01 to 2025-01-31",
             "region": "Virginia",
             "date of report": "2025-02-01",
         }
 
-        _add_document_header(doc, observations)
+        _add_document_header(doc.writer, observations)
 
         assert len(doc.paragraphs) > 0
         text = "\n".join([p.text for p in doc.paragraphs])
@@ -124,63 +217,94 @@ class TestAddDocumentHeader:
         assert "Virginia" in text
 
 
-class TestAddSpeciesHeading:
-    """Tests for _add_species_heading function."""
+class TestSpeciesNotes:
+    """Tests for _species_notes function."""
 
-    def test_heading_with_exclude(self):
+    def test_heading_with_exclude(self, tmp_path):
         """Test species heading with exclude information."""
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         review_species = {"exclude": ["County1", "County2"]}
 
-        _add_species_heading(doc, "Northern Cardinal", review_species)
+        _add_species_group(
+            doc.writer,
+            {
+                "species": "Northern Cardinal",
+                "notes": _species_notes("Northern Cardinal", review_species),
+                "observations": [],
+            },
+        )
 
         text = "\n".join([p.text for p in doc.paragraphs])
         assert "Northern Cardinal" in text
         assert "excluded" in text.lower()
 
-    def test_heading_with_only(self):
+    def test_heading_with_only(self, tmp_path):
         """Test species heading with only information."""
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         review_species = {"only": ["County1"]}
 
-        _add_species_heading(doc, "Roseate Spoonbill", review_species)
+        _add_species_group(
+            doc.writer,
+            {
+                "species": "Roseate Spoonbill",
+                "notes": _species_notes("Roseate Spoonbill", review_species),
+                "observations": [],
+            },
+        )
 
         text = "\n".join([p.text for p in doc.paragraphs])
         assert "only reviewed" in text.lower()
 
-    def test_heading_default_reviewable(self):
+    def test_heading_default_reviewable(self, tmp_path):
         """Test species heading when reviewable statewide."""
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         review_species = {}
 
-        _add_species_heading(doc, "American Robin", review_species)
+        _add_species_group(
+            doc.writer,
+            {
+                "species": "American Robin",
+                "notes": _species_notes("American Robin", review_species),
+                "observations": [],
+            },
+        )
 
         text = "\n".join([p.text for p in doc.paragraphs])
         assert "reviewable across the entire state" in text.lower()
 
-    def test_heading_unique_exclude_notes(self):
+    def test_heading_unique_exclude_notes(self, tmp_path):
         """Test species heading with unique exclude notes."""
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         review_species = {"uniqueExcludeNotes": "Special notes here"}
 
-        _add_species_heading(doc, "Raven", review_species)
+        _add_species_group(
+            doc.writer,
+            {
+                "species": "Raven",
+                "notes": _species_notes("Raven", review_species),
+                "observations": [],
+            },
+        )
 
         text = "\n".join([p.text for p in doc.paragraphs])
         assert "unique Exclude Notes" in text
 
 
-class TestAddObservationData:
-    """Tests for _add_observation_data function."""
+class TestObservationLine:
+    """Tests for _observation_line and _add_observation functions."""
 
-    @patch("get_reports.create_review_document.ebird_data_access.get_checklist_with_retry")
-    def test_observation_data_formatting(self, mock_checklist):
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_observation_data_formatting(self, mock_checklist, tmp_path):
         """Test observation data is added with correct formatting."""
         mock_checklist.return_value = {
             "userDisplayName": "John Doe",
             "locId": "L123456",
         }
 
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
         record = {
             "observation": {
                 "comName": "Northern Cardinal",
@@ -196,7 +320,9 @@ class TestAddObservationData:
             "sciName": "Cardinalis cardinalis",
         }
 
-        _add_observation_data("test_key", doc, record, species_data)
+        _add_observation(
+            doc.writer, _observation_line("test_key", record, species_data)
+        )
 
         text = doc.paragraphs[-1].text
         assert "Northern Cardinal" in text
@@ -204,15 +330,52 @@ class TestAddObservationData:
         assert "2" in text
         assert "John Doe" in text
 
-    @patch("get_reports.create_review_document.ebird_data_access.get_checklist_with_retry")
-    def test_observation_hyperlink(self, mock_checklist):
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_observation_hyperlink(self, mock_checklist, tmp_path):
         """Test that observation includes eBird checklist hyperlink."""
         mock_checklist.return_value = {
             "userDisplayName": "Jane Smith",
             "locId": "L654321",
         }
 
-        doc = Document()
+        doc = WrittenDocument(tmp_path / "test.docx")
+        record = {
+            "observation": {
+                "comName": "Blue Jay",
+                "subId": "S456",
+                "howMany": 1,
+                "subnational2Name": "Arlington County",
+                "obsDt": "2025-01-20T14:00:00",
+            },
+            "media": [{"id": 2}],
+        }
+        species_data = {
+            "comName": "Blue Jay",
+            "sciName": "Cyanocitta cristata",
+        }
+
+        _add_observation(
+            doc.writer, _observation_line("test_key", record, species_data)
+        )
+
+        hyperlinks = doc.paragraphs[-1].hyperlinks
+        assert len(hyperlinks) > 0
+        assert hyperlinks[0].address == "https://ebird.org/checklist/S456"
+        assert "https://ebird.org/checklist/" in hyperlinks[0].text
+
+
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_observation_uses_prefetched_checklist(
+        self, mock_checklist, tmp_path
+    ):
+        """Test that a prefetched checklist is not fetched again."""
+        doc = WrittenDocument(tmp_path / "test.docx")
         record = {
             "observation": {
                 "comName": "Blue Jay",
@@ -227,89 +390,480 @@ class TestAddObservationData:
             "comName": "Blue Jay",
             "sciName": "Cyanocitta cristata",
         }
+        checklists = {"S456": {"userDisplayName": "Jane Smith", "locId": "L1"}}
+
+        _add_observation(
+            doc.writer,
+            _observation_line("test_key", record, species_data, checklists),
+        )
+
+        mock_checklist.assert_not_called()
+        assert "Jane Smith" in doc.paragraphs[-1].text
+
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_observation_uses_stored_checklist(self, mock_checklist, tmp_path):
+        """Test that checklist details stored in the record are used."""
+        doc = WrittenDocument(tmp_path / "test.docx")
+        record = {
+            "observation": {
+                "comName": "Blue Jay",
+                "subId": "S456",
+                "howMany": 1,
+                "subnational2Name": "Arlington County",
+                "obsDt": "2025-01-20T14:00:00",
+            },
+            "media": True,
+            "checklist": {"userDisplayName": "Jane Smith", "locId": "L1"},
+        }
+        species_data = {
+            "comName": "Blue Jay",
+            "sciName": "Cyanocitta cristata",
+        }
+
+        _add_observation(
+            doc.writer, _observation_line("", record, species_data)
+        )
+
+        mock_checklist.assert_not_called()
+        assert "Jane Smith" in doc.paragraphs[-1].text
+
+
+class TestNeedsEbird:
+    """Tests for _needs_ebird function."""
+
+    def test_enriched_records_need_no_ebird(self):
+        """Test a records file with stored details is used offline."""
+        observations = {
+            "records": [
+                {
+                    "records": [
+                        {"media": True, "checklist": {}, "taxon": {}},
+                        {"media": False},
+                    ]
+                }
+            ]
+        }
+        assert _needs_ebird(observations) is False
+
+    def test_record_without_details_needs_ebird(self):
+        """Test a shown record without stored details needs eBird."""
+        observations = {
+            "records": [{"records": [{"media": True, "taxon": {}}]}]
+        }
+        assert _needs_ebird(observations) is True
+
 
-        _add_observation_data("test_key", doc, record, species_data)
+class TestPrefetchChecklists:
+    """Tests for _prefetch_checklists function."""
 
-        runs = doc.paragraphs[-1].runs
-        hyperlink_runs = [r for r in runs if 'https' in r.text]
-        assert len(hyperlink_runs) > 0
-        assert "https://ebird.org/checklist/" in hyperlink_runs[0].text
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_fetches_each_shown_checklist_once(self, mock_checklist):
+        """Test only checklists of records with media are fetched, once each."""
+        mock_checklist.side_effect = lambda key, observation: {
+            "subId": observation
+        }
+        counties = [
+            {
+                "records": [
+                    {"observation": {"subId": "S1"}, "media": True},
+                    {"observation": {"subId": "S1"}, "media": True},
+                    {"observation": {"subId": "S2"}, "media": False},
+                ]
+            },
+            {"records": [{"observation": {"subId": "S3"}, "media": True}]},
+        ]
 
+        checklists = _prefetch_checklists("key", counties, max_workers=2)
 
-class TestIterateOverSpecies:
-    """Tests for _iterate_over_species function."""
+        assert checklists == {"S1": {"subId": "S1"}, "S3": {"subId": "S3"}}
+        assert mock_checklist.call_count == 2
 
-    @patch("get_reports.create_review_document._add_observation_data")
-    @patch("get_reports.create_review_document._add_species_heading")
-    def test_species_grouping(self, mock_heading, mock_obs_data):
-        """Test species are grouped and sorted correctly."""
-        doc = Document()
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_stored_checklists_not_fetched(self, mock_checklist):
+        """Test records holding their checklist details are not fetched."""
         counties = [
             {
                 "records": [
                     {
-                        "observation": {
-                            "comName": "Robin",
-                            "obsDt": "2025-01-20",
-                            "subnational2Name": "County A",
-                        },
-                        "media": [{"id": 1}],
+                        "observation": {"subId": "S1"},
+                        "media": True,
+                        "checklist": {"userDisplayName": "A", "locId": "L1"},
                     }
                 ]
             }
         ]
-        taxonomy = [{"comName": "Robin", "taxonOrder": 1.0}]
 
-        _iterate_over_species("key", doc, counties, taxonomy)
+        assert not _prefetch_checklists("key", counties)
+        mock_checklist.assert_not_called()
 
-        mock_heading.assert_called()
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_failed_fetch_left_out(self, mock_checklist):
+        """Test a checklist that cannot be fetched is left out."""
+        mock_checklist.side_effect = OSError("unavailable")
+        counties = [
+            {"records": [{"observation": {"subId": "S1"}, "media": True}]}
+        ]
 
-    @patch("get_reports.create_review_document._add_observation_data")
-    @patch("get_reports.create_review_document._add_species_heading")
-    def test_no_media_records_skipped(self, mock_heading, mock_obs_data):
-        """Test records without media are skipped."""
-        doc = Document()
+        assert not _prefetch_checklists("key", counties)
+
+
+def _record(name, county="County A", obs_dt="2025-01-20", sub_id="S1", **extra):
+    """Return a record with media and stored checklist details."""
+    record = {
+        "observation": {
+            "comName": name,
+            "obsDt": obs_dt,
+            "subnational2Name": county,
+            "subId": sub_id,
+            "howMany": 1,
+        },
+        "media": True,
+        "checklist": {"userDisplayName": "A", "locId": "L1"},
+    }
+    record.update(extra)
+    return record
+
+
+class TestSpeciesGroups:
+    """Tests for _species_groups function."""
+
+    def test_species_grouping(self):
+        """Test species are grouped and given notes."""
         counties = [
             {
                 "records": [
-                    {
-                        "observation": {
-                            "comName": "Sparrow",
-                            "obsDt": "2025-01-20",
-                            "subnational2Name": "County B",
-                        }
-                    }
+                    _record("Robin", review_species={"only": ["County A"]})
                 ]
             }
         ]
+        taxonomy = [{"comName": "Robin", "sciName": "T. m", "taxonOrder": 1.0}]
+
+        groups = list(_species_groups("key", counties, taxonomy))
+
+        assert [group["species"] for group in groups] == ["Robin"]
+        assert "only reviewed" in groups[0]["notes"][0]
+
+    def test_no_media_records_skipped(self):
+        """Test records without media are skipped."""
+        counties = [{"records": [_record("Sparrow", media=False)]}]
         taxonomy = [{"comName": "Sparrow", "taxonOrder": 2.0}]
 
-        _iterate_over_species("key", doc, counties, taxonomy)
+        assert not list(_species_groups("key", counties, taxonomy))
 
-        mock_obs_data.assert_not_called()
+    def test_records_sorted_by_county_then_date(self):
+        """Test records are ordered by county, then date across years."""
+        counties = [
+            {
+                "records": [
+                    _record("Robin", "County B", "2025-01-02", "S1"),
+                    _record("Robin", "County A", "2025-01-02 08:00", "S2"),
+                    _record("Robin", "County A", "2024-12-30", "S3"),
+                ]
+            }
+        ]
+        taxonomy = [{"comName": "Robin", "sciName": "T. m"}]
 
+        groups = list(_species_groups("key", counties, taxonomy))
 
-class TestSaveDocument:
-    """Tests for _save_document function."""
+        assert [
+            line["checklist"] for line in groups[0]["observations"]
+        ] == ["S3", "S2", "S1"]
 
-    def test_save_new_document(self, tmp_path):
-        """Test saving a new document."""
-        doc = Document()
-        output_path = tmp_path / "test_output.docx"
+    def test_stored_taxon_used_without_taxonomy(self):
+        """Test species are ordered by the taxon stored in each record."""
+        counties = [
+            {
+                "records": [
+                    _record(
+                        name,
+                        taxon={
+                            "comName": name,
+                            "sciName": sci,
+                            "taxonOrder": order,
+                        },
+                    )
+                    for name, sci, order in (
+                        ("Robin", "T. m", 2.0),
+                        ("Sparrow", "M. m", 1.0),
+                    )
+                ]
+            }
+        ]
+
+        groups = list(_species_groups("", counties, taxonomy=[]))
+
+        assert [group["species"] for group in groups] == ["Sparrow", "Robin"]
+        assert groups[0]["observations"][0]["sciName"] == "M. m"
+
+
+class TestRenderDocx:
+    """Tests for _render_docx function."""
 
-        _save_document(doc, str(output_path))
+    REPORT = {
+        "header": {
+            "date of observations": "2025-01-01",
+            "region": "Virginia",
+            "date of report": "2025-01-20",
+        },
+        "species": [
+            {
+                "species": "Blue Jay",
+                "notes": ["The species Blue Jay is reviewable."],
+                "observations": [
+                    {
+                        "comName": "Blue Jay",
+                        "sciName": "Cyanocitta cristata",
+                        "howMany": 1,
+                        "locality": "L1",
+                        "county": "Arlington County",
+                        "observer": "Jane Smith",
+                        "obsDt": "2025-01-20 14:00",
+                        "checklist": "S456",
+                        "url": "https://ebird.org/checklist/S456",
+                    }
+                ],
+            }
+        ],
+    }
 
-        assert output_path.exists()
+    def test_document_layout(self, tmp_path):
+        """Test the header, species heading, notes and observation."""
+        output_path = tmp_path / "test_output.docx"
+
+        _render_docx(self.REPORT, str(output_path))
+
+        paragraphs = Document(str(output_path)).paragraphs
+        assert [(p.style.name, p.text) for p in paragraphs[6:]] == [
+            ("Heading 2", "Blue Jay"),
+            ("List Bullet", "The species Blue Jay is reviewable."),
+            (
+                "Normal",
+                "Blue Jay (Cyanocitta cristata): 1, L1 Arlington County "
+                "[ph. Jane Smith] 2025-01-20 14:00;"
+                "https://ebird.org/checklist/S456",
+            ),
+        ]
+        assert paragraphs[0].style.name == "Title"
+
+    def test_jobs_merge_in_order(self, tmp_path):
+        """Test sections rendered in worker processes keep their order."""
+        report = {
+            "header": self.REPORT["header"],
+            "species": [
+                dict(self.REPORT["species"][0], species=f"Species {i}")
+                for i in range(6)
+            ],
+        }
+        serial_path = tmp_path / "serial.docx"
+        parallel_path = tmp_path / "parallel.docx"
+
+        _render_docx(report, str(serial_path))
+        _render_docx(report, str(parallel_path), jobs=2)
+
+        serial = [p.text for p in Document(str(serial_path)).paragraphs]
+        parallel = Document(str(parallel_path)).paragraphs
+        assert [p.text for p in parallel] == serial
+        assert parallel[-1].hyperlinks[0].address == (
+            "https://ebird.org/checklist/S456"
+        )
+        assert [p.text for p in parallel if p.style.name == "Heading 2"] == [
+            f"Species {i}" for i in range(6)
+        ]
 
     def test_overwrite_existing_document(self, tmp_path):
         """Test that existing document is overwritten."""
         output_path = tmp_path / "test.docx"
         output_path.write_text("old content")
 
-        doc = Document()
-        _save_document(doc, str(output_path))
+        _render_docx(self.REPORT, str(output_path))
 
-        assert output_path.exists()
         # File should be valid DOCX now
-        assert output_path.stat().st_size > 0
-        assert output_path.stat().st_size > 0
\ No newline at end of file
+        assert len(Document(str(output_path)).paragraphs) == 9
+
+
+def _line(sub_id, county="County A", obs_dt="2025-01-20 08:00"):
+    """Return an observation line of a report."""
+    return {
+        "comName": "Robin",
+        "sciName": "T. m",
+        "howMany": 1,
+        "locality": "L1",
+        "county": county,
+        "observer": "A",
+        "obsDt": obs_dt,
+        "checklist": sub_id,
+        "url": f"https://ebird.org/checklist/{sub_id}",
+    }
+
+
+class TestIncremental:
+    """Tests for --incremental document updates."""
+
+    HEADER = {
+        "date of observations": "2025-01",
+        "region": "US-VA",
+        "date of report": "2025-02-01",
+    }
+
+    def test_merge_inserts_new_lines_in_order(self):
+        """Test new lines go into their species section in date order."""
+        previous = {
+            "header": self.HEADER,
+            "species": [
+                {
+                    "species": "Robin",
+                    "taxonOrder": 2.0,
+                    "notes": [],
+                    "observations": [
+                        _line("S1", obs_dt="2025-01-05"),
+                        _line("S3", obs_dt="2025-01-25"),
+                        _line("S9"),
+                    ],
+                }
+            ],
+        }
+        new = {
+            "header": dict(self.HEADER, region="US-VA-003"),
+            "species": [
+                {
+                    "species": "Robin",
+                    "taxonOrder": 2.0,
+                    "notes": ["new notes"],
+                    "observations": [_line("S2", obs_dt="2025-01-10")],
+                },
+                {
+                    "species": "Sparrow",
+                    "taxonOrder": 1.0,
+                    "notes": [],
+                    "observations": [_line("S4")],
+                },
+            ],
+        }
+        current = {
+            ("S1", "Robin"),
+            ("S2", "Robin"),
+            ("S3", "Robin"),
+            ("S4", "Sparrow"),
+        }
+
+        report = _merge_reports(previous, new, current)
+
+        assert report["header"]["region"] == "US-VA-003"
+        assert [g["species"] for g in report["species"]] == [
+            "Sparrow",
+            "Robin",
+        ]
+        robin = report["species"][1]
+        assert robin["notes"] == ["new notes"]
+        assert [line["checklist"] for line in robin["observations"]] == [
+            "S1",
+            "S2",
+            "S3",
+        ]
+
+    def test_new_records(self):
+        """Test records already in the report are left out."""
+        observations = {
+            "region": "US-VA",
+            "records": [
+                {
+                    "county": "County A",
+                    "records": [
+                        _record("Robin", sub_id="S1"),
+                        _record("Robin", sub_id="S2"),
+                    ],
+                }
+            ],
+        }
+        previous = {
+            "header": self.HEADER,
+            "species": [{"species": "Robin", "observations": [_line("S1")]}],
+        }
+
+        new = _new_records(observations, previous)
+
+        assert [
+            r["observation"]["subId"] for r in new["records"][0]["records"]
+        ] == ["S2"]
+        assert len(observations["records"][0]["records"]) == 2
+
+    def test_manifest_round_trip(self, tmp_path, caplog):
+        """Test the manifest is saved and loaded, and bad ones ignored."""
+        manifest = str(tmp_path / "review.manifest.json")
+        report = {"header": self.HEADER, "species": []}
+
+        assert _load_manifest(manifest) is None
+        _save_manifest(manifest, report)
+        assert _load_manifest(manifest) == report
+
+        (tmp_path / "review.manifest.json").write_text("{", encoding="utf-8")
+        assert _load_manifest(manifest) is None
+        assert "Ignoring unreadable manifest" in caplog.text
+
+    @patch("get_reports.create_review_document.get_taxonomy")
+    @patch(
+        "get_reports.create_review_document.get_ebird_api_key"
+        ".get_ebird_api_key"
+    )
+    @patch(
+        "get_reports.create_review_document.ebird_data_access"
+        ".get_checklist_with_retry"
+    )
+    def test_main_fetches_only_new_checklists(
+        self, mock_checklist, mock_key, mock_taxonomy, tmp_path
+    ):
+        """Test a second run only fetches the checklists of new records."""
+        mock_key.return_value = "key"
+        mock_taxonomy.return_value = [
+            {"comName": "Robin", "sciName": "T. m", "taxonOrder": 1.0}
+        ]
+        mock_checklist.side_effect = lambda key, observation: {
+            "userDisplayName": f"Observer {observation}",
+            "locId": "L1",
+        }
+        records_file = tmp_path / "records.json"
+        output = tmp_path / "review.docx"
+
+        def run_with(sub_ids):
+            records = [_record("Robin", sub_id=sub_id) for sub_id in sub_ids]
+            for record in records:
+                del record["checklist"]
+            records_file.write_text(
+                json.dumps(dict(self.HEADER, records=[{"records": records}])),
+                encoding="utf-8",
+            )
+            with patch(
+                "sys.argv",
+                [
+                    "prog",
+                    "--input",
+                    str(records_file),
+                    "--output",
+                    str(output),
+                    "--incremental",
+                ],
+            ):
+                main()
+
+        run_with(["S1"])
+        run_with(["S1", "S2"])
+
+        assert [
+            c.kwargs["observation"] for c in mock_checklist.call_args_list
+        ] == ["S1", "S2"]
+        text = [p.text for p in Document(str(output)).paragraphs]
+        assert any("Observer S1" in line for line in text)
+        assert any("Observer S2" in line for line in text)
+        assert (tmp_path / "review.manifest.json").exists()
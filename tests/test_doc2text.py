@@ -1,8 +1,17 @@
 """Unit tests for the doc2text module."""
 
+import difflib
+
 import pytest
 from docx import Document, opc
-from integration_test.doc2text import extract_text_from_docx, _parse_arguments
+from get_reports.docx_writer import DocxWriter, run
+from integration_test.doc2text import (
+    _parse_arguments,
+    diff_lines,
+    extract_text_from_docx,
+    iter_paragraph_text,
+    main,
+)
 
 
 @pytest.fixture
@@ -77,3 +86,100 @@ def test_parse_arguments_missing_output(monkeypatch):
 
     with pytest.raises(SystemExit):
         _parse_arguments()
+
+
+def test_iter_paragraph_text_matches_python_docx(tmp_path):
+    """Test that the streamed text is the text python-docx gives, including
+    hyperlinks, tabs and line breaks, and without table text."""
+    input_file = tmp_path / "test.docx"
+    with DocxWriter(str(input_file)) as writer:
+        writer.heading("Review", 0)
+        writer.paragraph(
+            [
+                run("Checklist: ", bold=True),
+                run("S1", hyperlink="https://x/S1"),
+            ],
+            style="List Bullet",
+        )
+        writer.paragraph(["a & b < c"])
+        writer.paragraph()
+    doc = Document(str(input_file))
+    paragraph = doc.add_paragraph("a\tb")
+    paragraph.add_run().add_break()
+    paragraph.add_run("c")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "in a table"
+    doc.add_paragraph("last")
+    doc.save(input_file)
+
+    assert list(iter_paragraph_text(str(input_file))) == [
+        paragraph.text for paragraph in Document(str(input_file)).paragraphs
+    ]
+    assert list(iter_paragraph_text(str(input_file))) == [
+        "Review",
+        "Checklist: S1",
+        "a & b < c",
+        "",
+        "a\tb\nc",
+        "last",
+    ]
+
+
+def test_diff_lines_same():
+    """Test that equal lines have no differences."""
+    assert not diff_lines(iter(["a", "b"]), iter(["a", "b"]))
+
+
+def test_diff_lines_matches_difflib():
+    """Test that the diff, including its line numbers, is the one difflib
+    gives for the whole text."""
+    expected = [f"line {number}" for number in range(100)]
+    actual = list(expected)
+    actual[40] = "changed"
+    del actual[60]
+    actual.append("extra")
+
+    assert diff_lines(actual, expected) == list(
+        difflib.unified_diff(
+            expected, actual, "expected", "actual", lineterm=""
+        )
+    )
+
+
+def test_diff_lines_different_lengths():
+    """Test the diff when one text is a prefix of the other."""
+    assert diff_lines(["a", "b"], ["a"]) == [
+        "--- expected",
+        "+++ actual",
+        "@@ -1 +1,2 @@",
+        " a",
+        "+b",
+    ]
+    assert diff_lines([], ["a"])[2:] == ["@@ -1 +0,0 @@", "-a"]
+
+
+def test_main_with_expected(create_docx_file, tmp_path, monkeypatch, capsys):
+    """Test that main prints the differences from the expected text and
+    exits with status 1."""
+    input_file = create_docx_file("test.docx", ["Hello", "world"])
+    output_file = tmp_path / "output.txt"
+    expected_file = tmp_path / "expected.txt"
+    expected_file.write_text("Hello\nworld\n", encoding="utf-8")
+    arguments = [
+        "doc2text",
+        "--input",
+        str(input_file),
+        "--output",
+        str(output_file),
+        "--expected",
+        str(expected_file),
+    ]
+    monkeypatch.setattr("sys.argv", arguments)
+
+    main()
+    assert capsys.readouterr().out == ""
+
+    expected_file.write_text("Hello\nthere\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert "-there\n+world" in capsys.readouterr().out
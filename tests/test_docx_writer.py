@@ -0,0 +1,80 @@
+"""Unit tests for docx_writer module."""
+
+import zipfile
+
+from docx import Document
+
+from get_reports.docx_writer import DocxFragment, DocxWriter, run
+
+
+def test_paragraph_styles_and_runs(tmp_path):
+    output = str(tmp_path / "test.docx")
+
+    with DocxWriter(output) as writer:
+        writer.heading("Title text", 0)
+        writer.heading("Species", 2)
+        writer.paragraph(["Note"], style="List Bullet")
+        writer.paragraph(
+            [run("Bold", bold=True), " plain ", run("Italic", italic=True)]
+        )
+
+    paragraphs = Document(output).paragraphs
+    assert [(p.style.name, p.text) for p in paragraphs] == [
+        ("Title", "Title text"),
+        ("Heading 2", "Species"),
+        ("List Bullet", "Note"),
+        ("Normal", "Bold plain Italic"),
+    ]
+    runs = paragraphs[3].runs
+    assert runs[0].bold and not runs[1].bold and runs[2].italic
+    assert runs[1].text == " plain "
+
+
+def test_text_is_escaped(tmp_path):
+    output = str(tmp_path / "test.docx")
+
+    with DocxWriter(output) as writer:
+        writer.paragraph(["<b>Tom & Jerry</b>\x01"])
+
+    assert Document(output).paragraphs[0].text == "<b>Tom & Jerry</b>"
+
+
+def test_hyperlinks_share_relationships(tmp_path):
+    output = str(tmp_path / "test.docx")
+    url = "https://ebird.org/checklist/S1?a=1&b=2"
+
+    with DocxWriter(output) as writer:
+        writer.paragraph([run("first", hyperlink=url)])
+        writer.paragraph([run("second", hyperlink=url)])
+
+    paragraphs = Document(output).paragraphs
+    assert [p.hyperlinks[0].address for p in paragraphs] == [url, url]
+    with zipfile.ZipFile(output) as package:
+        relationships = package.read("word/_rels/document.xml.rels").decode()
+    assert relationships.count("TargetMode=\"External\"") == 1
+
+
+def test_close_twice(tmp_path):
+    output = str(tmp_path / "test.docx")
+
+    writer = DocxWriter(output)
+    writer.paragraph(["Only"])
+    writer.close()
+    writer.close()
+
+    assert Document(output).paragraphs[0].text == "Only"
+
+
+def test_add_fragment(tmp_path):
+    output = str(tmp_path / "test.docx")
+    fragment = DocxFragment()
+    fragment.heading("Species", 2)
+    fragment.paragraph([run("link", hyperlink="https://ebird.org")])
+
+    with DocxWriter(output) as writer:
+        writer.paragraph(["Before"])
+        writer.add_fragment(fragment)
+
+    paragraphs = Document(output).paragraphs
+    assert [p.text for p in paragraphs] == ["Before", "Species", "link"]
+    assert paragraphs[2].hyperlinks[0].address == "https://ebird.org"
@@ -7,7 +7,10 @@ from get_reports.ebird_data_access import (
     get_checklist_with_retry,
     get_historic_observations_with_retry,
     read_database,
-    get_historic_observations_from_database
+    get_historic_observations_from_database,
+    index_database,
+    rollup_species_codes,
+    set_historic_cache,
 )
 
 
@@ -295,6 +298,68 @@ def test_read_database_success(mock_read_csv, mock_open_function):
     )
 
 
+@patch("builtins.open", new_callable=mock_open, read_data="data")
+@patch("pandas.read_csv")
+def test_read_database_adds_species_codes(mock_read_csv, mock_open_function):
+    mock_read_csv.return_value = pd.DataFrame(
+        {
+            3: ["species", "species"],
+            5: ["SpeciesA", "SpeciesZ"],
+            10: [1, 2],
+            19: ["County", "County"],
+            20: ["US-VA-001", "US-VA-001"],
+            30: ["2025-01-01", "2025-01-01"],
+            31: ["08:00:00", "09:00:00"],
+            34: ["S1", "S2"],
+            37: ["P22", "P22"],
+            46: [1, 1],
+            47: [1, 1],
+        }
+    )
+
+    result = read_database(
+        "dummy_file.csv", species_codes={"SpeciesA": "speca"}
+    )
+
+    assert [obs["speciesCode"] for obs in result] == ["speca", ""]
+    assert "reportAs" not in result[0]
+
+
+def test_rollup_species_codes():
+    codes = pd.Series(["snogoo1", "snogoo", ""])
+    result = rollup_species_codes(codes, {"snogoo1": "snogoo"})
+    assert list(result) == ["snogoo", "snogoo", ""]
+
+
+@patch("builtins.open", new_callable=mock_open, read_data="data")
+@patch("pandas.read_csv")
+def test_read_database_adds_report_as(mock_read_csv, mock_open_function):
+    mock_read_csv.return_value = pd.DataFrame(
+        {
+            3: ["issf"],
+            5: ["Snow Goose (Lesser)"],
+            10: [1],
+            19: ["County"],
+            20: ["US-VA-001"],
+            30: ["2025-01-01"],
+            31: ["08:00:00"],
+            34: ["S1"],
+            37: ["P22"],
+            46: [1],
+            47: [1],
+        }
+    )
+
+    result = read_database(
+        "dummy_file.csv",
+        species_codes={"Snow Goose (Lesser)": "snogoo1"},
+        rollup={"snogoo1": "snogoo"},
+    )
+
+    assert result[0]["speciesCode"] == "snogoo1"
+    assert result[0]["reportAs"] == "snogoo"
+
+
 @patch("builtins.open", new_callable=mock_open)
 @patch("pandas.read_csv")
 def test_read_database_file_not_found(mock_read_csv, mock_open_function):
@@ -421,3 +486,120 @@ def test_get_historic_observations_from_database_empty_database():
 
     assert result == []
 
+
+def test_get_historic_observations_from_database_index():
+
+    database = [
+        {
+            "county": "Fairfax",
+            "category": "species",
+            "obsDt": "2023-10-01 14:30:00",
+            "comName": "SpeciesA",
+        },
+        {
+            "county": "Fairfax",
+            "category": "slash",
+            "obsDt": "2023-10-01 15:30:00",
+            "comName": "SpeciesA/SpeciesB",
+        },
+        {
+            "county": "Fairfax",
+            "category": "species",
+            "obsDt": "2023-10-02 10:00:00",
+            "comName": "SpeciesB",
+        },
+        {
+            "county": "Loudoun",
+            "category": "species",
+            "obsDt": "2023-10-01 10:00:00",
+            "comName": "SpeciesC",
+        },
+    ]
+    index = index_database(database)
+
+    assert len(index) == 3
+    for area, day in [
+        ("Fairfax", date(2023, 10, 1)),
+        ("Fairfax", date(2023, 10, 2)),
+        ("Loudoun", date(2023, 10, 3)),
+    ]:
+        assert get_historic_observations_from_database(
+            index, area=area, day=day, category="species"
+        ) == get_historic_observations_from_database(
+            database, area=area, day=day, category="species"
+        )
+
+
+def test_get_historic_observations_from_database_categories():
+    database = [
+        {
+            "county": "Fairfax",
+            "category": category,
+            "obsDt": "2023-10-01 14:30:00",
+            "comName": category,
+        }
+        for category in ["species", "issf", "form", "slash"]
+    ]
+    day = date(2023, 10, 1)
+
+    for categories in ["species,issf,form", {"species", "issf", "form"}]:
+        for data in [database, index_database(database)]:
+            result = get_historic_observations_from_database(
+                data, area="Fairfax", day=day, category=categories
+            )
+            assert [obs["comName"] for obs in result] == [
+                "species",
+                "issf",
+                "form",
+            ]
+
+
+class DictCache:
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def get(self, area, day, category, rank, detail):
+        return self.entries.get((area, day, category, rank, detail))
+
+    def put(self, area, day, category, rank, detail, observations):
+        self.entries[(area, day, category, rank, detail)] = observations
+
+
+@patch("get_reports.ebird_data_access.get_historic_observations")
+def test_get_historic_observations_with_retry_cache_hit(
+    mock_get_historic_observations,
+):
+    day = date(2024, 1, 1)
+    set_historic_cache(
+        DictCache({("US-VA-003", day, "species", "create", "full"): []})
+    )
+    try:
+        result = get_historic_observations_with_retry(
+            "key", "US-VA-003", day, "species", "create", "full"
+        )
+    finally:
+        set_historic_cache(None)
+
+    assert result == []
+    mock_get_historic_observations.assert_not_called()
+
+
+@patch("get_reports.ebird_data_access.get_historic_observations")
+def test_get_historic_observations_with_retry_cache_miss_stores(
+    mock_get_historic_observations,
+):
+    day = date(2024, 1, 1)
+    cache = DictCache()
+    mock_get_historic_observations.return_value = [{"subId": "S1"}]
+    set_historic_cache(cache)
+    try:
+        result = get_historic_observations_with_retry(
+            "key", "US-VA-003", day, "species", "create", "full"
+        )
+    finally:
+        set_historic_cache(None)
+
+    assert result == [{"subId": "S1"}]
+    assert cache.entries == {
+        ("US-VA-003", day, "species", "create", "full"): [{"subId": "S1"}]
+    }
@@ -1,18 +1,34 @@
 # tests/test_get_records_to_review_main.py
 # pylint: disable=W0613, W0212, C0116, C0114, C0115
+import json
 from datetime import date
 from unittest.mock import patch
 
+import pytest
+
+from get_reports.continuation_record import ContinuationRecord
+from get_reports.ebird_data_access import index_database
+from get_reports.get_review_rules import compile_review_rules
+from get_reports.taxonomy_index import TaxonomyIndex
 from get_reports.get_records_to_review import (
+    _add_taxa,
     _county_in_list_or_group,
     _find_record_of_interest,
+    _get_checklist,
     _is_new_record,
     _iterate_days_in_month,
+    _iterate_period,
     _observation_has_media,
     _pelagic_record,
+    _prepare_review,
     _reviewable_species,
+    _review_counties_in_processes,
     _reviewable_species_with_no_exclusions,
+    _state_prefilter,
+    get_records_for_rule_sets,
     get_records_to_review,
+    iterate_records_to_review,
+    run_key,
 )
 
 
@@ -70,45 +86,99 @@ def test_empty_exclusion_list_and_groups():
 
 
 def test_is_new_record_not_exotic_and_not_in_state_list():
-    observation = {"comName": "SpeciesA", "exoticCategory": ""}
-    state_list = [{"comName": "SpeciesB"}, {"comName": "SpeciesC"}]
-    assert _is_new_record(observation, state_list) is True
+    observation = {"speciesCode": "speca", "exoticCategory": ""}
+    state_codes = frozenset({"specb", "specc"})
+    assert _is_new_record(observation, state_codes) is True
 
 
 def test_is_new_record_exotic():
-    observation = {"comName": "SpeciesA", "exoticCategory": "X"}
-    state_list = [{"comName": "SpeciesB"}, {"comName": "SpeciesC"}]
-    assert _is_new_record(observation, state_list) is False
+    observation = {"speciesCode": "speca", "exoticCategory": "X"}
+    state_codes = frozenset({"specb", "specc"})
+    assert _is_new_record(observation, state_codes) is False
 
 
 def test_is_new_record_in_state_list():
-    observation = {"comName": "SpeciesA", "exoticCategory": ""}
-    state_list = [{"comName": "SpeciesA"}, {"comName": "SpeciesC"}]
-    assert _is_new_record(observation, state_list) is False
+    observation = {"speciesCode": "speca", "exoticCategory": ""}
+    state_codes = frozenset({"speca", "specc"})
+    assert _is_new_record(observation, state_codes) is False
 
 
 def test_is_new_record_exotic_and_in_state_list():
-    observation = {"comName": "SpeciesA", "exoticCategory": "X"}
-    state_list = [{"comName": "SpeciesA"}, {"comName": "SpeciesC"}]
-    assert _is_new_record(observation, state_list) is False
+    observation = {"speciesCode": "speca", "exoticCategory": "X"}
+    state_codes = frozenset({"speca", "specc"})
+    assert _is_new_record(observation, state_codes) is False
 
 
-def test_reviewable_species_match():
+def test_is_new_record_without_species_code():
     observation = {"comName": "SpeciesA"}
-    species_to_review = [{"comName": "SpeciesA"}, {"comName": "SpeciesB"}]
-    assert _reviewable_species(observation, species_to_review) is not None
+    state_codes = frozenset({"speca"})
+    assert _is_new_record(observation, state_codes) is True
+
+
+def test_is_new_record_form_of_state_list_species():
+    observation = {"speciesCode": "snogoo1", "exoticCategory": ""}
+    state_codes = frozenset({"snogoo"})
+    assert _is_new_record(observation, state_codes) is True
+    assert (
+        _is_new_record(observation, state_codes, {"snogoo1": "snogoo"})
+        is False
+    )
+
+
+def test_is_new_record_uses_report_as_column():
+    observation = {"speciesCode": "snogoo1", "reportAs": "snogoo"}
+    assert _is_new_record(observation, frozenset({"snogoo"})) is False
+
+
+def test_reviewable_species_form_rolls_up_to_species():
+    observation = {"speciesCode": "snogoo1"}
+    species_by_code = {"snogoo": {"comName": "Snow Goose"}}
+    rollup = {"snogoo1": "snogoo"}
+    assert _reviewable_species(observation, species_by_code) is None
+    assert _reviewable_species(observation, species_by_code, rollup) == {
+        "comName": "Snow Goose"
+    }
+
+
+def test_reviewable_species_form_rule_takes_precedence():
+    observation = {"speciesCode": "egwtea"}
+    species_by_code = {
+        "egwtea": {"comName": "Green-winged Teal (Eurasian)"},
+        "gnwtea": {"comName": "Green-winged Teal"},
+    }
+    rollup = {"egwtea": "gnwtea"}
+    assert _reviewable_species(observation, species_by_code, rollup) == {
+        "comName": "Green-winged Teal (Eurasian)"
+    }
+    assert _reviewable_species({"speciesCode": "gnwtea"}, {
+        "egwtea": {"comName": "Green-winged Teal (Eurasian)"}
+    }, rollup) is None
+
+
+def test_reviewable_species_match():
+    observation = {"speciesCode": "speca"}
+    species_by_code = {
+        "speca": {"comName": "SpeciesA"},
+        "specb": {"comName": "SpeciesB"},
+    }
+    assert _reviewable_species(observation, species_by_code) == {
+        "comName": "SpeciesA"
+    }
 
 
 def test_reviewable_species_no_match():
-    observation = {"comName": "SpeciesC"}
-    species_to_review = [{"comName": "SpeciesA"}, {"comName": "SpeciesB"}]
-    assert _reviewable_species(observation, species_to_review) is None
+    observation = {"speciesCode": "specc"}
+    species_by_code = {
+        "speca": {"comName": "SpeciesA"},
+        "specb": {"comName": "SpeciesB"},
+    }
+    assert _reviewable_species(observation, species_by_code) is None
 
 
 def test_reviewable_species_empty_review_list():
-    observation = {"comName": "SpeciesA"}
-    species_to_review = []
-    assert _reviewable_species(observation, species_to_review) is None
+    observation = {"speciesCode": "speca"}
+    species_by_code = {}
+    assert _reviewable_species(observation, species_by_code) is None
 
 
 def test_reviewable_species_with_no_exclusions_only_match():
@@ -236,7 +306,8 @@ def test_reviewable_species_with_no_exclusions_no_only_or_exclude():
 
 
 @patch(
-    "get_reports.get_records_to_review.ebird_data_access.get_historic_observations"
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations"
 )
 @patch("get_reports.get_records_to_review._is_new_record")
 @patch("get_reports.get_records_to_review._pelagic_record")
@@ -254,10 +325,12 @@ def test_find_record_of_interest_new_record(
     mock_get_historic_observations,
 ):
     ebird_api_key = "test_key"
-    state_list = [{"comName": "SpeciesA"}]
     county = {"code": "CountyCodeA", "name": "CountyA"}
     day = date(2023, 10, 1)
-    review_species = {"review_species": [], "county_groups": []}
+    rules = compile_review_rules(
+        [{"comName": "SpeciesA", "speciesCode": "speca"}],
+        {"review_species": [], "county_groups": []},
+    )
 
     mock_get_historic_observations.return_value = [
         {"comName": "SpeciesB", "subId": "sub123"}
@@ -266,9 +339,7 @@ def test_find_record_of_interest_new_record(
     mock_pelagic_record.return_value = False
     mock_observation_has_media.return_value = True
 
-    result = _find_record_of_interest(
-        ebird_api_key, [], state_list, county, day, review_species
-    )
+    result = _find_record_of_interest(ebird_api_key, [], rules, county, day)
 
     assert len(result) == 1
     assert result[0]["observation"]["comName"] == "SpeciesB"
@@ -278,7 +349,7 @@ def test_find_record_of_interest_new_record(
         token=ebird_api_key,
         area=county["code"],
         date=day,
-        category="species",
+        category="species,issf,form",
         rank="create",
         detail="full",
     )
@@ -288,7 +359,8 @@ def test_find_record_of_interest_new_record(
 
 
 @patch(
-    "get_reports.get_records_to_review.ebird_data_access.get_historic_observations"
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations"
 )
 @patch("get_reports.get_records_to_review._is_new_record")
 @patch("get_reports.get_records_to_review._pelagic_record")
@@ -306,13 +378,15 @@ def test_find_record_of_interest_reviewable_species(
     mock_get_historic_observations,
 ):
     ebird_api_key = "test_key"
-    state_list = [{"comName": "SpeciesA"}]
     county = {"code": "CountyCodeA", "name": "CountyA"}
     day = date(2023, 10, 1)
-    review_species = {
-        "review_species": [{"comName": "SpeciesB"}],
-        "county_groups": [],
-    }
+    rules = compile_review_rules(
+        [{"comName": "SpeciesA", "speciesCode": "speca"}],
+        {
+            "review_species": [{"comName": "SpeciesB", "speciesCode": "specb"}],
+            "county_groups": [],
+        },
+    )
 
     mock_get_historic_observations.return_value = [
         {"comName": "SpeciesB", "subId": "sub123"}
@@ -323,9 +397,7 @@ def test_find_record_of_interest_reviewable_species(
     mock_pelagic_record.return_value = False
     mock_observation_has_media.return_value = True
 
-    result = _find_record_of_interest(
-        ebird_api_key, [], state_list, county, day, review_species
-    )
+    result = _find_record_of_interest(ebird_api_key, [], rules, county, day)
 
     assert len(result) == 1
     assert result[0]["observation"]["comName"] == "SpeciesB"
@@ -337,7 +409,7 @@ def test_find_record_of_interest_reviewable_species(
         token=ebird_api_key,
         area=county["code"],
         date=day,
-        category="species",
+        category="species,issf,form",
         rank="create",
         detail="full",
     )
@@ -349,7 +421,8 @@ def test_find_record_of_interest_reviewable_species(
 
 
 @patch(
-    "get_reports.get_records_to_review.ebird_data_access.get_historic_observations"
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations"
 )
 @patch("get_reports.get_records_to_review._is_new_record")
 @patch("get_reports.get_records_to_review._pelagic_record")
@@ -361,25 +434,25 @@ def test_find_record_of_interest_no_records(
     mock_get_historic_observations,
 ):
     ebird_api_key = "test_key"
-    state_list = [{"comName": "SpeciesA"}]
     county = {"code": "CountyCodeA", "name": "CountyA"}
     day = date(2023, 10, 1)
-    review_species = {"review_species": [], "county_groups": []}
+    rules = compile_review_rules(
+        [{"comName": "SpeciesA", "speciesCode": "speca"}],
+        {"review_species": [], "county_groups": []},
+    )
 
     mock_get_historic_observations.return_value = []
     mock_is_new_record.return_value = False
     mock_reviewable_species.return_value = None
 
-    result = _find_record_of_interest(
-        ebird_api_key, [], state_list, county, day, review_species
-    )
+    result = _find_record_of_interest(ebird_api_key, [], rules, county, day)
 
     assert len(result) == 0
     mock_get_historic_observations.assert_called_once_with(
         token=ebird_api_key,
         area=county["code"],
         date=day,
-        category="species",
+        category="species,issf,form",
         rank="create",
         detail="full",
     )
@@ -464,8 +537,24 @@ def test_iterate_days_in_month_specific_day_30_days():
     assert days[0] == date(2023, 6, 15)
 
 
+def test_iterate_period_date_range_crosses_years():
+    days = list(
+        _iterate_period(2023, 0, 0, (date(2023, 12, 30), date(2024, 1, 2)))
+    )
+    assert days == [
+        date(2023, 12, 30),
+        date(2023, 12, 31),
+        date(2024, 1, 1),
+        date(2024, 1, 2),
+    ]
+
+
+def test_iterate_period_without_range_uses_year_month_day():
+    assert list(_iterate_period(2023, 6, 15)) == [date(2023, 6, 15)]
+
+
 class MockContinuationRecord:
-    def __init__(self, initial_list) -> None:
+    def __init__(self, initial_list, run_key=None) -> None:
         self._to_review = initial_list
         return
 
@@ -478,9 +567,21 @@ class MockContinuationRecord:
     def complete(self) -> None:
         return
 
+    def release(self) -> None:
+        return
+
     def update(self, county: dict, review_records: list) -> None:
         return
 
+    def day_finished(self, county: dict, day: date) -> bool:
+        return False
+
+    def day_done(self, county: dict, day: date, records: list) -> None:
+        return
+
+    def day_records(self, county: dict) -> list:
+        return []
+
 
 @patch("get_reports.get_records_to_review._iterate_days_in_month")
 @patch("get_reports.get_records_to_review._find_record_of_interest")
@@ -692,7 +793,8 @@ def test_get_records_to_review_multiple_days(
 
 
 @patch(
-    "get_reports.get_records_to_review.ebird_data_access.get_checklist_with_retry"
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_checklist_with_retry"
 )
 def test_pelagic_record_true(mock_get_checklist):
     ebird_api_key = "test_key"
@@ -872,3 +974,744 @@ def test_get_records_to_review_multiple_months(
     assert result[0]["county"] == "CountyA"
     assert len(result[0]["records"]) == 12
     assert mock_find_record_of_interest.call_count == 12
+
+
+class MockRulesHolder:
+    def __init__(self, versions) -> None:
+        self._versions = iter(versions)
+
+    def current(self) -> dict:
+        return next(self._versions)
+
+
+@patch("get_reports.get_records_to_review._get_county_records")
+@patch(
+    "get_reports.get_records_to_review.continuation_record.ContinuationRecord",
+    new=MockContinuationRecord,
+)
+def test_get_records_to_review_takes_rules_from_holder_per_county(
+    mock_get_county_records,
+):
+    counties = [
+        {"name": "CountyA", "code": "CountyCodeA"},
+        {"name": "CountyB", "code": "CountyCodeB"},
+    ]
+    first_rules = {"version": 1}
+    second_rules = {"version": 2}
+    mock_get_county_records.return_value = []
+
+    get_records_to_review(
+        "test_key",
+        "",
+        [],
+        counties,
+        2023,
+        10,
+        1,
+        {"review_species": [], "county_groups": []},
+        rules_holder=MockRulesHolder([first_rules, second_rules]),
+    )
+
+    assert mock_get_county_records.call_args_list[0].args[2] is first_rules
+    assert mock_get_county_records.call_args_list[1].args[2] is second_rules
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_checklist_with_retry"
+)
+def test_get_checklist_reuses_fetched_checklist(mock_get_checklist):
+    mock_get_checklist.return_value = {"protocolId": "P22"}
+    checklists = {}
+
+    _get_checklist("test_key", "S1", checklists)
+    result = _get_checklist("test_key", "S1", checklists)
+
+    assert result == {"protocolId": "P22"}
+    assert checklists == {"S1": {"protocolId": "P22"}}
+    mock_get_checklist.assert_called_once_with("test_key", observation="S1")
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_checklist_with_retry"
+)
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations"
+)
+def test_find_record_of_interest_stores_checklist_details(
+    mock_get_historic_observations, mock_get_checklist
+):
+    county = {"code": "CountyCodeA", "name": "CountyA"}
+    rules = compile_review_rules(
+        [{"comName": "SpeciesA", "speciesCode": "speca"}],
+        {"review_species": [], "county_groups": []},
+    )
+    mock_get_historic_observations.return_value = [
+        {
+            "comName": "SpeciesB",
+            "speciesCode": "specb",
+            "subId": "S1",
+            "subnational2Name": "CountyA",
+        }
+    ]
+    mock_get_checklist.return_value = {
+        "userDisplayName": "Jane Smith",
+        "locId": "L1",
+        "protocolId": "P22",
+        "obs": [{"speciesCode": "specb", "mediaCounts": {"P": 1}}],
+    }
+
+    result = _find_record_of_interest(
+        "test_key", [], rules, county, date(2023, 10, 1)
+    )
+
+    assert result[0]["checklist"] == {
+        "userDisplayName": "Jane Smith",
+        "locId": "L1",
+    }
+    mock_get_checklist.assert_called_once()
+
+
+def test_add_taxa():
+    index = TaxonomyIndex(
+        [
+            {
+                "comName": "SpeciesA",
+                "sciName": "Genus a",
+                "speciesCode": "speca",
+                "taxonOrder": 10.0,
+                "category": "species",
+            }
+        ]
+    )
+    records = [
+        {"observation": {"speciesCode": "speca"}},
+        {"observation": {"speciesCode": "unknown"}},
+    ]
+
+    assert _add_taxa(records, index) is records
+    assert records[0]["taxon"] == {
+        "comName": "SpeciesA",
+        "sciName": "Genus a",
+        "taxonOrder": 10.0,
+    }
+    assert "taxon" not in records[1]
+    assert "taxon" not in _add_taxa([{"observation": {}}], None)[0]
+
+
+@patch("get_reports.get_records_to_review._iterate_days_in_month")
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_checklist_with_retry"
+)
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations"
+)
+def test_get_records_for_rule_sets_reads_observations_once(
+    mock_get_historic_observations,
+    mock_get_checklist,
+    mock_iterate_days_in_month,
+):
+    mock_iterate_days_in_month.return_value = [date(2023, 10, 1)]
+    mock_get_historic_observations.return_value = [
+        {
+            "comName": "SpeciesB",
+            "speciesCode": "specb",
+            "subId": "S1",
+            "subnational2Name": "CountyA",
+        }
+    ]
+    mock_get_checklist.return_value = {
+        "obs": [{"speciesCode": "specb", "mediaCounts": {"P": 1}}]
+    }
+    state_list = [
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
+    ]
+    current = compile_review_rules(state_list, {"review_species": []})
+    proposed = compile_review_rules(
+        state_list,
+        {"review_species": [{"comName": "SpeciesB", "speciesCode": "specb"}]},
+    )
+
+    result = get_records_for_rule_sets(
+        "test_key",
+        "",
+        [current, proposed],
+        [{"name": "CountyA", "code": "CountyCodeA"}],
+        2023,
+        10,
+        1,
+        [],
+    )
+
+    assert result[0] == []
+    assert result[1][0]["county"] == "CountyA"
+    assert result[1][0]["records"][0]["media"] is True
+    mock_get_historic_observations.assert_called_once()
+    mock_get_checklist.assert_called_once()
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_get_records_for_rule_sets_date_range(mock_get_historic):
+    mock_get_historic.return_value = []
+
+    result = get_records_for_rule_sets(
+        "test_key",
+        "",
+        [compile_review_rules([], {"review_species": []})],
+        [{"name": "CountyA", "code": "CountyCodeA"}],
+        None,
+        0,
+        0,
+        [],
+        date_range=(date(2023, 12, 30), date(2024, 1, 2)),
+    )
+
+    assert result == [[]]
+    assert [
+        call.kwargs["day"] for call in mock_get_historic.call_args_list
+    ] == [
+        date(2023, 12, 30),
+        date(2023, 12, 31),
+        date(2024, 1, 1),
+        date(2024, 1, 2),
+    ]
+
+
+PREFILTER_COUNTIES = [
+    {"name": "CountyA", "code": "US-XX-001"},
+    {"name": "CountyB", "code": "US-XX-002"},
+]
+PREFILTER_RULES = compile_review_rules(
+    [
+        {"comName": "Common", "speciesCode": "common"},
+        {"comName": "Rare", "speciesCode": "rare"},
+    ],
+    {
+        "review_species": [
+            {"comName": "Rare", "speciesCode": "rare", "only": ["CountyB"]}
+        ],
+        "county_groups": [],
+    },
+)
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_no_candidates(mock_get_historic):
+    mock_get_historic.return_value = [{"speciesCode": "common"}]
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+    day = date(2023, 10, 1)
+
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is False
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[1], day) is False
+    mock_get_historic.assert_called_once_with(
+        token="key",
+        area="US-XX",
+        day=day,
+        category="species,issf,form",
+        rank="create",
+        detail="full",
+    )
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_review_species_only_in_reviewable_counties(
+    mock_get_historic,
+):
+    mock_get_historic.return_value = [
+        {"speciesCode": "common"},
+        {"speciesCode": "rare"},
+    ]
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+    day = date(2023, 10, 1)
+
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is False
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[1], day) is True
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_uses_rules_reloaded_during_day(mock_get_historic):
+    mock_get_historic.return_value = [
+        {"speciesCode": "common"},
+        {"speciesCode": "rare"},
+    ]
+    reloaded_rules = compile_review_rules(
+        [
+            {"comName": "Common", "speciesCode": "common"},
+            {"comName": "Rare", "speciesCode": "rare"},
+        ],
+        {
+            "review_species": [{"comName": "Rare", "speciesCode": "rare"}],
+            "county_groups": [],
+        },
+    )
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+    day = date(2023, 10, 1)
+
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is False
+    assert county_needed(reloaded_rules, PREFILTER_COUNTIES[0], day) is True
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is False
+    mock_get_historic.assert_called_once()
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_new_record_queries_all_counties(mock_get_historic):
+    mock_get_historic.return_value = [{"speciesCode": "vagrant"}]
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+    day = date(2023, 10, 1)
+
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is True
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[1], day) is True
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_escapee_queries_all_counties(mock_get_historic):
+    """The state query returns one observation per species, which may be of
+    an escapee while another county has one that is a new record."""
+    mock_get_historic.return_value = [
+        {"speciesCode": "vagrant", "exoticCategory": "X"}
+    ]
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+    day = date(2023, 10, 1)
+
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[0], day) is True
+    assert county_needed(PREFILTER_RULES, PREFILTER_COUNTIES[1], day) is True
+
+
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access.HISTORIC_RESULT_CAP",
+    2,
+)
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+def test_state_prefilter_result_cap_queries_all_counties(mock_get_historic):
+    mock_get_historic.return_value = [
+        {"speciesCode": "common"},
+        {"speciesCode": "common"},
+    ]
+    county_needed = _state_prefilter("key", "US-XX", PREFILTER_COUNTIES)
+
+    assert county_needed(
+        PREFILTER_RULES, PREFILTER_COUNTIES[0], date(2023, 10, 1)
+    ) is True
+
+
+@patch("get_reports.get_records_to_review._iterate_days_in_month")
+@patch("get_reports.get_records_to_review._find_record_of_interest")
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+@patch(
+    "get_reports.get_records_to_review.continuation_record.ContinuationRecord",
+    new=MockContinuationRecord,
+)
+def test_get_records_to_review_state_fetch_strategy(
+    mock_get_historic, mock_find_record_of_interest, mock_iterate_days_in_month
+):
+    mock_iterate_days_in_month.return_value = [date(2023, 10, 1)]
+    mock_get_historic.return_value = [{"speciesCode": "rare"}]
+    mock_find_record_of_interest.return_value = [
+        {"observation": {"comName": "Rare"}, "new": False}
+    ]
+
+    result = get_records_to_review(
+        "key",
+        "",
+        [
+            {"comName": "Common", "speciesCode": "common"},
+            {"comName": "Rare", "speciesCode": "rare"},
+        ],
+        PREFILTER_COUNTIES,
+        2023,
+        10,
+        1,
+        {
+            "review_species": [
+                {"comName": "Rare", "speciesCode": "rare", "only": ["CountyB"]}
+            ],
+            "county_groups": [],
+        },
+        fetch_strategy="state",
+    )
+
+    mock_get_historic.assert_called_once()
+    mock_find_record_of_interest.assert_called_once()
+    assert (
+        mock_find_record_of_interest.call_args.args[3] == PREFILTER_COUNTIES[1]
+    )
+    assert [county["county"] for county in result] == ["CountyB"]
+
+
+@patch("get_reports.get_records_to_review._iterate_days_in_month")
+@patch("get_reports.get_records_to_review._find_record_of_interest")
+@patch(
+    "get_reports.get_records_to_review.ebird_data_access"
+    ".get_historic_observations_with_retry"
+)
+@patch(
+    "get_reports.get_records_to_review.continuation_record.ContinuationRecord",
+    new=MockContinuationRecord,
+)
+def test_get_records_to_review_day_needed_skips_before_state_query(
+    mock_get_historic, mock_find_record_of_interest, mock_iterate_days_in_month
+):
+    mock_iterate_days_in_month.return_value = [date(2023, 10, 1)]
+    mock_find_record_of_interest.return_value = []
+
+    get_records_to_review(
+        "key",
+        "",
+        [],
+        PREFILTER_COUNTIES,
+        2023,
+        10,
+        1,
+        {"review_species": [], "county_groups": []},
+        fetch_strategy="state",
+        day_needed=lambda county, day: False,
+    )
+
+    mock_get_historic.assert_not_called()
+    mock_find_record_of_interest.assert_not_called()
+
+
+@patch("get_reports.get_records_to_review._iterate_days_in_month")
+@patch("get_reports.get_records_to_review._find_record_of_interest")
+@patch(
+    "get_reports.get_records_to_review.continuation_record.ContinuationRecord",
+    new=MockContinuationRecord,
+)
+def test_iterate_records_to_review_yields_per_county_day(
+    mock_find_record_of_interest, mock_iterate_days_in_month
+):
+    mock_iterate_days_in_month.return_value = [
+        date(2023, 10, 1),
+        date(2023, 10, 2),
+    ]
+    mock_find_record_of_interest.side_effect = [
+        [{"observation": {"comName": "Rare"}, "new": False}],
+        [],
+        [],
+        [{"observation": {"comName": "Rare"}, "new": True}],
+    ]
+
+    county_days = iterate_records_to_review(
+        "key",
+        "",
+        [],
+        PREFILTER_COUNTIES,
+        2023,
+        10,
+        0,
+        {"review_species": [], "county_groups": []},
+    )
+
+    first = next(county_days)
+    assert first["county"] == "CountyA"
+    assert first["day"] == date(2023, 10, 1)
+    assert mock_find_record_of_interest.call_count == 1
+    rest = list(county_days)
+    assert [(c["county"], c["day"]) for c in rest] == [
+        ("CountyB", date(2023, 10, 2))
+    ]
+
+
+class RestartedContinuationRecord(MockContinuationRecord):
+    """Continuation of a run interrupted after the first day of CountyA."""
+
+    days_done = []
+
+    def day_finished(self, county: dict, day: date) -> bool:
+        return county["code"] == "US-XX-001" and day == date(2023, 10, 1)
+
+    def day_done(self, county: dict, day: date, records: list) -> None:
+        self.days_done.append((county["code"], day))
+
+    def day_records(self, county: dict) -> list:
+        if county["code"] == "US-XX-001":
+            return [{"observation": {"comName": "Saved"}, "new": True}]
+        return []
+
+
+@patch("get_reports.get_records_to_review._iterate_days_in_month")
+@patch("get_reports.get_records_to_review._find_record_of_interest")
+@patch(
+    "get_reports.get_records_to_review.continuation_record.ContinuationRecord",
+    new=RestartedContinuationRecord,
+)
+def test_get_records_to_review_skips_finished_days(
+    mock_find_record_of_interest, mock_iterate_days_in_month
+):
+    mock_iterate_days_in_month.return_value = [
+        date(2023, 10, 1),
+        date(2023, 10, 2),
+    ]
+    mock_find_record_of_interest.return_value = [
+        {"observation": {"comName": "Rare"}, "new": False}
+    ]
+
+    result = get_records_to_review(
+        "key",
+        "",
+        [],
+        PREFILTER_COUNTIES[:1],
+        2023,
+        10,
+        0,
+        {"review_species": [], "county_groups": []},
+    )
+
+    mock_find_record_of_interest.assert_called_once()
+    assert RestartedContinuationRecord.days_done == [
+        ("US-XX-001", date(2023, 10, 2))
+    ]
+    assert [r["observation"]["comName"] for r in result[0]["records"]] == [
+        "Saved",
+        "Rare",
+    ]
+
+
+def test_run_key_depends_on_region_period_and_rules():
+    counties = [{"code": "US-VA-003", "name": "Albemarle"}]
+    rules = {"review_species": [], "county_groups": []}
+    key = run_key("", [], counties, 2023, 10, 0, rules)
+
+    assert key == run_key("", [], counties, 2023, 10, 0, rules)
+    assert key != run_key("", [], counties, 2023, 11, 0, rules)
+    assert key != run_key(
+        "", [], [{"code": "US-VA-005", "name": "Alleghany"}], 2023, 10, 0, rules
+    )
+    assert key != run_key(
+        "", [{"comName": "Rare"}], counties, 2023, 10, 0, rules
+    )
+    assert key != run_key(
+        "",
+        [],
+        counties,
+        None,
+        0,
+        0,
+        rules,
+        (date(2023, 10, 1), date(2023, 10, 31)),
+    )
+
+
+def test_review_counties_in_processes_matches_serial_order(tmp_path):
+    database = index_database(
+        [
+            {
+                "county": county["code"],
+                "category": "species",
+                "obsDt": f"2023-10-0{day} 07:00",
+                "comName": "Rare",
+                "speciesCode": "rare",
+                "subnational2Name": county["name"],
+                "subId": f"S{day}{county['code']}",
+            }
+            for county in PREFILTER_COUNTIES
+            for day in (1, 2)
+        ]
+    )
+    rules = compile_review_rules(
+        [], {"review_species": [], "county_groups": []}
+    )
+    partial_directory = tmp_path / "partial"
+
+    results = list(
+        _review_counties_in_processes(
+            "",
+            database,
+            rules,
+            PREFILTER_COUNTIES,
+            2023,
+            10,
+            0,
+            (date(2023, 10, 1), date(2023, 10, 2)),
+            2,
+            partial_directory,
+        )
+    )
+
+    assert [county for county, _ in results] == PREFILTER_COUNTIES
+    assert [
+        [record["observation"]["subId"] for record in records]
+        for _, records in results
+    ] == [["S1US-XX-001", "S2US-XX-001"], ["S1US-XX-002", "S2US-XX-002"]]
+    assert all(record["new"] for _, records in results for record in records)
+    assert sorted(p.name for p in partial_directory.iterdir()) == [
+        "US-XX-001.json",
+        "US-XX-002.json",
+    ]
+
+
+def test_review_counties_in_processes_reuses_partial_files(tmp_path):
+    partial_directory = tmp_path / "partial"
+    partial_directory.mkdir()
+    for county in PREFILTER_COUNTIES:
+        (partial_directory / f"{county['code']}.json").write_text(
+            json.dumps({"county": county["name"], "records": ["saved"]}),
+            encoding="utf-8",
+        )
+
+    results = list(
+        _review_counties_in_processes(
+            "",
+            {},
+            {},
+            PREFILTER_COUNTIES,
+            2023,
+            10,
+            0,
+            None,
+            2,
+            partial_directory,
+        )
+    )
+
+    assert [records for _, records in results] == [["saved"], ["saved"]]
+
+
+@patch("get_reports.get_records_to_review.ebird_data_access.read_database")
+def test_prepare_review_reads_database_once(mock_read_database):
+    mock_read_database.return_value = [
+        {"county": "US-XX-001", "obsDt": "2023-10-01 08:00"}
+    ]
+    taxonomy = TaxonomyIndex([{"comName": "Rare", "speciesCode": "rare"}])
+    database_cache = {}
+
+    databases = [
+        _prepare_review(
+            "",
+            "ebd.txt",
+            [],
+            [county],
+            {"review_species": [], "county_groups": []},
+            taxonomy,
+            "county",
+            None,
+            database_cache,
+        )[1]
+        for county in PREFILTER_COUNTIES
+    ]
+
+    mock_read_database.assert_called_once()
+    assert databases[0] is databases[1]
+    assert list(database_cache) == ["ebd.txt"]
+
+
+@patch("get_reports.get_records_to_review._find_record_of_interest")
+def test_get_records_to_review_releases_lock_on_error(
+    mock_find_record_of_interest, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        ContinuationRecord,
+        "_continuation_file",
+        str(tmp_path / "continuation_data.dat"),
+    )
+    mock_find_record_of_interest.side_effect = RuntimeError("interrupted")
+    arguments = (
+        "key",
+        "",
+        [],
+        PREFILTER_COUNTIES,
+        2023,
+        10,
+        1,
+        {"review_species": [], "county_groups": []},
+    )
+
+    with pytest.raises(RuntimeError):
+        get_records_to_review(*arguments)
+    with pytest.raises(RuntimeError):
+        list(iterate_records_to_review(*arguments))
+
+    assert list(tmp_path.glob("*.lock")) == []
+    assert list(tmp_path.glob("*.dat"))
+
+
+def test_get_records_to_review_subspecies_group_in_database(
+    tmp_path, monkeypatch
+):
+    monkeypatch.setattr(
+        ContinuationRecord,
+        "_continuation_file",
+        str(tmp_path / "continuation_data.dat"),
+    )
+    columns = {
+        3: "issf",
+        5: "Snow Goose (Lesser)",
+        10: "1",
+        19: "CountyB",
+        20: "US-XX-002",
+        30: "2023-10-01",
+        31: "08:00:00",
+        34: "S1",
+        37: "P21",
+        46: "1",
+        47: "1",
+    }
+    database_file = tmp_path / "ebd.txt"
+    database_file.write_text(
+        ",".join(f"c{n}" for n in range(48))
+        + "\n"
+        + ",".join(columns.get(n, "") for n in range(48))
+        + "\n",
+        encoding="utf-8",
+    )
+    taxonomy = [
+        {
+            "comName": "Snow Goose",
+            "speciesCode": "snogoo",
+            "category": "species",
+        },
+        {
+            "comName": "Snow Goose (Lesser)",
+            "speciesCode": "snogoo1",
+            "category": "issf",
+            "reportAs": "snogoo",
+        },
+    ]
+    snow_goose = {"comName": "Snow Goose", "speciesCode": "snogoo"}
+
+    records = get_records_to_review(
+        "key",
+        str(database_file),
+        [snow_goose],
+        PREFILTER_COUNTIES,
+        2023,
+        10,
+        1,
+        {"review_species": [snow_goose], "county_groups": []},
+        taxonomy=taxonomy,
+    )
+
+    assert [county["county"] for county in records] == ["CountyB"]
+    (record,) = records[0]["records"]
+    assert record["reviewable"] is True
+    assert record["review_species"] == snow_goose
+    assert record["observation"]["speciesCode"] == "snogoo1"
@@ -1,13 +1,27 @@
 """Tests for get_reports.py module."""
 
+import json
 import logging
+import os
 import sys
+from datetime import date
 from unittest.mock import MagicMock, mock_open, patch, ANY
 
 import pytest
 
+from get_reports import get_reports as get_reports_module
+from get_reports.continuation_record import (
+    ContinuationRecord,
+    TransientContinuationRecord,
+)
 from get_reports.get_reports import (
+    _merge_records,
     _parse_arguments,
+    _records_file_name,
+    _rules_version,
+    _stream_records_to_file,
+    _stream_region_records,
+    _regions_and_rules_files,
     _save_records_to_file,
     main,
 )
@@ -21,8 +35,11 @@ def test_parse_arguments_required_fields():
     assert args.year == 2023
     assert args.month == 10
     assert args.input == "get_reports/data/varcom_review_species.json"
-    assert args.region == "US-VA"
+    assert args.region is None
     assert not args.verbose
+    assert not args.watch_rules
+    assert args.fetch_strategy == "county"
+    assert args.cache == ""
 
 
 def test_parse_arguments_optional_fields():
@@ -46,8 +63,46 @@ def test_parse_arguments_optional_fields():
     assert args.month == 10
     assert args.day == 15
     assert args.input == "custom_species.json"
-    assert args.region == "US-NY"
+    assert args.region == ["US-NY"]
     assert args.verbose
+    assert not args.incremental
+
+
+def test_parse_arguments_multiple_regions():
+    sys.argv = [
+        "get_reports",
+        "--year",
+        "2023",
+        "--region",
+        "US-VA",
+        "US-MD",
+    ]
+    args = _parse_arguments()
+    assert args.region == ["US-VA", "US-MD"]
+
+
+def test_regions_and_rules_files_single_file():
+    assert _regions_and_rules_files(None, "rules.json") == [
+        ("US-VA", "rules.json")
+    ]
+    assert _regions_and_rules_files(["US-VA", "US-MD"], "rules.json") == [
+        ("US-VA", "rules.json"),
+        ("US-MD", "rules.json"),
+    ]
+
+
+def test_regions_and_rules_files_directory(tmp_path):
+    (tmp_path / "US-VA.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "US-MD.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+
+    assert _regions_and_rules_files(None, str(tmp_path)) == [
+        ("US-MD", str(tmp_path / "US-MD.json")),
+        ("US-VA", str(tmp_path / "US-VA.json")),
+    ]
+    assert _regions_and_rules_files(["US-VA-003"], str(tmp_path)) == [
+        ("US-VA-003", str(tmp_path / "US-VA.json"))
+    ]
 
 
 def test_parse_arguments_version_flag():
@@ -58,6 +113,51 @@ def test_parse_arguments_version_flag():
     assert exception_information.value.code == 0
 
 
+def test_parse_arguments_date_range():
+    sys.argv = [
+        "get_reports",
+        "--start",
+        "2023-09-01",
+        "--end",
+        "2023-11-30",
+    ]
+    args = _parse_arguments()
+    assert args.year is None
+    assert args.start == date(2023, 9, 1)
+    assert args.end == date(2023, 11, 30)
+
+
+@pytest.mark.parametrize(
+    "test_args",
+    [
+        [],
+        ["--start", "2023-09-01"],
+        ["--year", "2023", "--start", "2023-09-01", "--end", "2023-09-02"],
+        ["--start", "2023-09-02", "--end", "2023-09-01"],
+        ["--year", "2023", "--jobs", "0"],
+        ["--year", "2023", "--jobs", "2", "--jsonl"],
+    ],
+)
+def test_parse_arguments_invalid_period(test_args):
+    sys.argv = ["get_reports"] + test_args
+    with pytest.raises(SystemExit) as exception_information:
+        _parse_arguments()
+    assert exception_information.value.code == 2
+
+
+def test_records_file_name_date_range():
+    assert _records_file_name(
+        None,
+        0,
+        0,
+        "US-VA",
+        date_range=(date(2023, 9, 1), date(2023, 11, 30)),
+    ) == (
+        "reports/records_to_review_2023_09_01_to_2023_11_30.json",
+        "2023-09-01/2023-11-30",
+    )
+
+
 @patch("get_reports.get_reports.open", new_callable=mock_open)
 @patch("get_reports.get_reports.datetime")
 def test_save_records_to_file_specific_day(mock_datetime, mock_file_open):
@@ -164,6 +264,28 @@ def test_save_records_to_file_all_year(mock_datetime, mock_file_open):
     handle = mock_file_open()
     assert handle.write.call_count == 32
 
+@patch("get_reports.get_reports.open", new_callable=mock_open)
+@patch("get_reports.get_reports.datetime")
+def test_save_records_to_file_region_in_file_name(
+    mock_datetime, mock_file_open
+):
+    mock_datetime.now.return_value.strftime.return_value = "2023-10-15"
+    mock_datetime.return_value.strftime.side_effect = lambda fmt: "2023-10"
+
+    _save_records_to_file(
+        [{"species": "Mock Bird"}],
+        2023,
+        10,
+        0,
+        "US-MD",
+        region_in_file_name=True,
+    )
+
+    mock_file_open.assert_called_once_with(
+        "reports/records_to_review_2023_10_US-MD.json", "wt", encoding="utf-8"
+    )
+
+
 @patch("get_reports.get_reports.open", new_callable=mock_open)
 def test_save_records_to_file_no_records(mock_file_open):
     # Test data
@@ -205,14 +327,22 @@ def test_main(
     mock_args.year = 2023
     mock_args.month = 10
     mock_args.day = 0
-    mock_args.region = "US-VA"
+    mock_args.region = ["US-VA"]
     mock_args.input = "custom_species.json"
     mock_args.verbose = True
+    mock_args.watch_rules = False
+    mock_args.fetch_strategy = "county"
+    mock_args.cache = ""
+    mock_args.incremental = False
+    mock_args.start = None
+    mock_args.jsonl = False
+    mock_args.jobs = 1
+    mock_args.queue = ""
     mock_parse_arguments.return_value = mock_args
 
     # Mock the return values of the functions
     mock_get_ebird_api_key.return_value = "mock_api_key"
-    mock_get_taxonomy.return_value = "mock_taxonomy"
+    mock_get_taxonomy.return_value = []
     mock_get_state_list.return_value = ["mock_state_list"]
     mock_get_regions.return_value = [{"code": "US-VA-03", "name": "Albemarle"}]
     mock_get_review_rules.return_value = ["mock_species"]
@@ -227,14 +357,14 @@ def test_main(
     mock_get_ebird_api_key.assert_called_once()
     mock_get_taxonomy.assert_called_once_with("mock_api_key")
     mock_get_state_list.assert_called_once_with(
-        "custom_species.json", taxonomy="mock_taxonomy"
+        "custom_species.json", taxonomy=ANY
     )
     mock_get_regions.assert_called_once_with(
         token="mock_api_key", rtype="subnational2", region="US-VA"
     )
     mock_get_review_rules.assert_called_once_with(
         "custom_species.json",
-        "mock_taxonomy",
+        ANY,
         [{"code": "US-VA-03", "name": "Albemarle"}],
         "US-VA",
     )
@@ -247,9 +377,22 @@ def test_main(
         month=10,
         day=0,
         review_species=["mock_species"],
+        taxonomy=ANY,
+        rules_holder=None,
+        fetch_strategy="county",
+        day_needed=None,
+        date_range=None,
+        jobs=1,
+        database_cache={},
     )
     mock_save_records_to_file.assert_called_once_with(
-        ["mock_record"], 2023, 10, 0, "US-VA"
+        ["mock_record"],
+        2023,
+        10,
+        0,
+        "US-VA",
+        region_in_file_name=False,
+        date_range=None,
     )
 
 
@@ -272,14 +415,19 @@ def test_main_region_not_found(
     mock_args.year = 2023
     mock_args.month = 10
     mock_args.day = 0
-    mock_args.region = "US-VA-99"
+    mock_args.region = ["US-VA-99"]
     mock_args.input = "custom_species.json"
     mock_args.verbose = False
+    mock_args.incremental = False
+    mock_args.start = None
+    mock_args.jsonl = False
+    mock_args.jobs = 1
+    mock_args.queue = ""
     mock_parse_arguments.return_value = mock_args
 
     # Mock the return values of the functions
     mock_get_ebird_api_key.return_value = "mock_api_key"
-    mock_get_taxonomy.return_value = "mock_taxonomy"
+    mock_get_taxonomy.return_value = []
     mock_get_state_list.return_value = ["mock_state_list"]
     mock_get_regions.return_value = [{"code": "US-VA-03", "name": "Albemarle"}]
 
@@ -291,13 +439,443 @@ def test_main_region_not_found(
     mock_get_ebird_api_key.assert_called_once()
     mock_get_taxonomy.assert_called_once_with("mock_api_key")
     mock_get_state_list.assert_called_once_with(
-        "custom_species.json", taxonomy="mock_taxonomy"
+        "custom_species.json", taxonomy=ANY
     )
     mock_get_regions.assert_called_once_with(
         token="mock_api_key", rtype="subnational2", region="US-VA"
     )
     mock_logging_error.assert_called_once_with(
-        "Region %s not found in county list of %s. Exiting.",
+        "Region %s not found in county list of %s. Skipping.",
         "US-VA-99",
         "US-VA",
     )
+
+
+@patch("get_reports.get_reports._parse_arguments")
+@patch("get_reports.get_reports.get_ebird_api_key.get_ebird_api_key")
+@patch("get_reports.get_reports.get_taxonomy")
+@patch("get_reports.get_reports.get_state_list.get_state_list")
+@patch("get_reports.get_reports.get_regions")
+@patch("get_reports.get_reports.get_review_rules.get_review_rules")
+@patch("get_reports.get_reports.get_records_to_review.get_records_to_review")
+@patch("get_reports.get_reports._save_records_to_file")
+def test_main_multiple_regions_share_setup(
+    mock_save_records_to_file,
+    mock_get_records_to_review,
+    mock_get_review_rules,
+    mock_get_regions,
+    mock_get_state_list,
+    mock_get_taxonomy,
+    mock_get_ebird_api_key,
+    mock_parse_arguments,
+):
+    mock_args = MagicMock()
+    mock_args.year = 2023
+    mock_args.month = 10
+    mock_args.day = 0
+    mock_args.region = ["US-VA-003", "US-VA-005"]
+    mock_args.input = "custom_species.json"
+    mock_args.EBD = ""
+    mock_args.verbose = False
+    mock_args.watch_rules = False
+    mock_args.fetch_strategy = "county"
+    mock_args.cache = ""
+    mock_args.incremental = False
+    mock_args.start = None
+    mock_args.jsonl = False
+    mock_args.jobs = 1
+    mock_args.queue = ""
+    mock_parse_arguments.return_value = mock_args
+
+    mock_get_ebird_api_key.return_value = "mock_api_key"
+    mock_get_taxonomy.return_value = []
+    mock_get_state_list.return_value = ["mock_state_list"]
+    mock_get_regions.return_value = [
+        {"code": "US-VA-003", "name": "Albemarle"},
+        {"code": "US-VA-005", "name": "Alleghany"},
+    ]
+    mock_get_review_rules.return_value = {"review_species": []}
+    mock_get_records_to_review.side_effect = [["record_a"], ["record_b"]]
+
+    main()
+
+    mock_get_taxonomy.assert_called_once()
+    mock_get_state_list.assert_called_once()
+    mock_get_regions.assert_called_once()
+    mock_get_review_rules.assert_called_once()
+    assert mock_get_records_to_review.call_count == 2
+    assert mock_get_records_to_review.call_args_list[1].kwargs["counties"] == [
+        {"code": "US-VA-005", "name": "Alleghany"}
+    ]
+    calls = mock_get_records_to_review.call_args_list
+    assert (
+        calls[0].kwargs["database_cache"] is calls[1].kwargs["database_cache"]
+    )
+    mock_save_records_to_file.assert_any_call(
+        ["record_a"],
+        2023,
+        10,
+        0,
+        "US-VA-003",
+        region_in_file_name=True,
+        date_range=None,
+    )
+    mock_save_records_to_file.assert_any_call(
+        ["record_b"],
+        2023,
+        10,
+        0,
+        "US-VA-005",
+        region_in_file_name=True,
+        date_range=None,
+    )
+
+
+def _record(sub_id, obs_dt, species_code="snogoo"):
+    return {
+        "observation": {
+            "subId": sub_id,
+            "obsDt": obs_dt,
+            "speciesCode": species_code,
+        },
+        "new": False,
+    }
+
+
+def test_merge_records_replaces_fetched_days():
+    saved = [
+        {
+            "county": "Albemarle",
+            "records": [
+                _record("S1", "2023-10-01 07:00"),
+                _record("S2", "2023-10-02 08:00"),
+            ],
+        }
+    ]
+    new = [
+        {"county": "Albemarle", "records": [_record("S3", "2023-10-02 09:00")]},
+        {"county": "Alleghany", "records": [_record("S4", "2023-10-02 10:00")]},
+    ]
+    fetched = {("Albemarle", "2023-10-02"), ("Alleghany", "2023-10-02")}
+
+    merged = _merge_records(saved, new, fetched)
+
+    assert [county["county"] for county in merged] == ["Albemarle", "Alleghany"]
+    assert [r["observation"]["subId"] for r in merged[0]["records"]] == [
+        "S1",
+        "S3",
+    ]
+
+
+def test_merge_records_does_not_duplicate_records():
+    saved = [{"county": "Albemarle", "records": [_record("S1", "2023-10-01")]}]
+    new = [{"county": "Albemarle", "records": [_record("S1", "2023-10-01")]}]
+
+    merged = _merge_records(saved, new, set())
+
+    assert len(merged[0]["records"]) == 1
+
+
+def test_merge_records_drops_empty_counties():
+    saved = [{"county": "Albemarle", "records": [_record("S1", "2023-10-01")]}]
+
+    assert _merge_records(saved, [], {("Albemarle", "2023-10-01")}) == []
+
+
+@patch("get_reports.get_reports._parse_arguments")
+@patch("get_reports.get_reports.get_ebird_api_key.get_ebird_api_key")
+@patch("get_reports.get_reports.get_taxonomy")
+@patch("get_reports.get_reports.get_state_list.get_state_list")
+@patch("get_reports.get_reports.get_regions")
+@patch("get_reports.get_reports.get_review_rules.get_review_rules")
+@patch("get_reports.get_reports.get_records_to_review.get_records_to_review")
+def test_main_incremental_fetches_only_new_days(
+    mock_get_records_to_review,
+    mock_get_review_rules,
+    mock_get_regions,
+    mock_get_state_list,
+    mock_get_taxonomy,
+    mock_get_ebird_api_key,
+    mock_parse_arguments,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "rules.json").write_text("{}")
+    mock_args = MagicMock()
+    mock_args.year = 2023
+    mock_args.month = 10
+    mock_args.day = 0
+    mock_args.region = ["US-VA-003"]
+    mock_args.input = "rules.json"
+    mock_args.EBD = ""
+    mock_args.verbose = False
+    mock_args.watch_rules = False
+    mock_args.fetch_strategy = "county"
+    mock_args.cache = ""
+    mock_args.incremental = True
+    mock_args.start = None
+    mock_args.jsonl = False
+    mock_args.jobs = 1
+    mock_args.queue = ""
+    mock_parse_arguments.return_value = mock_args
+    mock_get_ebird_api_key.return_value = "mock_api_key"
+    mock_get_taxonomy.return_value = []
+    mock_get_state_list.return_value = []
+    mock_get_regions.return_value = [{"code": "US-VA-003", "name": "Albemarle"}]
+    mock_get_review_rules.return_value = {"review_species": []}
+    county = {"code": "US-VA-003", "name": "Albemarle"}
+    days_asked = []
+
+    def fake_get_records_to_review(**kwargs):
+        days = [date(2023, 10, 1), date(2023, 10, 2)]
+        days_asked.append([d for d in days if kwargs["day_needed"](county, d)])
+        return [
+            {
+                "county": "Albemarle",
+                "records": [
+                    _record(f"S{d.day}", d.isoformat()) for d in days_asked[-1]
+                ],
+            }
+        ]
+
+    mock_get_records_to_review.side_effect = fake_get_records_to_review
+
+    with patch("get_reports.watermark.date") as mock_date:
+        mock_date.today.return_value = date(2023, 11, 30)
+        main()
+        main()
+
+    assert days_asked == [[date(2023, 10, 1), date(2023, 10, 2)], []]
+    records_file = tmp_path / "reports" / "records_to_review_2023_10.json"
+    with open(records_file, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert [
+        r["observation"]["subId"] for r in saved["records"][0]["records"]
+    ] == ["S1", "S2"]
+
+
+def test_rules_version_changes_with_ebd_contents(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text("{}", encoding="utf-8")
+    ebd_file = tmp_path / "ebd.txt"
+    ebd_file.write_text("January", encoding="utf-8")
+    os.utime(ebd_file, ns=(1_000_000_000, 1_000_000_000))
+    january = _rules_version(str(rules_file), str(ebd_file))
+
+    ebd_file.write_text("February", encoding="utf-8")
+    os.utime(ebd_file, ns=(2_000_000_000, 2_000_000_000))
+
+    assert _rules_version(str(rules_file), str(ebd_file)) != january
+    assert _rules_version(str(rules_file), "") == _rules_version(
+        str(rules_file), ""
+    )
+
+
+def test_stream_records_to_file(tmp_path):
+    file_name = str(tmp_path / "records.jsonl")
+    county_days = [
+        {
+            "county": "Albemarle",
+            "day": date(2023, 10, 1),
+            "records": [
+                _record("S1", "2023-10-01"),
+                _record("S2", "2023-10-01"),
+            ],
+        }
+    ]
+
+    written = _stream_records_to_file(
+        iter(county_days), file_name, {"region": "US-VA"}, append=False
+    )
+    more_county_days = [
+        {
+            "county": "Alleghany",
+            "day": date(2023, 10, 2),
+            "records": [_record("S3", "2023-10-02")],
+        }
+    ]
+    _stream_records_to_file(
+        iter(more_county_days),
+        file_name,
+        {"region": "US-VA"},
+        append=True,
+    )
+
+    assert written == 2
+    with open(file_name, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0] == {"region": "US-VA"}
+    assert [line["county"] for line in lines[1:]] == [
+        "Albemarle",
+        "Albemarle",
+        "Alleghany",
+    ]
+
+
+def test_stream_records_to_file_drops_incomplete_line(tmp_path):
+    file_name = tmp_path / "records.jsonl"
+    complete = json.dumps({"county": "Albemarle", "record": _record("S1", "")})
+    file_name.write_text(
+        '{"region": "US-VA"}\n' + complete + '\n{"county": "Alb',
+        encoding="utf-8",
+    )
+
+    _stream_records_to_file(
+        iter(
+            [
+                {
+                    "county": "Albemarle",
+                    "day": date(2023, 10, 2),
+                    "records": [_record("S2", "2023-10-02")],
+                }
+            ]
+        ),
+        str(file_name),
+        {"region": "US-VA"},
+        append=True,
+    )
+
+    lines = file_name.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line).get("record", {}) for line in lines[1:]] == [
+        _record("S1", ""),
+        _record("S2", "2023-10-02"),
+    ]
+
+
+def test_stream_region_records_restart_in_first_county(
+    tmp_path, monkeypatch
+):
+    """A run that stops part way through its first county is restarted by
+    appending to its file, so the records of the days it finished are
+    kept."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    monkeypatch.setattr(
+        ContinuationRecord,
+        "_continuation_file",
+        "reports/continuation_data.dat",
+    )
+    county = {"code": "US-VA-003", "name": "Albemarle"}
+    review_arguments = {
+        "ebird_api_key": "key",
+        "database_file": "",
+        "state_list": [],
+        "counties": [county],
+        "year": 2024,
+        "month": 1,
+        "day": 0,
+        "review_species": {},
+        "taxonomy": None,
+        "rules_holder": None,
+        "fetch_strategy": "county",
+        "day_needed": None,
+        "date_range": None,
+        "jobs": 1,
+    }
+    monkeypatch.setattr(
+        get_reports_module,
+        "_region_review_arguments",
+        lambda *args, **kwargs: dict(review_arguments),
+    )
+    monkeypatch.setattr(
+        get_reports_module.get_records_to_review,
+        "_prepare_review",
+        lambda *args: ({}, [], None),
+    )
+    crash_on = [date(2024, 1, 3)]
+
+    def find_record(ebird_api_key, database, rules, county, day):
+        if day in crash_on:
+            raise RuntimeError("interrupted")
+        return [_record(f"S{day.day}", day.isoformat())]
+
+    monkeypatch.setattr(
+        get_reports_module.get_records_to_review,
+        "_find_record_of_interest",
+        find_record,
+    )
+    args = MagicMock(year=2024, month=1, day=0, start=None)
+
+    with pytest.raises(RuntimeError):
+        _stream_region_records(
+            args, "key", None, "US-VA-003", "rules.json", {}, False
+        )
+    crash_on.clear()
+    _stream_region_records(
+        args, "key", None, "US-VA-003", "rules.json", {}, False
+    )
+
+    with open(
+        "reports/records_to_review_2024_01.jsonl", encoding="utf-8"
+    ) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["region"] == "US-VA-003"
+    assert [line["record"]["observation"]["subId"] for line in lines[1:]] == [
+        f"S{day}" for day in range(1, 32)
+    ]
+
+
+@patch("get_reports.get_reports.get_ebird_api_key.get_ebird_api_key")
+@patch("get_reports.get_reports.get_taxonomy")
+@patch("get_reports.get_reports.get_state_list.get_state_list")
+@patch("get_reports.get_reports.get_regions")
+@patch("get_reports.get_reports.get_review_rules.get_review_rules")
+@patch("get_reports.get_reports.get_records_to_review.get_records_to_review")
+def test_main_queue_enqueue_work_merge(
+    mock_get_records_to_review,
+    mock_get_review_rules,
+    mock_get_regions,
+    mock_get_state_list,
+    mock_get_taxonomy,
+    mock_get_ebird_api_key,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    mock_get_ebird_api_key.return_value = "mock_api_key"
+    mock_get_taxonomy.return_value = []
+    mock_get_state_list.return_value = []
+    mock_get_regions.return_value = [
+        {"code": "US-VA-003", "name": "Albemarle"},
+        {"code": "US-VA-005", "name": "Alleghany"},
+    ]
+    mock_get_review_rules.return_value = {"review_species": []}
+    mock_get_records_to_review.side_effect = lambda **kwargs: [
+        {
+            "county": kwargs["counties"][0]["name"],
+            "records": [_record(kwargs["counties"][0]["code"], "2023-10-01")],
+        }
+    ]
+    queue_args = ["--queue", str(tmp_path / "queue"), "--region", "US-VA"]
+
+    for step, role in enumerate(("enqueue", "merge", "work", "merge")):
+        period = [] if role == "work" else ["--year", "2023", "--month", "10"]
+        sys.argv = ["get_reports", "--queue-role", role] + queue_args + period
+        main()
+        if step == 1:
+            # Nothing is merged until every unit is finished.
+            assert not (
+                tmp_path / "reports" / "records_to_review_2023_10.json"
+            ).exists()
+
+    assert mock_get_records_to_review.call_count == 2
+    assert mock_get_records_to_review.call_args.kwargs["year"] == 2023
+    # The units share the EBD and keep no continuation files.
+    calls = mock_get_records_to_review.call_args_list
+    assert (
+        calls[0].kwargs["database_cache"] is calls[1].kwargs["database_cache"]
+    )
+    assert all(
+        isinstance(call.kwargs["continuation"], TransientContinuationRecord)
+        for call in calls
+    )
+    records_file = tmp_path / "reports" / "records_to_review_2023_10.json"
+    with open(records_file, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert [county["county"] for county in saved["records"]] == [
+        "Albemarle",
+        "Alleghany",
+    ]
@@ -6,6 +6,7 @@ from get_reports.get_review_rules import (
     _check_counties_in_groups,
     _check_exclusions_in_counties,
     _check_species_in_taxonomy,
+    compile_review_rules,
     get_review_rules,
 )
 
@@ -43,9 +44,9 @@ def test_check_species_in_taxonomy_no_warnings(caplog):
         ]
     }
     taxonomy = [
-        {"comName": "SpeciesA"},
-        {"comName": "SpeciesB"},
-        {"comName": "SpeciesC"},
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
+        {"comName": "SpeciesC", "speciesCode": "specc"},
     ]
 
     with caplog.at_level(logging.WARNING):
@@ -62,9 +63,9 @@ def test_check_species_in_taxonomy_species_not_in_taxonomy(caplog):
         ]
     }
     taxonomy = [
-        {"comName": "SpeciesA"},
-        {"comName": "SpeciesB"},
-        {"comName": "SpeciesC"},
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
+        {"comName": "SpeciesC", "speciesCode": "specc"},
     ]
 
     with caplog.at_level(logging.WARNING):
@@ -72,6 +73,8 @@ def test_check_species_in_taxonomy_species_not_in_taxonomy(caplog):
 
     assert len(caplog.records) == 1
     assert "Species SpeciesD not found in eBird taxonomy" in caplog.text
+    assert review_species["review_species"][0]["speciesCode"] == "speca"
+    assert "speciesCode" not in review_species["review_species"][1]
 
 
 def test_check_species_in_taxonomy_multiple_warnings(caplog):
@@ -82,9 +85,9 @@ def test_check_species_in_taxonomy_multiple_warnings(caplog):
         ]
     }
     taxonomy = [
-        {"comName": "SpeciesA"},
-        {"comName": "SpeciesB"},
-        {"comName": "SpeciesC"},
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
+        {"comName": "SpeciesC", "speciesCode": "specc"},
     ]
 
     with caplog.at_level(logging.WARNING):
@@ -102,8 +105,8 @@ def test_check_species_in_taxonomy_logs_info_message(caplog):
         ]
     }
     taxonomy = [
-        {"comName": "SpeciesA"},
-        {"comName": "SpeciesB"},
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
     ]
 
     with caplog.at_level(logging.INFO):
@@ -277,3 +280,47 @@ def test_get_review_rules_validation_functions_called():
                 mock_check_exclusions.assert_called_once_with(
                     mock_data, county_list, state
                 )
+
+
+def test_compile_review_rules():
+    state_list = [
+        {"comName": "SpeciesA", "speciesCode": "speca"},
+        {"comName": "SpeciesB", "speciesCode": "specb"},
+        {"comName": "Unknown"},
+    ]
+    review_species = {
+        "review_species": [
+            {"comName": "SpeciesB", "speciesCode": "specb", "only": ["GroupA"]},
+            {"comName": "Unknown"},
+        ],
+        "county_groups": [
+            {"name": "GroupA", "counties": ["CountyA"]},
+            {"name": "Pelagic Counties", "counties": ["CountyB"]},
+        ],
+    }
+
+    rules = compile_review_rules(state_list, review_species)
+
+    assert rules["state_codes"] == frozenset({"speca", "specb"})
+    assert rules["species_by_code"] == {
+        "specb": review_species["review_species"][0]
+    }
+    assert rules["county_groups"] == review_species["county_groups"]
+    assert rules["pelagic_counties"] == ["CountyB"]
+    assert rules["rollup"] == {}
+
+
+def test_compile_review_rules_keeps_rollup():
+    rollup = {"snogoo1": "snogoo"}
+    rules = compile_review_rules([], {"review_species": []}, rollup)
+    assert rules["rollup"] is rollup
+
+
+def test_compile_review_rules_no_pelagic_group():
+    rules = compile_review_rules(
+        [], {"review_species": [], "county_groups": []}
+    )
+
+    assert rules["state_codes"] == frozenset()
+    assert rules["species_by_code"] == {}
+    assert rules["pelagic_counties"] == []
@@ -10,9 +10,9 @@ from get_reports.get_state_list import get_state_list
 @pytest.fixture
 def mock_taxonomy():
     return [
-        {"comName": "American Robin"},
-        {"comName": "Northern Cardinal"},
-        {"comName": "Blue Jay"},
+        {"comName": "American Robin", "speciesCode": "amerob"},
+        {"comName": "Northern Cardinal", "speciesCode": "norcar"},
+        {"comName": "Blue Jay", "speciesCode": "blujay"},
     ]
 
 
@@ -42,7 +42,9 @@ def test_get_state_list_valid_file(caplog, mock_taxonomy, mock_state_list):
     ):
         with caplog.at_level(logging.INFO):
             result = get_state_list("valid_file.json", mock_taxonomy)
-    assert result == mock_state_list["state_list"]
+    assert [s["comName"] for s in result] == [
+        s["comName"] for s in mock_state_list["state_list"]
+    ]
     assert (
         "Checking species in state list against eBird taxonomy." in caplog.text
     )
@@ -58,5 +60,9 @@ def test_get_state_list_species_not_in_taxonomy(
     ):
         with caplog.at_level(logging.WARNING):
             result = get_state_list("valid_file.json", mock_taxonomy)
-    assert result == mock_state_list["state_list"]
+    assert [s.get("speciesCode") for s in result] == [
+        "amerob",
+        "norcar",
+        None,
+    ]
     assert "Species Unknown Species not found in eBird taxonomy" in caplog.text
@@ -0,0 +1,105 @@
+# pylint: disable=W0212, C0116, C0114
+from datetime import date, datetime
+
+from get_reports.historic_observation_cache import (
+    DAY,
+    HOUR,
+    HistoricObservationCache,
+)
+
+NOW = datetime(2025, 6, 1, 12, 0).timestamp()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_depends_on_age_of_day(tmp_path):
+    cache = HistoricObservationCache(str(tmp_path), now=Clock(NOW))
+    assert cache.ttl(date(2025, 5, 31), empty=False) == HOUR
+    assert cache.ttl(date(2025, 5, 25), empty=False) == 12 * HOUR
+    assert cache.ttl(date(2025, 4, 1), empty=False) == 7 * DAY
+    assert cache.ttl(date(2024, 1, 1), empty=False) == 180 * DAY
+
+
+def test_ttl_shorter_for_empty_responses(tmp_path):
+    cache = HistoricObservationCache(str(tmp_path), now=Clock(NOW))
+    assert cache.ttl(date(2024, 1, 1), empty=True) == 30 * DAY
+    assert cache.ttl(date(2025, 5, 25), empty=True) == 2 * HOUR
+
+
+def test_get_missing_entry(tmp_path):
+    cache = HistoricObservationCache(str(tmp_path), now=Clock(NOW))
+    assert (
+        cache.get("US-VA-003", date(2024, 1, 1), "species", "create", "full")
+        is None
+    )
+
+
+def test_put_then_get(tmp_path):
+    cache = HistoricObservationCache(str(tmp_path), now=Clock(NOW))
+    day = date(2024, 1, 1)
+    cache.put("US-VA-003", day, "species", "create", "full", [{"subId": "S1"}])
+
+    assert cache.get("US-VA-003", day, "species", "create", "full") == [
+        {"subId": "S1"}
+    ]
+    assert cache.get("US-VA-003", day, "species", "create", "simple") is None
+    assert (
+        tmp_path / "US-VA-003" / "2024-01-01_species_create_full.json"
+    ).exists()
+    assert not list(tmp_path.glob("**/*.tmp"))
+
+
+def test_entry_expires(tmp_path):
+    clock = Clock(NOW)
+    cache = HistoricObservationCache(str(tmp_path), now=clock)
+    day = date(2025, 5, 31)
+    cache.put("US-VA-003", day, "species", "create", "full", [{"subId": "S1"}])
+
+    clock.now = NOW + HOUR + 1
+
+    assert cache.get("US-VA-003", day, "species", "create", "full") is None
+
+
+def test_ttl_depends_on_age_of_day_when_fetched(tmp_path):
+    """A response fetched the day after the observations is still incomplete
+    and expires soon, even once the day is long past."""
+    clock = Clock(NOW)
+    cache = HistoricObservationCache(str(tmp_path), now=clock)
+    day = date(2025, 5, 31)
+    cache.put("US-VA-003", day, "species", "create", "full", [{"subId": "S1"}])
+
+    clock.now = NOW + 100 * DAY
+
+    assert cache.ttl(day, empty=False) == 180 * DAY
+    assert cache.ttl(day, empty=False, fetched=NOW) == HOUR
+    assert cache.get("US-VA-003", day, "species", "create", "full") is None
+
+
+def test_empty_response_is_cached(tmp_path):
+    clock = Clock(NOW)
+    cache = HistoricObservationCache(str(tmp_path), now=clock)
+    day = date(2024, 1, 1)
+    cache.put("US-VA-003", day, "species", "create", "full", [])
+
+    assert cache.get("US-VA-003", day, "species", "create", "full") == []
+    clock.now = NOW + 31 * DAY
+    assert cache.get("US-VA-003", day, "species", "create", "full") is None
+
+
+def test_unreadable_entry_is_ignored(tmp_path, caplog):
+    cache = HistoricObservationCache(str(tmp_path), now=Clock(NOW))
+    path = tmp_path / "US-VA-003" / "2024-01-01_species_create_full.json"
+    path.parent.mkdir(parents=True)
+    path.write_text("{ partial", encoding="utf-8")
+
+    assert (
+        cache.get("US-VA-003", date(2024, 1, 1), "species", "create", "full")
+        is None
+    )
+    assert "Ignoring unreadable cache entry" in caplog.text
@@ -0,0 +1,78 @@
+# pylint: disable=C0116, C0114
+import json
+
+from get_reports.jsonl_to_json import convert, read_jsonl_records
+
+HEADER = {
+    "date of observations": "2023-10",
+    "region": "US-VA",
+    "date of report": "2023-11-01",
+}
+
+
+def _line(county, sub_id, species_code="snogoo"):
+    return {
+        "county": county,
+        "record": {
+            "observation": {"subId": sub_id, "speciesCode": species_code},
+            "new": True,
+        },
+    }
+
+
+def _write_jsonl(path, entries):
+    path.write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8"
+    )
+
+
+def test_read_jsonl_records_groups_by_county(tmp_path):
+    jsonl_file = tmp_path / "records.jsonl"
+    _write_jsonl(
+        jsonl_file,
+        [
+            HEADER,
+            _line("Albemarle", "S1"),
+            _line("Alleghany", "S2"),
+            _line("Albemarle", "S3"),
+        ],
+    )
+
+    header, records = read_jsonl_records(str(jsonl_file))
+
+    assert header == HEADER
+    assert [county["county"] for county in records] == [
+        "Albemarle",
+        "Alleghany",
+    ]
+    assert [
+        record["observation"]["subId"] for record in records[0]["records"]
+    ] == ["S1", "S3"]
+
+
+def test_read_jsonl_records_drops_repeated_and_partial_lines(tmp_path):
+    jsonl_file = tmp_path / "records.jsonl"
+    _write_jsonl(
+        jsonl_file,
+        [HEADER, _line("Albemarle", "S1"), _line("Albemarle", "S1")],
+    )
+    with jsonl_file.open("a", encoding="utf-8") as f:
+        f.write('{"county": "Albemarle", "rec')
+
+    _, records = read_jsonl_records(str(jsonl_file))
+
+    assert len(records[0]["records"]) == 1
+
+
+def test_convert_writes_json_records_file(tmp_path):
+    jsonl_file = tmp_path / "records_to_review_2023_10.jsonl"
+    _write_jsonl(jsonl_file, [HEADER, _line("Albemarle", "S1")])
+
+    json_file = convert(str(jsonl_file))
+
+    assert json_file == str(tmp_path / "records_to_review_2023_10.json")
+    with open(json_file, encoding="utf-8") as f:
+        output = json.load(f)
+    assert output["region"] == "US-VA"
+    assert output["date of observations"] == "2023-10"
+    assert output["records"][0]["county"] == "Albemarle"
@@ -0,0 +1,129 @@
+# pylint: disable=W0212, C0116, C0114
+import json
+from unittest.mock import patch
+
+import pytest
+
+from get_reports import records_file
+from get_reports.records_file import iter_records_file, load_shown_records
+
+REVIEW_SPECIES = {"comName": "Robin", "only": ["County A"]}
+
+
+def _record(sub_id, media=True):
+    return {
+        "observation": {
+            "comName": "Robin",
+            "subId": sub_id,
+            "howMany": 12345,
+            "subnational2Name": "County A",
+            "obsDt": "2025-01-20 08:00",
+            "lat": 38.1,
+            "locName": "Somewhere",
+        },
+        "new": False,
+        "reviewable": True,
+        "review_species": dict(REVIEW_SPECIES),
+        "media": media,
+    }
+
+
+RECORDS = {
+    "date of observations": "2025-01",
+    "region": "US-VA",
+    "records": [
+        {"county": "County A", "records": [_record("S1"), _record("S2")]},
+        {"county": "County B", "records": [_record("S3", media=False)]},
+    ],
+    "date of report": "2025-02-01",
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_records_file(tmp_path, chunk_size):
+    file_name = tmp_path / "records.json"
+    file_name.write_text(json.dumps(RECORDS, indent=4), encoding="utf-8")
+
+    with patch.object(records_file, "CHUNK_SIZE", chunk_size):
+        items = list(iter_records_file(str(file_name)))
+
+    assert items == [
+        ("header", ("date of observations", "2025-01")),
+        ("header", ("region", "US-VA")),
+        ("county", RECORDS["records"][0]),
+        ("county", RECORDS["records"][1]),
+        ("header", ("date of report", "2025-02-01")),
+    ]
+
+
+def test_iter_records_file_empty_records(tmp_path):
+    file_name = tmp_path / "records.json"
+    file_name.write_text('{"records": [], "region": "US-VA"}', encoding="utf-8")
+
+    assert list(iter_records_file(str(file_name))) == [
+        ("header", ("region", "US-VA"))
+    ]
+
+
+def test_iter_records_file_truncated(tmp_path):
+    file_name = tmp_path / "records.json"
+    file_name.write_text(json.dumps(RECORDS)[:-20], encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(iter_records_file(str(file_name)))
+
+
+def test_load_shown_records_keeps_shown_fields(tmp_path):
+    file_name = tmp_path / "records.json"
+    file_name.write_text(json.dumps(RECORDS), encoding="utf-8")
+
+    observations = load_shown_records(str(file_name))
+
+    assert observations["region"] == "US-VA"
+    assert observations["date of report"] == "2025-02-01"
+    assert [c["county"] for c in observations["records"]] == ["County A"]
+    first, second = observations["records"][0]["records"]
+    assert first["observation"] == {
+        "comName": "Robin",
+        "subId": "S1",
+        "howMany": 12345,
+        "subnational2Name": "County A",
+        "obsDt": "2025-01-20 08:00",
+    }
+    assert first["review_species"] == REVIEW_SPECIES
+    assert first["review_species"] is second["review_species"]
+
+
+def test_shown_record_shares_only_repeated_fields():
+    shared = records_file._Shared()
+    records = [
+        dict(_record(sub_id), checklist={"locId": "L1"}, taxon={"order": 1})
+        for sub_id in ("S1", "S2")
+    ]
+
+    first, second = [
+        records_file._shown_record(record, shared) for record in records
+    ]
+
+    assert first["taxon"] is second["taxon"]
+    assert first["checklist"] == second["checklist"]
+    assert first["checklist"] is not second["checklist"]
+    assert len(shared._values) == 2
+
+
+def test_load_shown_records_jsonl(tmp_path):
+    file_name = tmp_path / "records.jsonl"
+    lines = [{"region": "US-VA"}] + [
+        {"county": "County A", "record": record}
+        for record in (_record("S1"), _record("S1"), _record("S2", False))
+    ]
+    file_name.write_text(
+        "".join(json.dumps(line) + "\n" for line in lines), encoding="utf-8"
+    )
+
+    observations = load_shown_records(str(file_name))
+
+    assert observations["region"] == "US-VA"
+    assert [
+        r["observation"]["subId"] for r in observations["records"][0]["records"]
+    ] == ["S1"]
@@ -0,0 +1,77 @@
+"""Unit tests for review_renderers module."""
+
+import csv
+
+from get_reports.review_renderers import (render_csv, render_html,
+                                          render_markdown)
+
+REPORT = {
+    "header": {
+        "date of observations": "2025-01",
+        "region": "US-VA",
+        "date of report": "2025-02-01",
+    },
+    "species": [
+        {
+            "species": "Robin",
+            "notes": [
+                "The species Robin is reviewable across the entire state."
+            ],
+            "observations": [
+                {
+                    "comName": "Robin",
+                    "sciName": "Turdus migratorius",
+                    "howMany": 2,
+                    "locality": "L1",
+                    "county": "Albemarle",
+                    "observer": "Jane <Smith>",
+                    "obsDt": "2025-01-20 08:00",
+                    "checklist": "S1",
+                    "url": "https://ebird.org/checklist/S1",
+                }
+            ],
+        }
+    ],
+}
+
+
+def test_render_markdown(tmp_path):
+    output = tmp_path / "report.md"
+
+    render_markdown(REPORT, str(output))
+
+    text = output.read_text(encoding="utf-8")
+    assert text.startswith("# DRAFT Records for Expedited Review\n")
+    assert "- Region: US-VA\n" in text
+    assert "## Robin\n" in text
+    assert (
+        "**Robin** (*Turdus migratorius*): 2, L1 Albemarle "
+        "[ph. Jane <Smith>] 2025-01-20 08:00; "
+        "[https://ebird.org/checklist/S1](https://ebird.org/checklist/S1)"
+    ) in text
+
+
+def test_render_html_escapes_text(tmp_path):
+    output = tmp_path / "report.html"
+
+    render_html(REPORT, str(output))
+
+    text = output.read_text(encoding="utf-8")
+    assert "<h2>Robin</h2>" in text
+    assert "<i>Turdus migratorius</i>" in text
+    assert "[ph. Jane &lt;Smith&gt;]" in text
+    assert '<a href="https://ebird.org/checklist/S1">' in text
+    assert text.endswith("</html>\n")
+
+
+def test_render_csv(tmp_path):
+    output = tmp_path / "report.csv"
+
+    render_csv(REPORT, str(output))
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1
+    assert rows[0]["comName"] == "Robin"
+    assert rows[0]["observer"] == "Jane <Smith>"
+    assert rows[0]["url"] == "https://ebird.org/checklist/S1"
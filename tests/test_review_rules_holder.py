@@ -0,0 +1,119 @@
+# pylint: disable=W0212, C0116, C0114
+import json
+import logging
+import os
+
+from get_reports.review_rules_holder import ReviewRulesHolder
+from get_reports.taxonomy_index import TaxonomyIndex
+
+TAXONOMY = [
+    {"comName": "SpeciesA", "speciesCode": "speca"},
+    {"comName": "SpeciesB", "speciesCode": "specb"},
+]
+COUNTIES = [{"name": "CountyA", "code": "US-XX-001"}]
+
+
+def _write_rules(path, review_names, mtime_ns=None):
+    path.write_text(
+        json.dumps(
+            {
+                "state_list": [
+                    {"comName": "SpeciesA"},
+                    {"comName": "SpeciesB"},
+                ],
+                "review_species": [{"comName": n} for n in review_names],
+                "county_groups": [{"name": "All", "counties": ["CountyA"]}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_initial_rules_are_compiled(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"])
+
+    holder = ReviewRulesHolder(str(rules_file), TAXONOMY, COUNTIES, "US-XX")
+
+    rules = holder.current()
+    assert rules["state_codes"] == frozenset({"speca", "specb"})
+    assert list(rules["species_by_code"]) == ["speca"]
+    assert len(holder.version()) == 64
+
+
+def test_unchanged_file_keeps_same_rules(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"])
+    holder = ReviewRulesHolder(str(rules_file), TAXONOMY, COUNTIES, "US-XX")
+
+    assert holder.current() is holder.current()
+
+
+def test_changed_file_swaps_rules(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"], mtime_ns=1_000_000_000)
+    index = TaxonomyIndex(TAXONOMY)
+    holder = ReviewRulesHolder(str(rules_file), index, COUNTIES, "US-XX")
+    old_rules = holder.current()
+    old_version = holder.version()
+
+    _write_rules(rules_file, ["SpeciesB"], mtime_ns=2_000_000_000)
+    new_rules = holder.current()
+
+    assert new_rules is not old_rules
+    assert list(new_rules["species_by_code"]) == ["specb"]
+    assert list(old_rules["species_by_code"]) == ["speca"]
+    assert holder.version() != old_version
+    assert holder._taxonomy is index
+
+
+def test_touched_file_with_same_content_is_not_recompiled(tmp_path):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"], mtime_ns=1_000_000_000)
+    holder = ReviewRulesHolder(str(rules_file), TAXONOMY, COUNTIES, "US-XX")
+    old_rules = holder.current()
+
+    os.utime(rules_file, ns=(2_000_000_000, 2_000_000_000))
+
+    assert holder.current() is old_rules
+
+
+def test_invalid_file_keeps_current_rules(tmp_path, caplog):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"], mtime_ns=1_000_000_000)
+    holder = ReviewRulesHolder(str(rules_file), TAXONOMY, COUNTIES, "US-XX")
+    old_rules = holder.current()
+
+    rules_file.write_text("{ not json", encoding="utf-8")
+    os.utime(rules_file, ns=(2_000_000_000, 2_000_000_000))
+    with caplog.at_level(logging.ERROR):
+        rules = holder.current()
+
+    assert rules is old_rules
+    assert "keeping current rules" in caplog.text
+
+
+def test_file_missing_a_key_keeps_current_rules(tmp_path, caplog):
+    rules_file = tmp_path / "rules.json"
+    _write_rules(rules_file, ["SpeciesA"], mtime_ns=1_000_000_000)
+    holder = ReviewRulesHolder(str(rules_file), TAXONOMY, COUNTIES, "US-XX")
+    old_rules = holder.current()
+
+    for version, rules_json in enumerate(
+        [
+            {"review_species": [], "county_groups": []},
+            {"state_list": [], "county_groups": []},
+            {"state_list": 1, "review_species": [], "county_groups": []},
+        ],
+        start=2,
+    ):
+        rules_file.write_text(json.dumps(rules_json), encoding="utf-8")
+        mtime_ns = version * 1_000_000_000
+        os.utime(rules_file, ns=(mtime_ns, mtime_ns))
+        with caplog.at_level(logging.ERROR):
+            rules = holder.current()
+
+        assert rules is old_rules
+    assert caplog.text.count("keeping current rules") == 3
@@ -0,0 +1,63 @@
+# pylint: disable=C0116, C0114
+import logging
+
+from get_reports.taxonomy_index import TaxonomyIndex, resolve_species_codes
+
+TAXONOMY = [
+    {"comName": "Snow Goose", "speciesCode": "snogoo", "category": "species"},
+    {"comName": "Brant", "speciesCode": "brant", "category": "species"},
+    {
+        "comName": "Snow Goose (Lesser)",
+        "speciesCode": "snogoo1",
+        "category": "issf",
+        "reportAs": "snogoo",
+    },
+    {
+        "comName": "Lesser/Greater Sand-Plover",
+        "speciesCode": "y00665",
+        "category": "slash",
+    },
+    {"comName": "No Code"},
+]
+
+
+def test_index_maps_names_to_codes():
+    index = TaxonomyIndex(TAXONOMY)
+    assert index.species_code("Snow Goose") == "snogoo"
+    assert index.species_code("Brant") == "brant"
+    assert index.species_code("No Code") is None
+    assert index.taxon_by_code["brant"] is TAXONOMY[1]
+
+
+def test_taxon_by_common_name():
+    index = TaxonomyIndex(TAXONOMY)
+    assert index.taxon("Brant") is TAXONOMY[1]
+    assert index.taxon("No Code") is TAXONOMY[4]
+    assert index.taxon("Unknown") == {}
+
+
+def test_rollup_maps_forms_to_species():
+    index = TaxonomyIndex(TAXONOMY)
+    assert index.rollup == {"snogoo1": "snogoo"}
+    assert index.species_for("snogoo1") == "snogoo"
+    assert index.species_for("snogoo") == "snogoo"
+    assert index.species_for("y00665") == "y00665"
+
+
+def test_of_reuses_existing_index():
+    index = TaxonomyIndex(TAXONOMY)
+    assert TaxonomyIndex.of(index) is index
+    assert isinstance(TaxonomyIndex.of(TAXONOMY), TaxonomyIndex)
+
+
+def test_resolve_species_codes(caplog):
+    entries = [{"comName": "Brant"}, {"comName": "Unknown"}]
+    with caplog.at_level(logging.INFO):
+        result = resolve_species_codes(entries, TAXONOMY, "test list")
+    assert result is entries
+    assert entries[0]["speciesCode"] == "brant"
+    assert "speciesCode" not in entries[1]
+    assert (
+        "Checking species in test list against eBird taxonomy." in caplog.text
+    )
+    assert "Species Unknown not found in eBird taxonomy" in caplog.text
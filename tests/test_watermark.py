@@ -0,0 +1,61 @@
+# pylint: disable=W0212, C0116, C0114
+from datetime import date
+
+import pytest
+
+from get_reports.watermark import SETTLE_DAYS, Watermark
+
+
+@pytest.fixture(autouse=True)
+def watermark_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(Watermark, "_directory", str(tmp_path))
+    return tmp_path
+
+
+def test_new_watermark_has_nothing_current():
+    watermark = Watermark("US-VA", "v1", today=date(2024, 3, 1))
+    assert not watermark.is_current("US-VA-003", date(2024, 1, 1))
+
+
+def test_marked_day_is_current_once_settled():
+    watermark = Watermark("US-VA", "v1", today=date(2024, 3, 1))
+    watermark.mark("US-VA-003", date(2024, 1, 1))
+    assert watermark.is_current("US-VA-003", date(2024, 1, 1))
+    assert not watermark.is_current("US-VA-005", date(2024, 1, 1))
+
+
+def test_recent_day_is_fetched_again():
+    today = date(2024, 3, 1)
+    watermark = Watermark("US-VA", "v1", today=today)
+    watermark.mark("US-VA-003", date(2024, 2, 28))
+    assert not watermark.is_current("US-VA-003", date(2024, 2, 28))
+    assert SETTLE_DAYS > (today - date(2024, 2, 28)).days
+
+
+def test_save_and_reload(watermark_directory):
+    watermark = Watermark("US-VA", "v1", today=date(2024, 3, 1))
+    watermark.mark("US-VA-003", date(2024, 1, 1))
+    watermark.save()
+
+    assert (watermark_directory / "watermark_US-VA.json").exists()
+    assert not list(watermark_directory.glob("*.tmp"))
+    reloaded = Watermark("US-VA", "v1", today=date(2024, 3, 2))
+    assert reloaded.is_current("US-VA-003", date(2024, 1, 1))
+
+
+def test_changed_rules_discard_watermark():
+    watermark = Watermark("US-VA", "v1", today=date(2024, 3, 1))
+    watermark.mark("US-VA-003", date(2024, 1, 1))
+    watermark.save()
+
+    reloaded = Watermark("US-VA", "v2", today=date(2024, 3, 2))
+    assert not reloaded.is_current("US-VA-003", date(2024, 1, 1))
+
+
+def test_unreadable_watermark_is_ignored(watermark_directory, caplog):
+    (watermark_directory / "watermark_US-VA.json").write_text("{not json")
+
+    watermark = Watermark("US-VA", "v1")
+
+    assert not watermark.is_current("US-VA-003", date(2024, 1, 1))
+    assert "Ignoring unreadable watermark" in caplog.text
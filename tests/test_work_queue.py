@@ -0,0 +1,82 @@
+# pylint: disable=C0116, C0114
+import os
+import time
+
+from get_reports.work_queue import WorkQueue
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_add_and_claim(tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    assert queue.add({"id": "b", "n": 2})
+    assert queue.add({"id": "a", "n": 1})
+    assert not queue.add({"id": "a", "n": 1})
+
+    assert queue.claim() == {"id": "a", "n": 1}
+    assert queue.claim() == {"id": "b", "n": 2}
+    assert queue.claim() is None
+    assert not queue.add({"id": "a", "n": 1})
+
+
+def test_complete_stores_result(tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    queue.add({"id": "a"})
+    unit = queue.claim()
+
+    queue.complete(unit, ["record"])
+
+    assert queue.result("a") == ["record"]
+    assert queue.result("b") is None
+    assert queue.units() == [("results", {"id": "a"})]
+    assert not list(tmp_path.glob("**/*.tmp"))
+
+
+def test_release_requeues_unit(tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    queue.add({"id": "a"})
+    unit = queue.claim()
+
+    queue.release(unit)
+
+    assert queue.units() == [("pending", {"id": "a"})]
+    assert queue.claim() == {"id": "a"}
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    clock = Clock(os.path.getmtime(tmp_path) + 1000)
+    queue = WorkQueue(str(tmp_path), lease_seconds=60, now=clock)
+    queue.add({"id": "a"})
+    assert queue.claim() == {"id": "a"}
+    assert queue.claim() is None
+
+    clock.now += 30
+    queue.renew({"id": "a"})
+    clock.now += 59
+    assert queue.claim() is None
+
+    clock.now += 2
+    assert queue.claim() == {"id": "a"}
+
+
+def test_leased_renews_in_background(tmp_path):
+    clock = Clock(0)
+    queue = WorkQueue(str(tmp_path), lease_seconds=0.03, now=clock)
+    queue.add({"id": "a"})
+    unit = queue.claim()
+    claimed = tmp_path / "claimed" / "a.json"
+
+    with queue.leased(unit):
+        clock.now = 100
+        for _ in range(100):
+            if os.path.getmtime(claimed) == 100:
+                break
+            time.sleep(0.01)
+
+    assert os.path.getmtime(claimed) == 100